@@ -0,0 +1,4 @@
+"""
+Micro-benchmarks for the hot paths of whisper. Run a benchmark from the repository
+root as a module, e.g. `python -m benchmarks.packet_codec`.
+"""
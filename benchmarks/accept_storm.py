@@ -0,0 +1,105 @@
+"""
+Accept latency under a reconnect storm: all clients connect at once, send an init
+request and wait for the reply. The latency is measured from the connect call to
+the reply, so it includes the time the connection waits in the accept queue (or for
+the SYN to be retried once the queue overflows). Clients without reply within
+`TIMEOUT` are counted as failed.
+
+It compares the previous setup (backlog of 0 and a single accept per wakeup) with the
+configured backlog and batched accepts, then admission control with a connection
+limit where the clients over the limit receive an exit packet.
+
+Usage: python -m benchmarks.accept_storm
+"""
+
+import time
+import asyncio
+from typing import List
+
+from whisper.packet import Packet, PacketRegistery
+from whisper.packet.framer import Framer
+from whisper.packet.v1 import InitV1Packet, PacketType
+from whisper.server.backend import Server
+from whisper.server.tcp import TcpServer
+from benchmarks.utils import percentile, print_table, quiet_logging, start
+
+
+CLIENTS = 2000
+
+TIMEOUT = 10.0
+"""seconds a client waits for the reply"""
+
+
+async def exchange(port: int) -> Packet:
+    """Connects and provides the reply to init request."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(InitV1Packet.request(username="alice").to_stream())
+        framer = Framer()
+        while (packet := framer.next_packet()) is None:
+            data = await reader.read(65536)
+            if not data:
+                raise EOFError
+            framer.feed(data)
+        return packet
+    finally:
+        writer.close()
+
+
+async def client(port: int, latencies: List[float], rejected: List[float]) -> bool:
+    """Provides whether the client received the reply in time."""
+    started = time.perf_counter()
+    try:
+        packet = await asyncio.wait_for(exchange(port), TIMEOUT)
+    except (OSError, EOFError, asyncio.TimeoutError):
+        return False
+    if packet.type is PacketType.EXIT:
+        rejected.append(time.perf_counter() - started)
+    else:
+        latencies.append(time.perf_counter() - started)
+    return True
+
+
+async def storm(port: int, latencies: List[float], rejected: List[float]) -> int:
+    """Provides the number of clients which did not receive the reply in time."""
+    connected = await asyncio.gather(
+        *(client(port, latencies, rejected) for _ in range(CLIENTS)))
+    return connected.count(False)
+
+
+def run(batch: int, **options) -> tuple:
+    server = Server(conn=TcpServer(), event_loop="asyncio", **options)
+    server.accept_batch = batch
+    thread = start(server)
+    time.sleep(0.1)
+    latencies: List[float] = []
+    rejected: List[float] = []
+    failed = asyncio.run(storm(server.conn.address()[1], latencies, rejected))
+    server.loop.call_soon_threadsafe(server.stop_main)
+    thread.join(10)
+    return (
+        len(latencies),
+        len(rejected),
+        failed,
+        percentile(latencies, 50) * 1e3 if latencies else 0.0,
+        percentile(latencies, 99) * 1e3 if latencies else 0.0,
+        max(latencies, default=0.0) * 1e3,
+    )
+
+
+def main():
+    quiet_logging()
+    PacketRegistery.ensure_regisered()
+    rows = [
+        ("backlog 0, accept 1", *run(1, backlog=0)),
+        ("backlog 4096, accept 128", *run(128, backlog=4096)),
+        ("+ max 500 connections", *run(128, backlog=4096, max_connections=500)),
+    ]
+    print_table(
+        ("setup", "served", "rejected", "failed", "p50 ms", "p99 ms", "max ms"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Broadcast CPU cost as a function of recipient count.
+
+It compares encoding the packet for every recipient (previous `write_coro`) with
+encoding it once into a `Frame` and writing the same buffers to every connection.
+The transport only counts the bytes, so the timings are the server side cost of
+fanning out a message excluding the kernel.
+
+Usage: python -m benchmarks.broadcast
+"""
+
+import time
+import asyncio
+import logging
+
+from whisper.common import Address
+from whisper.packet import Frame, PacketRegistery
+from whisper.packet.v1 import InitV1Packet
+from whisper.server.base import BaseServer
+from whisper.server.connection import ConnHandle
+from benchmarks.utils import print_table, quiet_logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class CountingTransport:
+    """Transport accepting writes without any socket io."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    async def write(self, sock, data, loop):
+        self.bytes += len(data)
+
+    async def writev(self, sock, buffers, loop):
+        for buffer in buffers:
+            self.bytes += len(buffer)
+
+
+async def per_recipient(server, conns, packet, messages):
+    for _ in range(messages):
+        for conn in conns:
+            await server.conn.write(conn.sock, packet.to_stream(), None)
+            logger.debug(f"sent {packet!r} to {conn.address}")
+
+
+async def encode_once(server, conns, packet, messages):
+    for _ in range(messages):
+        frame = Frame(packet)
+        for conn in conns:
+            await server.write_frame(conn, frame, None)
+        logger.debug(f"sent {frame!r} to {len(conns)} connections")
+
+
+def run(coro) -> float:
+    start = time.process_time()
+    asyncio.run(coro)
+    return time.process_time() - start
+
+
+def main():
+    quiet_logging()
+    PacketRegistery.ensure_regisered()
+    server = BaseServer(CountingTransport()) # type: ignore
+    rows = []
+    for size in (64, 4096):
+        packet = InitV1Packet.create(b"x" * size)
+        for recipients in (1, 10, 100, 1000, 10_000):
+            conns = [ConnHandle(None, Address("127.0.0.1", port), {}) # type: ignore
+                     for port in range(recipients)]
+            messages = max(1, 20_000 // recipients)
+            old = run(per_recipient(server, conns, packet, messages))
+            new = run(encode_once(server, conns, packet, messages))
+            rows.append((
+                size,
+                recipients,
+                old / messages * 1e6,
+                new / messages * 1e6,
+                old / new,
+            ))
+    print_table(
+        ("payload", "recipients", "per-recipient us/msg", "encode-once us/msg",
+         "speedup"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
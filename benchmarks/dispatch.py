@@ -0,0 +1,66 @@
+"""
+Per-packet cost of dispatching received packets to the server handlers.
+
+`legacy_table` reproduces the previous dispatch (two level dict lookup by
+version and unique key, then `validate_packet` and isinstance checks on contents
+inside `AbstractPacketHandler.__call__`) and is compared with `DispatchTable`
+which is a single lookup by packet class calling the bound handler directly.
+
+Usage: python -m benchmarks.dispatch
+"""
+
+from whisper.common import Address
+from whisper.handler import DispatchTable
+from whisper.packet import PacketRegistery
+from whisper.packet.v1 import ExitReason, ExitV1Packet, InitV1Packet
+from whisper.server.backend import Server
+from whisper.server.connection import ConnHandle
+from whisper.server.handlers import Handlers
+from whisper.server.handlers.v1 import ExitV1Handler
+from whisper.server.tcp import TcpServer
+from benchmarks.utils import measure, print_table, quiet_logging
+
+
+class NoopExitHandler(ExitV1Handler):
+    """Exit handler doing nothing, so only dispatch is measured."""
+
+    def handle(self, conn, *args, **kwargs):
+        pass
+
+
+def legacy_table(app, handlers):
+    return {version: {
+        handler.unique_key(): handler(app) for handler in handlers[version]
+    } for version in handlers.keys()}
+
+
+def main():
+    quiet_logging()
+    PacketRegistery.ensure_regisered()
+    server = Server(conn=TcpServer())
+    conn = ConnHandle(None, Address("127.0.0.1", 0), {}) # type: ignore
+    cases = (
+        ("exit (noop)", {1: (NoopExitHandler,)},
+         ExitV1Packet.request(ExitReason.SELF_EXIT)),
+        ("exit", Handlers, ExitV1Packet.request(ExitReason.SELF_EXIT)),
+        ("init", Handlers, InitV1Packet.request(username="alice")),
+    )
+    rows = []
+    for name, handlers, packet in cases:
+        legacy = legacy_table(server, handlers)
+        table = DispatchTable(server, handlers)
+
+        def legacy_dispatch():
+            legacy[packet.version()][packet.unique_key()](packet, conn)
+
+        def table_dispatch():
+            table[type(packet)](packet, conn)
+
+        old = measure(legacy_dispatch)
+        new = measure(table_dispatch)
+        rows.append((name, old, new, old / new))
+    print_table(("packet", "legacy ns/pkt", "table ns/pkt", "speedup"), rows)
+
+
+if __name__ == "__main__":
+    main()
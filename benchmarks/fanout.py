@@ -0,0 +1,111 @@
+"""
+Fanout cost of a message posted to the global room as a function of member count.
+
+A message is fanned out with `Server.fanout` and its packets are queued to the
+outboxes of the members with `Server.dispatch_packet`, so the timings are the server
+side cost of a message up to the writers, excluding the socket io and the history. It is compared with
+encoding the message for every member. Members use the json codec, or half of them
+the binary codec, in which case the message is encoded once per codec.
+
+Joining and leaving the room is timed as well, it must not grow with the room.
+
+Usage: python -m benchmarks.fanout
+"""
+
+import time
+from typing import List
+
+from whisper.common import Address
+from whisper.packet import Frame, PacketRegistery
+from whisper.packet.v1 import MessageV1Packet, Status
+from whisper.server.backend import Server
+from whisper.server.connection import ConnHandle
+from whisper.server.outbox import Outbox
+from whisper.server.rooms import GLOBAL_ROOM
+from whisper.server.tcp import TcpServer
+from benchmarks.utils import measure, print_table, quiet_logging
+
+
+MESSAGES = 200_000
+"""member deliveries per run"""
+
+
+def members(server: Server, count: int, codecs: List[str]) -> List[ConnHandle]:
+    """Joins `count` served connections to the global room."""
+    conns = []
+    for port in range(count):
+        conn = ConnHandle(object(), Address("127.0.0.1", port), {}) # type: ignore
+        conn.serve = True
+        conn.username = f"user{port}"
+        conn.codec = codecs[port % len(codecs)]
+        conn.outbox = Outbox(0)
+        server.rooms.join(GLOBAL_ROOM, conn)
+        conns.append(conn)
+    return conns
+
+
+def drain(conns: List[ConnHandle]):
+    for conn in conns:
+        conn.outbox = Outbox(0)
+
+
+def per_member(server: Server, conns: List[ConnHandle], request, messages: int):
+    for _ in range(messages):
+        content = request.contents()
+        message = {"room": GLOBAL_ROOM, "sender": conns[0].username, **content}
+        for conn in server.rooms.get(GLOBAL_ROOM).members: # type: ignore
+            packet = MessageV1Packet.response(
+                status=Status.SUCCESS, codec=conn.codec, **message)
+            server.enqueue(conn, Frame(packet))
+
+
+def fanout(server: Server, conns: List[ConnHandle], request, messages: int):
+    for _ in range(messages):
+        content = request.contents()
+        message = {"room": GLOBAL_ROOM, "sender": conns[0].username, **content}
+        for packet, recipients in server.fanout(GLOBAL_ROOM, message):
+            server.dispatch_packet(packet, recipients)
+
+
+def run(fn, server: Server, conns: List[ConnHandle], request) -> float:
+    """CPU time per message in microseconds."""
+    messages = max(1, MESSAGES // len(conns))
+    start = time.process_time()
+    fn(server, conns, request, messages)
+    elapsed = time.process_time() - start
+    drain(conns)
+    return elapsed / messages * 1e6
+
+
+def main():
+    quiet_logging()
+    PacketRegistery.ensure_regisered()
+    request = MessageV1Packet.request(room=GLOBAL_ROOM, text="hello " * 10)
+    rows = []
+    churn = []
+    for count in (1000, 5000, 10_000):
+        for codecs in (["json"], ["json", "binary"]):
+            server = Server(TcpServer(), event_loop="asyncio")
+            conns = members(server, count, codecs)
+            old = run(per_member, server, conns, request)
+            new = run(fanout, server, conns, request)
+            rows.append((
+                count, "+".join(codecs), old, new, new / count * 1e3, old / new))
+            server.loop.close()
+
+        conn = conns[count // 2]
+        rooms = server.rooms
+        churn.append((count, measure(
+            lambda: (rooms.leave(GLOBAL_ROOM, conn), rooms.join(GLOBAL_ROOM, conn)),
+            number=100_000) / 2))
+    print_table(
+        ("members", "codecs", "per-member us/msg", "fanout us/msg", "ns/member",
+         "speedup"),
+        rows,
+    )
+    print()
+    print_table(("members", "join/leave ns"), churn)
+
+
+if __name__ == "__main__":
+    main()
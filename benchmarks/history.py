@@ -0,0 +1,93 @@
+"""
+Append throughput and replay latency of the room history log (see `HistoryLog`).
+
+Millions of encoded messages are appended to a log in a temporary directory, then
+ranges are replayed: the latest messages for a client joining the room and
+everything since a sequence for a client catching up. Replay time covers locating
+the records and wrapping them in batch frames ready to be queued, the records are
+slices of the memory mapped segments and are not parsed or copied. Reopening the
+log (loading the offset indexes) is timed as well.
+
+Usage: python -m benchmarks.history [MESSAGES]
+"""
+
+import sys
+import time
+import random
+import tempfile
+from pathlib import Path
+from typing import Callable, List
+
+from whisper.packet import Frame, PacketRegistery
+from whisper.packet.v1 import BatchV1Packet, MessageV1Packet, Status
+from whisper.server.history import HistoryLog
+from benchmarks.utils import percentile, print_table, quiet_logging
+
+
+MESSAGES = 2_000_000
+SEGMENT_SIZE = 64 * 1024 * 1024
+QUERIES = 200
+
+
+def replay(views: List[memoryview]) -> List[Frame]:
+    return [Frame(BatchV1Packet.create(view)) # type: ignore[arg-type]
+            for view in views]
+
+
+def latencies(query: Callable[[], List[memoryview]]) -> tuple:
+    samples = []
+    size = 0
+    for _ in range(QUERIES):
+        start = time.perf_counter()
+        frames = replay(query())
+        samples.append(time.perf_counter() - start)
+        size += sum(len(frame.packet.data) for frame in frames)
+    return (
+        percentile(samples, 50) * 1e6,
+        percentile(samples, 99) * 1e6,
+        size / QUERIES / 1024,
+    )
+
+
+def main():
+    quiet_logging()
+    PacketRegistery.ensure_regisered()
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else MESSAGES
+    records = [
+        MessageV1Packet.response(
+            status=Status.SUCCESS, room="global", sender=f"user{i}",
+            text=f"message {i} " + "x" * random.randint(20, 200)).to_stream()
+        for i in range(1000)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "global"
+        log = HistoryLog(path, SEGMENT_SIZE)
+        start = time.perf_counter()
+        size = 0
+        for i in range(count):
+            record = records[i % 1000]
+            log.append(record)
+            size += len(record)
+        log.flush()
+        elapsed = time.perf_counter() - start
+        print(
+            f"appended {count} messages ({size / 2**20:.0f} MB, "
+            f"{len(log.segments)} segments) in {elapsed:.2f}s: "
+            f"{count / elapsed:,.0f} msg/s, {size / 2**20 / elapsed:.0f} MB/s")
+        log.close()
+
+        start = time.perf_counter()
+        log = HistoryLog(path, SEGMENT_SIZE)
+        print(f"reopened in {(time.perf_counter() - start) * 1e3:.1f}ms")
+
+        last = log.last_seq
+        rows = [("last 50", *latencies(lambda: log.last(50)))]
+        for behind in (100, 10_000, 100_000):
+            rows.append((f"since {behind} behind", *latencies(
+                lambda: log.since(last - behind))))
+        print_table(("replay", "p50 us", "p99 us", "KB"), rows)
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
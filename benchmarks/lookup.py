@@ -0,0 +1,51 @@
+"""
+Cost of finding the connections of a user as a function of connected clients.
+
+It compares scanning `Server.clients` for the username (previous `local_clients`)
+with the username and session key lookups of `ClientIndex`.
+
+Usage: python -m benchmarks.lookup
+"""
+
+from typing import Dict, List
+
+from whisper.common import Address
+from whisper.server.connection import ConnHandle
+from whisper.server.index import ClientIndex
+from benchmarks.utils import measure, print_table, quiet_logging
+
+
+def scan(clients: Dict[Address, ConnHandle], username: str) -> List[ConnHandle]:
+    return [conn for conn in list(clients.values())
+            if conn.serve and conn.username == username]
+
+
+def main():
+    quiet_logging()
+    rows = []
+    for count in (1000, 10_000, 100_000):
+        clients: Dict[Address, ConnHandle] = {}
+        index = ClientIndex()
+        for port in range(count):
+            address = Address("127.0.0.1", port)
+            conn = ConnHandle(object(), address, {}) # type: ignore
+            conn.serve = True
+            conn.username = f"user{port}"
+            conn.key = f"key{port}"
+            clients[address] = conn
+            index.add(conn)
+
+        username, key = f"user{count // 2}", f"key{count // 2}"
+        number = max(10, 1_000_000 // count)
+        old = measure(lambda: scan(clients, username), number=number)
+        by_username = measure(lambda: index.by_username(username))
+        by_key = measure(lambda: index.by_key(key))
+        rows.append((count, old / 1e3, by_username, by_key, old / by_username))
+    print_table(
+        ("clients", "scan us", "by username ns", "by key ns", "speedup"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
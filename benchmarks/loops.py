@@ -0,0 +1,100 @@
+"""
+Messages per second and round trip latency of the server running on each eventloop
+implementation (see `LoopRegistery`) for the same request/response workload.
+
+Every client sends an init request, waits for the reply and repeats. The server runs
+in a thread on the eventloop under test, clients run on a stock asyncio eventloop in
+another thread, so only the server side changes between runs. Implementations which
+are not installed are skipped.
+
+Usage: python -m benchmarks.loops
+"""
+
+import time
+import asyncio
+from typing import List
+
+from whisper.eventloop import LoopRegistery
+from whisper.packet import PacketRegistery
+from whisper.packet.framer import Framer
+from whisper.packet.v1 import InitV1Packet
+from whisper.server.backend import ProtocolServer, Server
+from whisper.server.protocol import ProtocolTcpServer
+from whisper.server.tcp import TcpServer
+from benchmarks.utils import percentile, print_table, quiet_logging, start
+
+
+CONNECTIONS = 50
+MESSAGES = 400
+"""round trips per connection"""
+
+
+def available(name: str) -> bool:
+    try:
+        LoopRegistery.factories[name]().close()
+    except ImportError:
+        return False
+    return True
+
+
+
+async def client(port: int, latencies: List[float]):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = InitV1Packet.request(username="alice").to_stream()
+    framer = Framer()
+    pending = 0
+    for _ in range(MESSAGES):
+        sent = time.perf_counter()
+        writer.write(request)
+        pending += 1
+        while pending:
+            while (packet := framer.next_packet()) is None:
+                framer.feed(await reader.read(65536))
+            pending -= len(packet.unpack())
+        latencies.append(time.perf_counter() - sent)
+    writer.close()
+
+
+async def clients(port: int, latencies: List[float]) -> float:
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client(port, latencies) for _ in range(CONNECTIONS)))
+    return time.perf_counter() - start_time
+
+
+def run(backend, transport, loop: str) -> tuple:
+    server = backend(
+        conn=transport(), event_loop=loop, batch_window=None, backlog=4096)
+    thread = start(server)
+    latencies: List[float] = []
+    elapsed = asyncio.run(clients(server.conn.address()[1], latencies))
+    server.loop.call_soon_threadsafe(server.stop_main)
+    thread.join(10)
+    total = CONNECTIONS * MESSAGES
+    return (
+        total / elapsed,
+        percentile(latencies, 50) * 1e3,
+        percentile(latencies, 99) * 1e3,
+    )
+
+
+def main():
+    quiet_logging()
+    PacketRegistery.ensure_regisered()
+    rows = []
+    for name in ("asyncio", "selector", "uvloop"):
+        if not available(name):
+            print(f"skipped {name}: not installed")
+            continue
+        for label, backend, transport in (
+            ("socket", Server, TcpServer),
+            ("protocol", ProtocolServer, ProtocolTcpServer),
+        ):
+            rows.append((name, label, *run(backend, transport, name)))
+    print_table(
+        ("eventloop", "transport", "msg/s", "p50 ms", "p99 ms"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Per-packet encode/decode cost of packet-v1 header codec.
+
+The `legacy_*` functions reproduce the previous implementation (one `struct.pack`
+per field, enum construction and two level dict lookup per packet) so both can be
+compared on the same machine.
+
+Usage: python -m benchmarks.packet_codec
+"""
+
+import struct
+
+from whisper.packet import PacketRegistery
+from whisper.packet.framer import Framer
+from whisper.packet.v1 import InitV1Packet, PacketType, PacketV1, Status
+from benchmarks.utils import measure, print_table, quiet_logging
+
+
+def legacy_encode(packet: PacketV1) -> bytes:
+    version = struct.pack("B", packet.version())
+    type_ = struct.pack("B", packet.type)
+    length = struct.pack("H", len(packet.data))
+    status = struct.pack("B", (packet.status & 0x0F) << 4)
+    return version + type_ + length + status + packet.data
+
+
+def legacy_decode(frame: memoryview) -> PacketV1:
+    version = struct.unpack("B", frame[0:1])[0]
+    type_ = PacketType(struct.unpack("B", frame[1:2])[0])
+    length = struct.unpack("H", frame[2:4])[0]
+    status = Status(struct.unpack("B", frame[4:5])[0] >> 4)
+    data = bytes(frame[5:5 + length])
+    handler = PacketRegistery.handlers[version][type_]
+    return handler(type_, data, status) # type: ignore
+
+
+def main():
+    quiet_logging()
+    PacketRegistery.ensure_regisered()
+    rows = []
+    for size in (16, 256, 4096, 60_000):
+        packet = InitV1Packet.create(b"x" * size)
+        frame = memoryview(packet.to_stream())
+        assert legacy_encode(packet) == bytes(frame)
+
+        stream = bytes(frame) * 64
+        def framed():
+            framer = Framer()
+            framer.feed(stream)
+            while framer.next_packet():
+                pass
+
+        rows.append((
+            size,
+            measure(lambda: legacy_encode(packet)),
+            measure(packet.to_stream),
+            measure(lambda: legacy_decode(frame)),
+            measure(lambda: PacketV1.from_frame(frame)),
+            measure(framed, number=200) / 64,
+        ))
+    print_table(
+        ("payload", "encode-old ns", "encode ns", "decode-old ns", "decode ns",
+         "framer ns/pkt"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
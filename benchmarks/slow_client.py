@@ -0,0 +1,118 @@
+"""
+Delivery latency of healthy clients while another client reads slowly.
+
+The server broadcasts messages to all clients at a steady rate, one of them drains
+its socket far slower than the offered load. `SequentialServer` reproduces the
+previous `write_coro`, writing every packet to its connections one after another,
+and is compared with the per-connection writers of `Server`. Latency is measured
+from queueing a message to a healthy client decoding it.
+
+Usage: python -m benchmarks.slow_client
+"""
+
+import time
+import socket
+import threading
+from typing import List
+
+from whisper.packet import Frame, PacketRegistery
+from whisper.packet.framer import Framer
+from whisper.packet.v1 import InitV1Packet, Reassembler, Status
+from whisper.server.backend import Server
+from whisper.server.tcp import TcpServer
+from benchmarks.utils import percentile, print_table, quiet_logging, start
+
+
+class SequentialServer(Server):
+    """Server writing every packet to its connections in turn from `write_coro`."""
+
+    async def write_coro(self):
+        while True:
+            packet, conns = await self.sendq.get()
+            frame = Frame(packet)
+            for conn in conns:
+                try:
+                    await self.write_frame(conn, frame, self.loop)
+                except OSError:
+                    conn.close = True
+
+    def start_writer(self, conn):
+        pass
+
+
+def healthy_reader(sock: socket.socket, count: int, latencies: List[float]):
+    framer, reassembler = Framer(), Reassembler()
+    while len(latencies) < count:
+        while (packet := framer.next_packet()) is None:
+            if not (data := sock.recv(65536)):
+                return
+            framer.feed(data)
+        if (packet := reassembler.feed(packet)) is None:
+            continue
+        now = time.perf_counter()
+        for message in packet.unpack():
+            latencies.append(now - message.contents()["sent"])
+
+
+def slow_reader(sock: socket.socket, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            if not sock.recv(4096):
+                return
+        except OSError:
+            return
+        time.sleep(0.01)
+
+
+def run(backend, healthy: int, messages: int, size: int, interval: float):
+    server = backend(conn=TcpServer(), outbox_size=256)
+    thread = start(server)
+    port = server.conn.address()[1]
+
+    slow = socket.socket()
+    slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    slow.connect(("127.0.0.1", port))
+    socks = [socket.create_connection(("127.0.0.1", port)) for _ in range(healthy)]
+    while len(server.clients) < healthy + 1:
+        time.sleep(0.01)
+    conns = list(server.clients.values())
+
+    stop = threading.Event()
+    latencies: List[List[float]] = [[] for _ in socks]
+    readers = [threading.Thread(target=healthy_reader, args=(sock, messages, samples))
+               for sock, samples in zip(socks, latencies)]
+    readers.append(threading.Thread(target=slow_reader, args=(slow, stop)))
+    for reader in readers:
+        reader.start()
+
+    payload = "x" * size
+    for _ in range(messages):
+        packet = InitV1Packet.response(
+            status=Status.SUCCESS, username=payload, sent=time.perf_counter())
+        server.schedule(server.sendq.put((packet, conns)))
+        time.sleep(interval)
+    for reader in readers[:-1]:
+        reader.join(120)
+
+    stop.set()
+    server.loop.call_soon_threadsafe(server.stop_main)
+    thread.join(10)
+    for sock in (slow, *socks):
+        sock.close()
+    samples = [sample * 1000 for reader in latencies for sample in reader]
+    return percentile(samples, 50), percentile(samples, 99), max(samples)
+
+
+def main():
+    quiet_logging()
+    PacketRegistery.ensure_regisered()
+    rows = []
+    for name, backend in (("sequential", SequentialServer), ("per-connection", Server)):
+        p50, p99, worst = run(backend, healthy=10, messages=200, size=32768,
+                              interval=0.005)
+        rows.append((name, p50, p99, worst))
+    print_table(("writer", "p50 ms", "p99 ms", "max ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
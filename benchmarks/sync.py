@@ -0,0 +1,56 @@
+"""
+Reconnect catch-up cost of the gap-fill (see `Server.replay`) as a function of the
+messages a client missed.
+
+A room history of many messages is written, then a reconnecting client that
+reports the latest sequence it has seen is sent only the messages after it, while
+a client without sequences would need the whole history resent to be sure it
+missed nothing. Time covers locating the range and wrapping it in batch packets.
+
+Usage: python -m benchmarks.sync [MESSAGES]
+"""
+
+import sys
+import tempfile
+
+from whisper.common import Address
+from whisper.packet import PacketRegistery
+from whisper.server.backend import Server
+from whisper.server.connection import ConnHandle
+from whisper.server.tcp import TcpServer
+from benchmarks.utils import measure, print_table, quiet_logging
+
+
+MESSAGES = 100_000
+ROOM = "global"
+
+
+def main():
+    quiet_logging()
+    PacketRegistery.ensure_regisered()
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else MESSAGES
+    conn = ConnHandle(object(), Address("127.0.0.1", 0), {}) # type: ignore
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = Server(TcpServer(), history_dir=directory)
+        server.sync_limit = count
+        for i in range(count):
+            server.post_message(ROOM, {
+                "room": ROOM, "sender": f"user{i % 100}",
+                "text": f"message {i}", "seq": server.next_seq(ROOM)})
+
+        def row(title: str, since: int) -> tuple:
+            packets = server.replay(ROOM, conn, since)
+            size = sum(len(packet.data) for packet, _ in packets)
+            elapsed = measure(lambda: server.replay(ROOM, conn, since), number=20)
+            return title, len(packets), size / 1024, elapsed / 1e3
+
+        rows = [row(f"missed {missed}", count - missed)
+                for missed in (10, 100, 1000)]
+        rows.append(row("full history", 0))
+        print_table(("reconnect", "batches", "KB", "us"), rows)
+        server.history.close() # type: ignore[union-attr]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Receive throughput of the socket transport (`TcpServer`, a read task per connection)
+and the protocol transport (`ProtocolTcpServer`, `asyncio.Protocol` callbacks) as a
+function of connection count.
+
+Every client writes a burst of small packets and the time until the server has
+decoded all of them into recvq is measured. The server runs in a thread, clients are
+plain blocking sockets of the same process.
+
+Usage: python -m benchmarks.transport
+"""
+
+import time
+import socket
+import threading
+
+from whisper.packet import PacketRegistery
+from whisper.packet.v1 import InitV1Packet
+from whisper.server.backend import ProtocolServer, Server
+from whisper.server.protocol import ProtocolTcpServer
+from whisper.server.tcp import TcpServer
+from benchmarks.utils import print_table, quiet_logging, start
+
+
+def counting(base):
+    """Server backend counting the received packets instead of handling them."""
+
+    class CountingServer(base):
+
+        expected = 0
+        done = threading.Event()
+
+        async def handler_coro(self):
+            received = 0
+            while True:
+                await self.recvq.get()
+                received += 1
+                while not self.recvq.empty():
+                    self.recvq.get_nowait()
+                    received += 1
+                if received == self.expected:
+                    self.done.set()
+                    received = 0
+
+    return CountingServer
+
+
+
+def run(backend, transport, connections: int, packets: int) -> float:
+    server = counting(backend)(conn=transport(), backlog=4096)
+    thread = start(server)
+    port = server.conn.address()[1]
+    socks = [socket.create_connection(("127.0.0.1", port)) for _ in range(connections)]
+    while len(server.clients) < connections:
+        time.sleep(0.01)
+
+    data = InitV1Packet.request(username="alice").to_stream() * packets
+    server.expected = connections * packets
+    server.done.clear()
+    start_time = time.perf_counter()
+    for sock in socks:
+        sock.sendall(data)
+    server.done.wait(60)
+    elapsed = time.perf_counter() - start_time
+
+    server.loop.call_soon_threadsafe(server.stop_main)
+    thread.join(10)
+    for sock in socks:
+        sock.close()
+    return elapsed
+
+
+def main():
+    quiet_logging()
+    PacketRegistery.ensure_regisered()
+    rows = []
+    for connections in (10, 100, 1000, 5000):
+        packets = max(10, 100_000 // connections)
+        total = connections * packets
+        old = run(Server, TcpServer, connections, packets)
+        new = run(ProtocolServer, ProtocolTcpServer, connections, packets)
+        rows.append((connections, total, total / old, total / new, old / new))
+    print_table(
+        ("connections", "packets", "socket pkt/s", "protocol pkt/s", "speedup"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+This module provides helpers shared by the benchmarks.
+"""
+
+import time
+import timeit
+import logging
+import threading
+from typing import Any, Callable, Iterable, Sequence
+
+
+def measure(fn: Callable[[], Any], number: int = 10_000, repeat: int = 5) -> float:
+    """Best time (in nanoseconds) taken per call of `fn`."""
+    timer = timeit.Timer(fn)
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Provides the `q`-th percentile (0-100) of samples."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def print_table(headers: Sequence[str], rows: Iterable[Sequence[Any]]):
+    """Prints rows as aligned text table."""
+    rows = [[f"{v:.1f}" if isinstance(v, float) else str(v) for v in row]
+            for row in rows]
+    widths = [max(len(str(h)), *(len(r[i]) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(h.rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(v.rjust(w) for v, w in zip(row, widths)))
+
+
+def quiet_logging():
+    """Silence library logging so it does not skew timings."""
+    logging.disable(logging.CRITICAL)
+
+
+def start(server) -> threading.Thread:
+    """Runs the server on a free local port in a daemon thread, returns once it
+    is listening."""
+    thread = threading.Thread(
+        target=server.run, kwargs=dict(host="127.0.0.1", port=0), daemon=True)
+    thread.start()
+    while server.conn.sock.getsockname()[1] == 0:
+        time.sleep(0.01)
+    return thread
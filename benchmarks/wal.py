@@ -0,0 +1,98 @@
+"""
+Message throughput and acknowledgement latency for each durability level (see
+`Durability`) of the write-ahead log.
+
+Every client joins its own room, posts a message and waits for it to be fanned back
+(the acknowledgement) before posting the next one, so the latency covers the commit
+of write-ahead log. With batched durability messages of all clients committed within
+the same window share an fsync, with per-message durability every message waits for
+its own fsync.
+
+Usage: python -m benchmarks.wal
+"""
+
+import time
+import asyncio
+import tempfile
+from typing import List
+
+from whisper.packet import PacketRegistery
+from whisper.packet.framer import Framer
+from whisper.packet.v1 import (
+    InitV1Packet, MessageV1Packet, PacketType, RoomAction, RoomV1Packet,
+)
+from whisper.server.backend import Server
+from whisper.server.tcp import TcpServer
+from whisper.server.wal import Durability
+from benchmarks.utils import percentile, print_table, quiet_logging, start
+
+
+CONNECTIONS = 50
+MESSAGES = 100
+"""messages posted by every client"""
+
+
+
+async def receive(reader, framer: Framer, type_: PacketType):
+    while True:
+        while (packet := framer.next_packet()) is None:
+            framer.feed(await reader.read(65536))
+        for packet in packet.unpack():
+            if packet.type == type_:
+                return packet
+
+
+async def client(port: int, index: int, latencies: List[float]):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    framer = Framer()
+    writer.write(InitV1Packet.request(username=f"user{index}").to_stream())
+    await receive(reader, framer, PacketType.INIT)
+    room = f"room{index}"
+    writer.write(RoomV1Packet.request(action=RoomAction.JOIN, room=room).to_stream())
+    await receive(reader, framer, PacketType.ROOM)
+    for message in range(MESSAGES):
+        sent = time.perf_counter()
+        writer.write(
+            MessageV1Packet.request(room=room, text=f"message {message}").to_stream())
+        await receive(reader, framer, PacketType.MESSAGE)
+        latencies.append(time.perf_counter() - sent)
+    writer.close()
+
+
+async def clients(port: int, latencies: List[float]) -> float:
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client(port, index, latencies)
+                           for index in range(CONNECTIONS)))
+    return time.perf_counter() - start_time
+
+
+def run(durability: Durability) -> tuple:
+    with tempfile.TemporaryDirectory() as directory:
+        server = Server(
+            TcpServer(), event_loop="asyncio", history_dir=directory,
+            durability=durability)
+        thread = start(server)
+        latencies: List[float] = []
+        elapsed = asyncio.run(clients(server.conn.address()[1], latencies))
+        commits = server.wal.commits if server.wal else 0
+        server.loop.call_soon_threadsafe(server.stop_main)
+        thread.join(10)
+    total = CONNECTIONS * MESSAGES
+    return (
+        durability.value,
+        total / elapsed,
+        commits,
+        percentile(latencies, 50) * 1e3,
+        percentile(latencies, 99) * 1e3,
+    )
+
+
+def main():
+    quiet_logging()
+    PacketRegistery.ensure_regisered()
+    rows = [run(durability) for durability in Durability]
+    print_table(("durability", "msg/s", "fsyncs", "p50 ms", "p99 ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,7 @@ logger.debug(f"{program} invoked: {args}")
 config = Config(
     host=args.host,
     port=args.port,
+    event_loop=args.event_loop,
 )
 
 # TODO: maybe not here
@@ -129,6 +129,14 @@ class App(Client, MainWindow):
         logger.info(f"received signal: {sig}")
         self.shutdown(ExitReason.FORCE_EXIT)
 
+    def initialised(self, username: str, key: str):
+        Client.initialised(self, username, key)
+        self.setting.data["username"] = username
+
+    def init_failed(self, username: str, message: str):
+        Client.init_failed(self, username, message)
+        self.init_connection({"username": username}, {"username": message})
+
     def init_connection(self,
         initial_values: Dict[str, str] | None = None,
         initial_errors: Dict[str, str] | None = None,
@@ -3,21 +3,25 @@ This module provides client backend object which along with asynchronous event l
 manager provides easy way to manage asynchronous tasks, workers and other coroutines.
 """
 
-import struct
-import asyncio
 import logging
+from collections import deque
 from functools import cached_property
+from typing import Deque, Dict, Iterator, Set
 
 from whisper.client.base import BaseClient
+from whisper.client.handlers import Handlers
 from whisper.client.settings import Config
+from whisper.codec import CodecRegistery
 from whisper.eventloop import EventLoop
-from whisper.packet import Packet
-from whisper.packet.v1 import InitV1Packet
-from whisper.common import Address
-from whisper.typing import (
-    TcpClient as _TcpClient,
-    AsyncQueue as _AsyncQueue,
+from whisper.handler import DispatchTable
+from whisper.queues import WatermarkQueue
+from whisper.packet import Frame, Packet
+from whisper.packet.v1 import (
+    BatchV1Packet, COMPRESSION, Compressor, InitV1Packet, MessageV1Packet, RoomAction,
+    RoomV1Packet,
 )
+from whisper.common import Address
+from whisper.typing import TcpClient as _TcpClient
 
 
 logger = logging.getLogger(__name__)
@@ -30,18 +34,36 @@ class Client(BaseClient, EventLoop):
     def __init__(self, config: Config, conn: _TcpClient):
         """The `conn` object is used to connect with remote server."""
         BaseClient.__init__(self, conn)
-        EventLoop.__init__(self)
+        EventLoop.__init__(self, config.event_loop)
         self.cfg = config
+        self.codec = "json"
+        self.username: str | None = None
+        self.key: str | None = None
+        """session key assigned by server"""
+        self.last_seen: Dict[str, int] = {}
+        """sequence of the latest message received from each joined room, sent on
+        reconnect to receive only the messages missed"""
+        self.rejoining: Set[str] = set()
+        """rooms joined again after missing messages, their messages are ignored
+        until the server answers along with the messages missed"""
+        self.resuming: Set[str] = set()
+        """rooms whose missed messages are replayed next, the first of them may skip
+        the ones the server does not keep"""
+        self.handlers = DispatchTable(self, Handlers)
 
     @cached_property
-    def recvq(self) -> _AsyncQueue[Packet]:
+    def recvq(self) -> WatermarkQueue[Packet]:
         """Packet received from server."""
-        return asyncio.Queue()
+        return WatermarkQueue(self.cfg.queue_size, name="recvq")
 
     @cached_property
-    def sendq(self) -> _AsyncQueue[Packet]:
+    def sendq(self) -> WatermarkQueue[Packet]:
         """Packet send to server."""
-        return asyncio.Queue()
+        return WatermarkQueue(self.cfg.queue_size, name="sendq")
+
+    def queue_depths(self) -> Dict[str, Dict[str, int]]:
+        """Provides depth of the queues, peak depths are reset with every call."""
+        return {"recvq": self.recvq.stats(), "sendq": self.sendq.stats()}
 
     def server_address(self) -> Address:
         """Provides remote server address depending upon the connection."""
@@ -57,22 +79,110 @@ class Client(BaseClient, EventLoop):
     def initial_tasks(self):
         return super().initial_tasks() | {
             self.read_coro,
+            self.dispatch_coro,
             self.write_coro,
         }
 
+    def handle_packet(self, packet: Packet):
+        """Calls the handler of packet received from server."""
+        return self.handlers[type(packet)](packet)
+
+    def initialised(self, username: str, key: str):
+        """Called once the server has accepted the client under the username."""
+        self.username = username
+        self.key = key
+        logger.info(f"initialised as {username}")
+
+    def init_failed(self, username: str, message: str):
+        """Called when the server refused the username."""
+        logger.warning(f"server refused username {username}: {message}")
+
     def init_connection(self, username: str):
         """This initialises the client on server side."""
-        packet = InitV1Packet.request(username=username)
+        compression = [] if self.cfg.compression_threshold is None else [COMPRESSION]
+        packet = InitV1Packet.request(
+            username=username,
+            codecs=CodecRegistery.names(),
+            compression=compression,
+            rooms=dict(self.last_seen))
         self.schedule(self.sendq.put(packet))
 
+    def join_room(self, room: str):
+        """Subscribes to the messages posted to room."""
+        packet = RoomV1Packet.request(
+            action=RoomAction.JOIN, room=room, since=self.last_seen.get(room))
+        self.schedule(self.sendq.put(packet))
+
+    def leave_room(self, room: str):
+        """Unsubscribes from the messages posted to room."""
+        packet = RoomV1Packet.request(action=RoomAction.LEAVE, room=room)
+        self.schedule(self.sendq.put(packet))
+
+    def send_message(self, room: str, text: str):
+        """Posts the message to the joined room."""
+        packet = MessageV1Packet.request(room=room, text=text, codec=self.codec)
+        self.schedule(self.sendq.put(packet))
+
+    def synced(self, room: str, seq: int):
+        """Called when the server has joined the room, `seq` is the sequence of its
+        latest message. The messages after `last_seen` up to it are replayed next."""
+        self.rejoining.discard(room)
+        last_seen = self.last_seen.setdefault(room, 0)
+        if seq < last_seen:
+            # server has lost the history of room, sequences start over
+            last_seen = self.last_seen[room] = seq
+        if seq > last_seen:
+            self.resuming.add(room)
+        else:
+            self.resuming.discard(room)
+
+    def received(self, room: str, seq: int | None) -> bool:
+        """Tracks the sequence of the message received from room. Provides `False`
+        for a message to be ignored: one seen already, or one following a gap (e.g.
+        messages dropped for a slow client) in which case the room is joined again
+        to receive the messages missed."""
+        if seq is None or (last_seen := self.last_seen.get(room)) is None:
+            return True
+        if room in self.rejoining or seq <= last_seen:
+            return False
+        if seq > last_seen + 1 and room not in self.resuming:
+            logger.warning(f"missed messages {last_seen + 1} to {seq - 1} of {room}")
+            self.rejoining.add(room)
+            self.join_room(room)
+            return False
+        self.resuming.discard(room)
+        self.last_seen[room] = seq
+        return True
+
+    def room_changed(self, room: str, action: str, members: int):
+        """Called once the server has joined or left the room. Frontends override it
+        to present the joined rooms."""
+        logger.info(f"{action} {room}: {members} members")
+
+    def show_message(self, room: str, sender: str, text: str):
+        """Called for every message posted to a joined room. Frontends override it to
+        present the messages."""
+        logger.info(f"{room} <{sender}> {text}")
+
+    def show_error(self, room: str, message: str):
+        """Called when the server refused a request about the room."""
+        logger.warning(f"{room}: {message}")
+
+    def enable_compression(self, compression: str | None):
+        """Compress outgoing packets if server accepted the compression."""
+        threshold = self.cfg.compression_threshold
+        if compression == COMPRESSION and threshold is not None:
+            self.compressor = Compressor(threshold)
+            logger.info(f"{compression} compression enabled")
+
     async def read_coro(self):
         """Reads incoming packets from connection."""
         logger.info("read_coro running")
         run = True
         while run:
             try:
-                packet = await self.read(self.loop)
-            except struct.error:
+                packets = await self.read(self.loop)
+            except EOFError:
                 run = False
                 logger.info("server disconnect")
             except self.CancelledError:
@@ -82,22 +192,65 @@ class Client(BaseClient, EventLoop):
                 run = False
                 logger.exception("exception occured while reading packet")
             else:
-                await self.recvq.put(packet)
+                for packet in packets:
+                    await self.recvq.put(packet)
         self.stop_main()
         logger.info("read_coro exited")
 
+    async def dispatch_coro(self):
+        """Calls the handlers of packets received from server, in order. A failing
+        handler is logged and does not stop the packets after it."""
+        logger.info("dispatch_coro running")
+        try:
+            while True:
+                packet = await self.recvq.get()
+                try:
+                    self.handle_packet(packet)
+                except Exception:
+                    logger.exception(f"exception occured while handling {packet!r}")
+        except self.CancelledError:
+            logger.info("dispatch_coro task cancelled")
+        logger.info("dispatch_coro exited")
+
     async def write_coro(self):
-        """Writes outgoing packets to connection."""
+        """Writes outgoing packets to connection. Packets too large for a single frame
+        are written as fragments, one fragment at a time in between the queued packets,
+        so a large transfer does not stall other traffic. Packets already queued are
+        coalesced into a batch."""
         logger.info("write_coro running")
+        transfers: Deque[Iterator[Packet]] = deque()
         run = True
         while run:
-            packet = await self.sendq.get()
-            try:
-                await self.write(packet, self.loop)
-            except self.CancelledError:
-                run = False
-                logger.info("write_coro task cancelled")
-            except Exception:
-                run = False
-                logger.exception("exception occured while writing packet")
+            if transfers:
+                if (fragment := next(transfers[0], None)) is None:
+                    transfers.popleft()
+                    continue
+                run = await self.write_packet(fragment)
+                if not run or self.sendq.empty():
+                    continue
+
+            packets = [await self.sendq.get()]
+            while not self.sendq.empty():
+                packets.append(self.sendq.get_nowait())
+            frames = []
+            for packet in packets:
+                if len(fragments := packet.fragments()) > 1:
+                    transfers.append(iter(fragments))
+                else:
+                    frames.append(Frame(packet))
+            for frame in BatchV1Packet.batches(frames):
+                if not (run := await self.write_packet(frame.packet)):
+                    break
         logger.info("write_coro exited")
+
+    async def write_packet(self, packet: Packet) -> bool:
+        """Writes the packet to connection. Provides `False` if writer must stop."""
+        try:
+            await self.write(packet, self.loop)
+        except self.CancelledError:
+            logger.info("write_coro task cancelled")
+            return False
+        except Exception:
+            logger.exception("exception occured while writing packet")
+            return False
+        return True
@@ -5,9 +5,12 @@ using packet. It also provide limited support of connection management.
 
 import logging
 from enum import StrEnum, auto
+from typing import List
 
 from whisper.common import Address
 from whisper.packet import Packet
+from whisper.packet.framer import Framer
+from whisper.packet.v1 import Compressor, Decompressor, Reassembler
 from whisper.typing import (
     TcpClient as _TcpClient,
     EventLoop as _EventLoop
@@ -33,6 +36,10 @@ class BaseClient:
         """Requires a connection object to connect to server."""
         self.conn = conn
         self.conn_state = ConnState.NOT_CONNECTED
+        self.framer = Framer()
+        self.reassembler = Reassembler()
+        self.compressor: Compressor | None = None
+        self.decompressor = Decompressor()
 
     @property
     def is_connected(self) -> bool:
@@ -49,6 +56,10 @@ class BaseClient:
     def open_connection(self, host: str, port: int):
         """Connect to server with given address."""
         self.conn.open(host, port)
+        self.framer = Framer()
+        self.reassembler = Reassembler()
+        self.compressor = None
+        self.decompressor = Decompressor()
         self.conn_state = ConnState.CONNECTED
         logger.info(f"connection established with {host}:{port}")
 
@@ -58,15 +69,23 @@ class BaseClient:
         self.conn_state = ConnState.NOT_CONNECTED
         logger.info("connection closed")
 
-    async def read(self, loop: _EventLoop) -> Packet:
-        """Read packet from server."""
+    async def read(self, loop: _EventLoop) -> List[Packet]:
+        """Read packets from server. A frame may carry a part of a packet or a batch
+        of packets, so it reads until at least a packet is complete. Raises `EOFError`
+        if connection is closed."""
         reader = lambda n: self.conn.read(n, loop)  # noqa: E731
-        packet = await Packet.from_stream(reader)
-        logger.debug(f"received packet: {packet!r}")
-        return packet
+        packet = None
+        while packet is None:
+            packet = await self.framer.read(reader)
+            packet = self.reassembler.feed(self.decompressor.decompress(packet))
+        packets = packet.unpack()
+        logger.debug(f"received packets: {packets!r}")
+        return packets
 
     async def write(self, packet: Packet, loop: _EventLoop):
         """Write packet to server."""
-        data = packet.to_stream()
-        await self.conn.write(data, loop)
+        for fragment in packet.fragments():
+            if self.compressor is not None:
+                fragment = self.compressor.compress(fragment)
+            await self.conn.writev(fragment.buffers(), loop)
         logger.debug(f"sent packet: {packet!r}")
@@ -5,6 +5,8 @@ This module provides client cli parser function.
 from argparse import ArgumentParser
 
 from whisper.cli import HostAction, PortAction
+from whisper.eventloop import LoopRegistery
+from whisper.settings import EVENT_LOOP
 
 
 def get_parser(program: str, description: str) -> ArgumentParser:
@@ -41,4 +43,12 @@ def get_parser(program: str, description: str) -> ArgumentParser:
         help="user name",
     )
 
+    parser.add_argument(
+        "--event-loop",
+        choices=LoopRegistery.names(),
+        required=False,
+        default=EVENT_LOOP,
+        help="eventloop implementation, falls back to asyncio if not installed",
+    )
+
     return parser
@@ -2,7 +2,7 @@
 This module provide base response handler for client.
 """
 
-from typing import Any, TypeVar
+from typing import Any, Callable, TypeVar
 
 from whisper.packet import Packet
 from whisper.handler import AbstractPacketHandler
@@ -18,3 +18,10 @@ class AbstractResponseHandler(AbstractPacketHandler[_P, Any]):
 
     def __call__(self, packet: _P, /, *args): # type: ignore[override]
         return super().__call__(packet, packet.status, *args)
+
+    def bind(self) -> Callable[..., Any]:
+        """Bound call passing the response status ahead of the contents."""
+        call = super().bind()
+        def bound(packet: _P, /, *args) -> Any:
+            return call(packet, packet.status, *args)
+        return bound
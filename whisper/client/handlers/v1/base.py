@@ -7,14 +7,14 @@ import logging
 from typing import TypeVar, Any
 
 from whisper.packet.v1 import PacketV1, Status, PacketType
-from whisper.client.handlers.base import AbstractPacketHandler
+from whisper.client.handlers.base import AbstractResponseHandler
 
 
 logger = logging.getLogger(__name__)
 
 _P = TypeVar("_P", bound=PacketV1)
 
-class ResponseV1Handler(AbstractPacketHandler[PacketV1]):
+class ResponseV1Handler(AbstractResponseHandler[PacketV1]):
     """Handles response for packet-v1."""
 
     @staticmethod
@@ -31,6 +31,10 @@ class ResponseV1Handler(AbstractPacketHandler[PacketV1]):
     def packet_type() -> PacketType:
         """Provide the packet type the handler handles."""
 
+    @classmethod
+    def unique_key(cls) -> PacketType:
+        return cls.packet_type()
+
     def validate_packet(self, packet: _P):
         if packet.version() != self.version():
             msg = (
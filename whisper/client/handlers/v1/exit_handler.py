@@ -2,6 +2,7 @@
 This module provides exit packet-v1 response handler.
 """
 
+from whisper.handler import Convention
 from whisper.packet.v1 import PacketType, Status
 from whisper.packet.v1.exit_packet import ExitReason, ExitV1Packet
 from .base import ResponseV1Handler
@@ -10,6 +11,8 @@ from .base import ResponseV1Handler
 class ExitV1Handler(ResponseV1Handler):
     """Exit packet-v1 handler implementation."""
 
+    convention = Convention.VALUE
+
     @classmethod
     def packet_type(cls) -> PacketType:
         return ExitV1Packet.packet_type()
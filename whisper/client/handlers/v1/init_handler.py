@@ -2,6 +2,9 @@
 This module provides init packet response handler.
 """
 
+from typing import Dict
+
+from whisper.handler import Convention
 from whisper.packet.v1 import PacketType, Status, InitV1Packet
 from .base import ResponseV1Handler
 
@@ -9,23 +12,32 @@ from .base import ResponseV1Handler
 class InitV1Handler(ResponseV1Handler):
     """Init packet-v1 handler implementation"""
 
+    convention = Convention.KEYWORDS
+
     @staticmethod
     def packet_type() -> PacketType:
         return InitV1Packet.packet_type()
 
-    def handle(self, /, status: Status, *, username: str, key: str = "", **kwargs):
+    def handle(self, /, status: Status, *, username: str = "", **kwargs):
         if status == Status.SUCCESS:
-            return self.handle_success(username, key, **kwargs)
+            return self.handle_success(username, **kwargs)
 
         if status == Status.VALIDATION_ERROR:
-            return self.handle_validation_error(username, key, **kwargs)
-
-    def handle_success(self, username: str, key: str, **kwargs):
-        self.app.setting.data["username"] = username
-        self.aoo.hide_splash_screen() # TODO
-        self.app.join_global_chat() # TODO
-
-    def handle_validation_error(self, username: str, message: str, **kwargs):
-        initial_values = { "username": username }
-        initial_errors = { "username": message }
-        self.app.init_connection(initial_values, initial_errors) # TODO
+            return self.handle_validation_error(username, **kwargs)
+
+    def handle_success(self,
+        username: str,
+        key: str = "",
+        codec: str = "json",
+        compression: str | None = None,
+        rooms: Dict[str, int] | None = None,
+        **kwargs,
+    ):
+        for room, seq in (rooms or {}).items():
+            self.app.synced(room, seq)
+        self.app.codec = codec
+        self.app.enable_compression(compression)
+        self.app.initialised(username, key)
+
+    def handle_validation_error(self, username: str, message: str = "", **kwargs):
+        self.app.init_failed(username, message)
@@ -0,0 +1,37 @@
+"""
+This module provides message packet response handler.
+"""
+
+from whisper.handler import Convention
+from whisper.packet.v1 import MessageV1Packet, PacketType, Status
+from .base import ResponseV1Handler
+
+
+class MessageV1Handler(ResponseV1Handler):
+    """Message packet-v1 handler implementation"""
+
+    convention = Convention.KEYWORDS
+
+    @staticmethod
+    def packet_type() -> PacketType:
+        return MessageV1Packet.packet_type()
+
+    def handle(self, /, status: Status, *, room: str, **kwargs):
+        if status == Status.SUCCESS:
+            return self.handle_success(room, **kwargs)
+
+        if status == Status.VALIDATION_ERROR:
+            return self.handle_validation_error(room, **kwargs)
+
+    def handle_success(self,
+        room: str,
+        sender: str,
+        text: str,
+        seq: int | None = None,
+        **kwargs,
+    ):
+        if self.app.received(room, seq):
+            self.app.show_message(room, sender, text)
+
+    def handle_validation_error(self, room: str, message: str, **kwargs):
+        self.app.show_error(room, message)
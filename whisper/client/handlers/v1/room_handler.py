@@ -0,0 +1,42 @@
+"""
+This module provides room packet response handler.
+"""
+
+from whisper.handler import Convention
+from whisper.packet.v1 import PacketType, RoomAction, RoomV1Packet, Status
+from .base import ResponseV1Handler
+
+
+class RoomV1Handler(ResponseV1Handler):
+    """Room packet-v1 handler implementation"""
+
+    convention = Convention.KEYWORDS
+
+    @staticmethod
+    def packet_type() -> PacketType:
+        return RoomV1Packet.packet_type()
+
+    def handle(self, /, status: Status, *, room: str, **kwargs):
+        if status == Status.SUCCESS:
+            return self.handle_success(room, **kwargs)
+
+        if status == Status.VALIDATION_ERROR:
+            return self.handle_validation_error(room, **kwargs)
+
+    def handle_success(self,
+        room: str,
+        action: str,
+        members: int = 0,
+        seq: int = 0,
+        **kwargs,
+    ):
+        if action == RoomAction.JOIN:
+            self.app.synced(room, seq)
+        else:
+            self.app.last_seen.pop(room, None)
+            self.app.rejoining.discard(room)
+            self.app.resuming.discard(room)
+        self.app.room_changed(room, action, members)
+
+    def handle_validation_error(self, room: str, message: str, **kwargs):
+        self.app.show_error(room, message)
@@ -15,6 +15,14 @@ class Config:
 
     host: str = field(default="127.0.0.1")
     port: int = field(default=50_005)
+    compression_threshold: int | None = field(default=512)
+    """minimum payload size to compress, `None` disables compression"""
+    queue_size: int = field(default=1000)
+    """maximum packets held in recvq and sendq, reading from server blocks while
+    recvq is full"""
+    event_loop: str | None = field(default=None)
+    """eventloop implementation (see `LoopRegistery`), `None` uses the current
+    eventloop"""
 
     def as_dict(self) -> Dict[str, Any]:
         """Provide configuration as dict object."""
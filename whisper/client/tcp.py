@@ -5,7 +5,9 @@ This module provides tcp connection object for client.
 import socket
 
 from whisper.common import Address
+from whisper.sockets import sock_sendmsg
 from whisper.typing import (
+    Buffers as _Buffers,
     EventLoop as _EventLoop,
 )
 
@@ -43,9 +45,13 @@ class TcpClient:
         self.sock.close()
 
     async def read(self, n: int, loop: _EventLoop) -> bytes:
-        """Read `n` bytes of data from socket."""
+        """Read at most `n` bytes of data from socket."""
         return await loop.sock_recv(self.sock, n)
 
     async def write(self, data: bytes, loop: _EventLoop) -> None:
         """Write data to the socket."""
         return await loop.sock_sendall(self.sock, data)
+
+    async def writev(self, buffers: _Buffers, loop: _EventLoop) -> None:
+        """Write buffers to the socket in order without joining them."""
+        return await sock_sendmsg(loop, self.sock, buffers)
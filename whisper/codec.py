@@ -3,7 +3,12 @@ This module provides necessary encoding/decoding functions.
 """
 
 import json
-from typing import Dict, Any
+import struct
+import logging
+from typing import Any, Callable, ClassVar, Dict, Iterable, List, NamedTuple, Tuple
+
+
+logger = logging.getLogger(__name__)
 
 
 def json_encode(data: Dict[str, Any]) -> bytes:
@@ -13,3 +18,245 @@ def json_encode(data: Dict[str, Any]) -> bytes:
 def json_decode(data: bytes) -> Dict[str, Any]:
     """Deserialize the stream of bytes into dict object."""
     return json.loads(data.decode(encoding="UTF-8"))
+
+
+_U8 = struct.Struct("<B")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_I8 = struct.Struct("<b")
+_F64 = struct.Struct("<d")
+
+
+def _encode_sized(short: bytes, long: bytes, size: int, out: bytearray):
+    """Appends tag and size, size takes 1 byte if it fits otherwise 4 bytes."""
+    if size < 0x100:
+        out += short
+        out.append(size)
+    else:
+        out += long
+        out += _U32.pack(size)
+
+def _encode_str(value: str, out: bytearray):
+    data = value.encode(encoding="UTF-8")
+    _encode_sized(b"s", b"S", len(data), out)
+    out += data
+
+def _encode_bytes(value: bytes, out: bytearray):
+    _encode_sized(b"b", b"B", len(value), out)
+    out += value
+
+def _encode_int(value: int, out: bytearray):
+    if -0x80 <= value < 0x80:
+        out += b"k"
+        out += _I8.pack(value)
+    else:
+        out += b"i"
+        out += _I64.pack(value)
+
+def _encode_float(value: float, out: bytearray):
+    out += b"g"
+    out += _F64.pack(value)
+
+def _encode_bool(value: bool, out: bytearray):
+    out += b"t" if value else b"f"
+
+def _encode_none(value: None, out: bytearray):
+    out += b"n"
+
+def _encode_list(value: list | tuple, out: bytearray):
+    _encode_sized(b"l", b"L", len(value), out)
+    for item in value:
+        _ENCODERS.get(type(item), _encode_other)(item, out)
+
+def _encode_dict(value: dict, out: bytearray):
+    _encode_sized(b"d", b"D", len(value), out)
+    for key, item in value.items():
+        if type(key) is not str:
+            raise TypeError(f"dict keys must be str, got {type(key).__name__}")
+        _encode_str(key, out)
+        _ENCODERS.get(type(item), _encode_other)(item, out)
+
+def _encode_other(value: Any, out: bytearray):
+    """Encodes subclasses of supported types (e.g. enums)."""
+    for kind in (bool, int, float, str, bytes, bytearray, memoryview, list, tuple, dict):
+        if isinstance(value, kind):
+            return _ENCODERS[kind](value, out)
+    raise TypeError(f"unsupported type for binary codec: {type(value).__name__}")
+
+_ENCODERS: Dict[type, Callable[[Any, bytearray], None]] = {
+    str: _encode_str,
+    int: _encode_int,
+    dict: _encode_dict,
+    list: _encode_list,
+    tuple: _encode_list,
+    bool: _encode_bool,
+    float: _encode_float,
+    type(None): _encode_none,
+    bytes: _encode_bytes,
+    bytearray: _encode_bytes,
+    memoryview: _encode_bytes,
+}
+
+
+def _decode_size(data: bytes, offset: int, long: bool) -> Tuple[int, int]:
+    if long:
+        return _U32.unpack_from(data, offset)[0], offset + 4
+    return data[offset], offset + 1
+
+def _decode_str(data: bytes, offset: int, long: bool):
+    size, offset = _decode_size(data, offset, long)
+    end = offset + size
+    if end > len(data):
+        raise ValueError("truncated binary data")
+    return data[offset:end].decode(encoding="UTF-8"), end
+
+def _decode_bytes(data: bytes, offset: int, long: bool):
+    size, offset = _decode_size(data, offset, long)
+    end = offset + size
+    if end > len(data):
+        raise ValueError("truncated binary data")
+    return data[offset:end], end
+
+def _decode_list(data: bytes, offset: int, long: bool):
+    size, offset = _decode_size(data, offset, long)
+    items = []
+    for _ in range(size):
+        decoder, long = _DECODERS[data[offset]]
+        item, offset = decoder(data, offset + 1, long)
+        items.append(item)
+    return items, offset
+
+def _decode_dict(data: bytes, offset: int, long: bool):
+    size, offset = _decode_size(data, offset, long)
+    result = {}
+    for _ in range(size):
+        decoder, long = _DECODERS[data[offset]]
+        key, offset = decoder(data, offset + 1, long)
+        if type(key) is not str:
+            raise ValueError(f"dict keys must be str, got {type(key).__name__}")
+        decoder, long = _DECODERS[data[offset]]
+        result[key], offset = decoder(data, offset + 1, long)
+    return result, offset
+
+def _decode_constant(value: Any):
+    return lambda data, offset, long: (value, offset)
+
+def _decode_struct(fmt: struct.Struct):
+    return lambda data, offset, long: (fmt.unpack_from(data, offset)[0],
+                                       offset + fmt.size)
+
+def _decode_unknown(data: bytes, offset: int, long: bool):
+    raise ValueError(f"unknown binary codec tag: {data[offset - 1]:#04x}")
+
+_DECODERS: List[Tuple[Callable[[bytes, int, bool], Tuple[Any, int]], bool]] = [
+    (_decode_unknown, False)] * 0x100
+"""decoder and whether size is long (4 bytes), indexed by tag"""
+for _tag, _decoder in {
+    "s": (_decode_str, False), "S": (_decode_str, True),
+    "b": (_decode_bytes, False), "B": (_decode_bytes, True),
+    "l": (_decode_list, False), "L": (_decode_list, True),
+    "d": (_decode_dict, False), "D": (_decode_dict, True),
+    "k": (_decode_struct(_I8), False), "i": (_decode_struct(_I64), False),
+    "g": (_decode_struct(_F64), False),
+    "n": (_decode_constant(None), False),
+    "t": (_decode_constant(True), False), "f": (_decode_constant(False), False),
+}.items():
+    _DECODERS[ord(_tag)] = _decoder
+
+
+def binary_encode(data: Any) -> bytes:
+    """
+    Serialize the object into compact length-prefixed binary form. Supports dict (with
+    str keys), list, tuple (decoded as list), str, bytes, int (64 bit), float, bool and
+    None. Every value is a tag byte followed by its length (1 byte if it fits otherwise
+    4 bytes) and payload, so decoding never scans or unescapes text and bytes are
+    carried as is.
+    """
+    out = bytearray()
+    _ENCODERS.get(type(data), _encode_other)(data, out)
+    return bytes(out)
+
+def binary_decode(data: bytes | bytearray | memoryview) -> Any:
+    """Deserialize the binary form created by `binary_encode`."""
+    if type(data) is not bytes:
+        data = bytes(data)
+    try:
+        decoder, long = _DECODERS[data[0]]
+        value, offset = decoder(data, 1, long)
+    except (IndexError, struct.error) as ex:
+        raise ValueError("truncated binary data") from ex
+    except RecursionError as ex:
+        raise ValueError("binary data nested too deep") from ex
+    except (KeyError, TypeError) as ex:
+        raise ValueError(f"malformed binary data: {ex}") from ex
+    if offset != len(data):
+        raise ValueError(f"trailing {len(data) - offset} bytes after binary data")
+    return value
+
+
+class Codec(NamedTuple):
+    """Encoding and decoding functions for payload contents."""
+
+    id: int
+    name: str
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes], Any]
+
+
+class CodecRegistery():
+    """
+    Manages the codecs available to encode payload contents. Codecs are identified by
+    name for negotiation and by a single byte id on wire. Use the class directly
+    instead creating instance.
+    """
+
+    codecs: ClassVar[Dict[str | int, Codec]] = {}
+    """stores the codecs by name and by id"""
+
+    preference: ClassVar[List[str]] = []
+    """codec names in order of preference (most compact first)"""
+
+    @staticmethod
+    def register(codec: Codec, preferred: bool = False) -> Codec:
+        """Register a codec. Preferred codec is put ahead in negotiation."""
+        if codec.name in CodecRegistery.codecs or codec.id in CodecRegistery.codecs:
+            logger.warning(f"codec {codec.name} already registered, skipped")
+            return codec
+        CodecRegistery.codecs[codec.name] = codec
+        CodecRegistery.codecs[codec.id] = codec
+        if preferred:
+            CodecRegistery.preference.insert(0, codec.name)
+        else:
+            CodecRegistery.preference.append(codec.name)
+        logger.info(f"registered codec: {codec.name}")
+        return codec
+
+    @staticmethod
+    def get(key: str | int) -> Codec:
+        """Provides codec by its name or id. Raises `ValueError` if unknown."""
+        try:
+            return CodecRegistery.codecs[key]
+        except KeyError:
+            msg = f"unknown codec: {key!r}"
+            logger.error(msg)
+            raise ValueError(msg) from None
+
+    @staticmethod
+    def names() -> List[str]:
+        """Provides the registered codec names in order of preference."""
+        return list(CodecRegistery.preference)
+
+    @staticmethod
+    def negotiate(offered: Iterable[str]) -> Codec:
+        """Provides the most preferred codec out of the offered codec names. Falls
+        back to json which every peer supports."""
+        offered = set(offered)
+        for name in CodecRegistery.preference:
+            if name in offered:
+                return CodecRegistery.codecs[name]
+        return JSON
+
+
+JSON = CodecRegistery.register(Codec(0, "json", json_encode, json_decode))
+BINARY = CodecRegistery.register(
+    Codec(1, "binary", binary_encode, binary_decode), preferred=True)
@@ -7,14 +7,84 @@ import sys
 import signal
 import logging
 import asyncio
+import selectors
 import threading
 from concurrent.futures import Future
-from typing import List, Dict, Set, Any, Callable, Coroutine, ParamSpec
+from typing import (
+    List, Dict, Set, Any, Callable, ClassVar, Coroutine, Generic, ParamSpec, TypeVar,
+)
+
+from whisper.offload import PoolKind, WorkerPool
 
 
 logger = logging.getLogger(__name__)
 
 P = ParamSpec("P")
+R = TypeVar("R")
+T = TypeVar("T")
+
+LoopFactory = Callable[[], asyncio.AbstractEventLoop]
+
+
+class LoopRegistery():
+    """
+    Manages the eventloop implementations by name, so the eventloop of server and
+    client is picked by configuration. A factory raises `ImportError` if its
+    implementation is not installed, `create` falls back to `asyncio` then. Use the
+    class directly instead creating instance.
+    """
+
+    factories: ClassVar[Dict[str, LoopFactory]] = {}
+    """stores the eventloop factories by name"""
+
+    @staticmethod
+    def register(name: str, factory: LoopFactory) -> LoopFactory:
+        """Register an eventloop factory."""
+        LoopRegistery.factories[name] = factory
+        logger.debug(f"registered eventloop: {name}")
+        return factory
+
+    @staticmethod
+    def names() -> List[str]:
+        """Provides the registered eventloop names."""
+        return list(LoopRegistery.factories)
+
+    @staticmethod
+    def create(name: str = "asyncio") -> asyncio.AbstractEventLoop:
+        """Creates the eventloop with given name. Raises `ValueError` if unknown."""
+        try:
+            factory = LoopRegistery.factories[name]
+        except KeyError:
+            msg = f"unknown eventloop: {name!r}"
+            logger.error(msg)
+            raise ValueError(msg) from None
+        try:
+            loop = factory()
+        except ImportError as ex:
+            logger.warning(f"eventloop {name} not available ({ex}), using asyncio")
+            loop = asyncio.new_event_loop()
+        logger.info(f"created eventloop: {type(loop).__module__}.{type(loop).__name__}")
+        return loop
+
+
+def _uvloop() -> asyncio.AbstractEventLoop:
+    import uvloop  # type: ignore
+    return uvloop.new_event_loop()
+
+
+def _auto() -> asyncio.AbstractEventLoop:
+    try:
+        return _uvloop()
+    except ImportError:
+        return asyncio.new_event_loop()
+
+
+LoopRegistery.register("asyncio", asyncio.new_event_loop)
+LoopRegistery.register(
+    "selector", lambda: asyncio.SelectorEventLoop(selectors.DefaultSelector()))
+LoopRegistery.register("uvloop", _uvloop)
+LoopRegistery.register("auto", _auto)
+
 
 class EventLoop:
     """
@@ -31,6 +101,11 @@ class EventLoop:
     * main - coroutine between setup and teardown
     * schedule - schedule a task from another thread
     * create_task - create a task (must be called from same thread)
+    * in_loop - whether called from the thread running the eventloop
+    * call_threadsafe - call a function in eventloop from any thread
+    * offload - run blocking or CPU bound callable in a worker pool
+    * add_pool - add a named worker pool for `offload`
+    * pool_stats - counters and timings of the worker pools
     * stop_main - finish the execution of `main` coroutine above
     * signal_handler - handles the received signal to the process
     * exception_handler - handle uncaught exception in eventloop tasks
@@ -46,9 +121,15 @@ class EventLoop:
 
     CancelledError = asyncio.CancelledError
 
-    def __init__(self):
+    def __init__(self, loop: asyncio.AbstractEventLoop | str | None = None):
+        """Runs on given eventloop, or a new one of the named implementation (see
+        `LoopRegistery`), or the current eventloop of thread."""
+        if isinstance(loop, str):
+            loop = LoopRegistery.create(loop)
         self._stop_event = Future()
-        self._loop = asyncio.get_event_loop()
+        self._loop = loop or asyncio.get_event_loop()
+        self.pools: Dict[str, WorkerPool] = {"thread": WorkerPool(PoolKind.THREAD)}
+        """worker pools by name, `thread` pool is always available"""
 
     @property
     def loop(self) -> asyncio.AbstractEventLoop:
@@ -88,7 +169,10 @@ class EventLoop:
         for task in tasks:
             task.cancel()
             logger.debug(f"cancelled task: {task}")
-        return await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for pool in self.pools.values():
+            pool.shutdown()
+        return results
 
     def schedule(self, coro: Coroutine[Any, Any, Any]) -> Future[Any]:
         """Runs coroutine from other threads."""
@@ -103,6 +187,47 @@ class EventLoop:
         logger.debug(f"create task[{name}]: {coro}")
         return self.loop.create_task(coro, name=name)
 
+    def in_loop(self) -> bool:
+        """Whether it is called from a task or callback of this eventloop."""
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def call_threadsafe(self, fn: Callable[..., Any], *args: Any):
+        """Calls the function in eventloop, right away if called from the eventloop
+        and soon otherwise."""
+        if self.in_loop():
+            fn(*args)
+        else:
+            self.loop.call_soon_threadsafe(fn, *args)
+
+    def add_pool(self,
+        name: str,
+        kind: PoolKind = PoolKind.THREAD,
+        workers: int | None = None,
+    ) -> WorkerPool:
+        """Adds (or replaces) the worker pool with given name."""
+        if (pool := self.pools.get(name)) is not None:
+            pool.shutdown()
+        pool = self.pools[name] = WorkerPool(kind, workers)
+        return pool
+
+    async def offload(self,
+        fn: Callable[..., R],
+        /,
+        *args: Any,
+        pool: str = "thread",
+        **kwargs: Any,
+    ) -> R:
+        """Runs the callable in the named worker pool, so it does not block the
+        eventloop. Callables run in a process pool must be picklable."""
+        return await self.pools[pool].run(fn, *args, **kwargs)
+
+    def pool_stats(self) -> Dict[str, Dict[str, float]]:
+        """Provides counters and timings of worker pools (see `WorkerPool.stats`)."""
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
     if sys.platform == "win32":
 
         def _handle_signal(self, sig: signal.Signals | int):
@@ -157,3 +282,64 @@ class EventLoop:
     def stop_main_result(self) -> Any:
         """Provides the value given to `stop_main`."""
         return self._stop_event.result()
+
+
+class LoopThread(EventLoop):
+    """
+    Eventloop running `main` in its own thread until stopped. Coroutines are
+    submitted to it with `schedule` and callbacks with `call_threadsafe`.
+    """
+
+    def __init__(self, name: str, loop: str = "asyncio"):
+        super().__init__(loop)
+        self.thread = threading.Thread(
+            target=self.run_main, args=(self.main,), name=name, daemon=True)
+
+    def start(self):
+        """Starts the thread running the eventloop."""
+        self.thread.start()
+        logger.info(f"started eventloop thread {self.thread.name}")
+
+    def stop(self, timeout: float | None = None):
+        """Stops the eventloop and waits for its thread to finish."""
+        self.stop_main()
+        self.thread.join(timeout)
+        if not self.thread.is_alive():
+            self.loop.close()
+        logger.info(f"stopped eventloop thread {self.thread.name}")
+
+
+class Handoff(Generic[T]):
+    """
+    Thread safe queue handing the items over to a consumer called in an eventloop.
+    Items put from other threads are delivered in batches, so the eventloop is woken
+    once per batch instead of once per item.
+    """
+
+    __slots__ = ("loop", "consumer", "items", "lock", "scheduled")
+
+    def __init__(self,
+        loop: asyncio.AbstractEventLoop,
+        consumer: Callable[[List[T]], Any],
+    ):
+        self.loop = loop
+        self.consumer = consumer
+        self.items: List[T] = []
+        self.lock = threading.Lock()
+        self.scheduled = False
+
+    def put(self, item: T):
+        """Queues the item for the consumer, it can be called from any thread."""
+        with self.lock:
+            self.items.append(item)
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.loop.call_soon_threadsafe(self.flush)
+
+    def flush(self):
+        """Delivers the queued items to consumer, called in the eventloop."""
+        with self.lock:
+            items, self.items = self.items, []
+            self.scheduled = False
+        self.consumer(items)
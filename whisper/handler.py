@@ -3,19 +3,61 @@ This module provide abstract base class for handelling packets.
 """
 
 import abc
+import logging
+from enum import Enum, auto
 from collections.abc import Mapping, Sequence
-from typing import Tuple, Any, Generic, TypeVar, Union
+from typing import (
+    Tuple, Any, AsyncIterator, Awaitable, Callable, ClassVar, Dict, Generic, Iterable,
+    Set, Type, TypeVar, Union,
+)
 
-from whisper.packet import Packet
+from whisper.packet import Packet, PacketRegistery
 
 
+logger = logging.getLogger(__name__)
+
 _P = TypeVar("_P", bound=Packet)
 _A = TypeVar("_A", bound=Any)
 
 
+class Convention(Enum):
+    """How the packet contents are passed to `AbstractPacketHandler.handle`."""
+
+    KEYWORDS = auto()
+    """mapping contents passed as keyword arguments"""
+
+    POSITIONAL = auto()
+    """sequence contents passed as positional arguments"""
+
+    ARGS_KWARGS = auto()
+    """pair of sequence and mapping passed as positional and keyword arguments"""
+
+    VALUE = auto()
+    """contents passed as a single positional argument"""
+
+    PACKET = auto()
+    """packet itself passed as a single positional argument, its contents are not
+    parsed; for handlers only forwarding the packet (see `Packet.view`)"""
+
+    DYNAMIC = auto()
+    """decided by inspecting the contents of every packet"""
+
+
 class AbstractPacketHandler(abc.ABC, Generic[_P, _A]):
     """Common abstract packet handler class for packet handelling."""
 
+    convention: ClassVar[Convention] = Convention.DYNAMIC
+    """calling convention of `handle`, declare it to skip inspecting the contents"""
+
+    background: ClassVar[bool] = False
+    """handle packets in their own task without holding up the packets after them,
+    meant for long running handlers streaming their responses"""
+
+    offload: ClassVar[str | None] = None
+    """name of the worker pool of app running `handle` (see `EventLoop.offload`),
+    meant for CPU bound handlers; `handle` must be a plain function and the pool a
+    thread pool as the bound handler is not picklable"""
+
     def __init__(self, app: _A):
         """Provide the application instance."""
         self.app = app
@@ -29,28 +71,123 @@ class AbstractPacketHandler(abc.ABC, Generic[_P, _A]):
     def __call__(self, packet: _P, /, *args) -> Any:
         """Call the handler instance directly with packet instance."""
         self.validate_packet(packet)
-        content = packet.contents()
+        if self.convention is Convention.PACKET:
+            return self.handle(*args, packet)
+        return self.handle_contents(packet.contents(), *args)
 
+    def handle_contents(self, content: Any, /, *args) -> Any:
+        """Calls `handle` with the contents as per their type."""
         if (isinstance(content, tuple)
             and len(content) == 2
             and isinstance(content[0], Sequence)
             and not isinstance(content[0], (str, bytes))
             and isinstance(content[1], Mapping)
         ):
-            self.handle(*args, *content[0], **content[1])
+            return self.handle(*args, *content[0], **content[1])
         elif isinstance(content, Mapping):
-            self.handle(*args, **content)
+            return self.handle(*args, **content)
         elif isinstance(content, Sequence) and not isinstance(content, (str, bytes)):
-            self.handle(*args, *content)
+            return self.handle(*args, *content)
         else:
             return self.handle(*args, content)
 
+    def bind(self) -> Callable[..., Any]:
+        """Provides function calling `handle` with packet contents as per `convention`.
+        It does not validate the packet, `DispatchTable` only passes the packets this
+        handler is registered for."""
+        handle = self.handle
+        convention = self.convention
+
+        if convention is Convention.KEYWORDS:
+            def call(packet: _P, /, *args) -> Any:
+                return handle(*args, **packet.contents())
+        elif convention is Convention.POSITIONAL:
+            def call(packet: _P, /, *args) -> Any:
+                return handle(*args, *packet.contents())
+        elif convention is Convention.ARGS_KWARGS:
+            def call(packet: _P, /, *args) -> Any:
+                positional, keywords = packet.contents()
+                return handle(*args, *positional, **keywords)
+        elif convention is Convention.VALUE:
+            def call(packet: _P, /, *args) -> Any:
+                return handle(*args, packet.contents())
+        elif convention is Convention.PACKET:
+            def call(packet: _P, /, *args) -> Any:
+                return handle(*args, packet)
+        else:
+            handle_contents = self.handle_contents
+            def call(packet: _P, /, *args) -> Any:
+                return handle_contents(packet.contents(), *args)
+
+        if (pool := self.offload) is not None:
+            offload = self.app.offload
+            direct = call
+            async def call(packet: _P, /, *args) -> Any:
+                return await offload(direct, packet, *args, pool=pool)
+        return call
+
+    @staticmethod
+    def unique_key() -> Any:
+        """Provide the unique key same as the packet handeled."""
+
     @abc.abstractmethod
     def handle(self, *args: Any, **kwargs: Any) -> Union[
         Any,
         Sequence[Any],
         Mapping[str, Any],
         Tuple[Sequence, Mapping[str, Any]],
+        Awaitable[Any],
+        AsyncIterator[Any],
     ]:
-        """Perform required actions."""
+        """Perform required actions. It may be defined as coroutine function to await
+        io, or as asynchronous generator yielding the responses as they are ready."""
         raise NotImplementedError
+
+
+class DispatchTable(Dict[Type[Packet], Callable[..., Any]]):
+    """
+    Flat packet dispatch table compiled once from the handler classes. It maps the
+    packet class to the bound handler call (see `AbstractPacketHandler.bind`), so a
+    packet is dispatched with a single lookup by its type:
+
+    ```
+    table[type(packet)](packet, *args)
+    ```
+
+    Packet classes not registered in `PacketRegistery` are resolved by their version
+    and unique key on first use. Raises `KeyError` for packets without handler.
+    Packet classes of `background` handlers are kept in `background`.
+    """
+
+    def __init__(self,
+        app: Any,
+        handlers: Mapping[int, Iterable[Type[AbstractPacketHandler]]],
+    ):
+        super().__init__()
+        self.calls: Dict[Tuple[int, Any], Callable[..., Any]] = {}
+        self.background: Set[Type[Packet]] = set()
+        self.background_keys: Set[Tuple[int, Any]] = set()
+        for version, handler_classes in handlers.items():
+            packets = PacketRegistery.handlers.get(version, {})
+            for handler_class in handler_classes:
+                key = handler_class.unique_key()
+                call = handler_class(app).bind()
+                self.calls[(version, key)] = call
+                if handler_class.background:
+                    self.background_keys.add((version, key))
+                if (packet := packets.get(key)) is not None:
+                    self[packet] = call
+                    if handler_class.background:
+                        self.background.add(packet)
+                logger.debug(f"compiled dispatch: {handler_class.__name__}")
+
+    def __missing__(self, packet: Type[Packet]) -> Callable[..., Any]:
+        try:
+            key = (packet.version(), packet.unique_key())
+            call = self.calls[key]
+        except (KeyError, NotImplementedError):
+            raise KeyError(f"no handler for {packet.__name__}") from None
+        self[packet] = call
+        if key in self.background_keys:
+            self.background.add(packet)
+        return call
@@ -0,0 +1,134 @@
+"""
+This module provides worker pools to offload blocking or CPU heavy work from the
+eventloop thread.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import StrEnum, auto
+from typing import Any, Callable, Dict, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+_R = TypeVar("_R")
+
+
+class PoolKind(StrEnum):
+    """Kind of executor backing a `WorkerPool`."""
+
+    THREAD = auto()
+    """for blocking io and work releasing the GIL (hashing, zlib)"""
+
+    PROCESS = auto()
+    """for pure python CPU bound work, callables and arguments must be picklable"""
+
+
+class WorkerPool:
+    """
+    Executor with bounded concurrency. At most `workers` calls are submitted to the
+    executor at a time, the others wait on the eventloop without holding a thread, so
+    a burst of work can not pile up in the executor queue. The time spent waiting for
+    a worker and running are recorded for monitoring (see `stats`).
+
+    The executor is created on first use.
+    """
+
+    def __init__(self, kind: PoolKind = PoolKind.THREAD, workers: int | None = None):
+        self.kind = kind
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.executor: Executor | None = None
+        self.semaphore = asyncio.Semaphore(self.workers)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+        self.waiting = 0
+        self.queue_time = 0.0
+        self.queue_time_max = 0.0
+        self.run_time = 0.0
+        self.run_time_max = 0.0
+
+    def get_executor(self) -> Executor:
+        """Provides the executor, created on first call."""
+        if self.executor is None:
+            if self.kind is PoolKind.PROCESS:
+                self.executor = ProcessPoolExecutor(self.workers)
+            else:
+                self.executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="whisper-offload")
+            logger.info(f"started {self.kind} pool with {self.workers} workers")
+        return self.executor
+
+    async def run(self, fn: Callable[..., _R], /, *args: Any, **kwargs: Any) -> _R:
+        """Runs `fn` in the pool and provides its result."""
+        call = functools.partial(fn, *args, **kwargs) if kwargs else fn
+        queued = time.perf_counter()
+        self.submitted += 1
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.record_queue_time(started - queued)
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            if kwargs:
+                result = await loop.run_in_executor(self.get_executor(), call)
+            else:
+                result = await loop.run_in_executor(self.get_executor(), call, *args)
+        except BaseException:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+        finally:
+            self.running -= 1
+            self.semaphore.release()
+            self.record_run_time(time.perf_counter() - started)
+        return result
+
+    def record_queue_time(self, seconds: float):
+        self.queue_time += seconds
+        if seconds > self.queue_time_max:
+            self.queue_time_max = seconds
+            if seconds > 0.1:
+                logger.warning(f"{self.kind} pool work waited {seconds * 1000:.0f}ms")
+
+    def record_run_time(self, seconds: float):
+        self.run_time += seconds
+        if seconds > self.run_time_max:
+            self.run_time_max = seconds
+
+    def stats(self) -> Dict[str, float]:
+        """Provides counters and timings (in milliseconds) of the pool, maximum times
+        are reset afterwards."""
+        done = max(1, self.completed + self.failed)
+        started = max(1, self.submitted - self.waiting)
+        stats = {
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "running": self.running,
+            "waiting": self.waiting,
+            "queue_ms_avg": self.queue_time / started * 1000,
+            "queue_ms_max": self.queue_time_max * 1000,
+            "run_ms_avg": self.run_time / done * 1000,
+            "run_ms_max": self.run_time_max * 1000,
+        }
+        self.queue_time_max = self.run_time_max = 0.0
+        return stats
+
+    def shutdown(self):
+        """Shuts the executor down without waiting for running work."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            logger.info(f"stopped {self.kind} pool")
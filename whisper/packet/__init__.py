@@ -9,7 +9,7 @@ import logging
 import pathlib
 import importlib
 from types import ModuleType
-from typing import Any, Awaitable, Callable, Dict, List, Type, ClassVar
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, Type, ClassVar
 
 
 logger = logging.getLogger(__name__)
@@ -21,8 +21,15 @@ class Packet(abc.ABC):
     and the required packet version. Implement this to customise the packet structure.
 
     It depends upon `PacketRegistery` to determine handler.
+
+    Packets are slotted, child classes must declare `__slots__` too (even if empty).
     """
 
+    __slots__ = ("data", "_contents")
+
+    critical: ClassVar[bool] = True
+    """packet must not be dropped for a receiver falling behind"""
+
     def __init__(self, data: bytes = b""):
         """Stores payload data that is being sent/received."""
         self.data = data
@@ -54,6 +61,32 @@ class Packet(abc.ABC):
         packet = PacketRegistery.packets[version]
         return await packet.from_stream(reader)
 
+    @classmethod
+    @abc.abstractmethod
+    def frame_size(cls, buffer: memoryview) -> int | None:
+        """
+        Provides total size (in bytes) of the frame at the start of buffer or `None`
+        if the buffer does not hold the complete header yet. It reads the first byte to
+        know the packet version then call to respective packet's classmethod is made.
+
+        The child class needs to implement this method as per its header structure.
+        """
+        if len(buffer) < 1:
+            return None
+        return PacketRegistery.get_packet(buffer[0]).frame_size(buffer)
+
+    @classmethod
+    @abc.abstractmethod
+    def from_frame(cls, frame: memoryview):
+        """
+        Creates the packet from a view starting with a complete frame (as sized by
+        `frame_size`), it may hold bytes of next frames too. The view is over a shared
+        buffer, so the packet must copy what it keeps.
+
+        The child class needs to implement this method to parse its structure.
+        """
+        return PacketRegistery.get_packet(frame[0]).from_frame(frame)
+
     @classmethod
     @abc.abstractmethod
     def create(cls, *args: Any, **kwargs: Any):
@@ -78,14 +111,53 @@ class Packet(abc.ABC):
         the data being sent by the packet itself."""
         return struct.pack("B", self.version())
 
-    @abc.abstractmethod
+    def buffers(self) -> Tuple[bytes | memoryview, ...]:
+        """Provides the packet as sequence of buffers which concatenated gives the
+        `to_stream` bytes. Override it to avoid copying the payload into the frame,
+        buffers are meant to be written with vectored io."""
+        return (self.to_stream(),)
+
+    def fragments(self) -> List["Packet"]:
+        """Provides the packets to be written in order for this packet. Override it to
+        split the packet which does not fit in a single frame."""
+        return [self]
+
+    def is_critical(self) -> bool:
+        """Whether the packet must not be dropped (see `critical`)."""
+        return self.critical
+
+    def unpack(self) -> List["Packet"]:
+        """Provides the packets carried by this packet, counterpart of batching many
+        packets into a single one. Override it for container packets."""
+        return [self]
+
     def contents(self) -> Any:
-        """Get the contents from data."""
+        """Get the contents from data. Data is parsed on first call only and the same
+        contents are provided afterwards, so treat them as read only."""
+        try:
+            return self._contents
+        except AttributeError:
+            self._contents = contents = self.parse()
+            return contents
+
+    @abc.abstractmethod
+    def parse(self) -> Any:
+        """Parses the contents from data, called once by `contents`."""
         raise NotImplementedError
 
+    def view(self) -> memoryview:
+        """Read only view of the raw payload, for forwarding the packet without
+        parsing its contents."""
+        return memoryview(self.data).toreadonly()
+
     def __repr__(self):
         return f"<Packet-v{self.version()}>"
 
+    @classmethod
+    def handler_registered(cls, handler: Type["Packet"]):
+        """Called by `PacketRegistery` when a child implementation of this packet
+        version is registered. Override it to build lookup tables for decoding."""
+
     @classmethod
     @abc.abstractmethod
     def unique_key(cls) -> Any:
@@ -93,6 +165,34 @@ class Packet(abc.ABC):
         raise NotImplementedError
 
 
+class Frame(tuple):
+    """
+    Immutable encoded packet. The packet is serialized once when the frame is created
+    and the same buffers can then be written to any number of connections.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, packet: Packet):
+        return super().__new__(cls, (packet, packet.buffers()))
+
+    @property
+    def packet(self) -> Packet:
+        return self[0]
+
+    @property
+    def buffers(self) -> Tuple[bytes | memoryview, ...]:
+        return self[1]
+
+    @property
+    def size(self) -> int:
+        """Total bytes of the frame."""
+        return sum(memoryview(buffer).nbytes for buffer in self.buffers)
+
+    def __repr__(self) -> str:
+        return f"<Frame: {self.packet!r}>"
+
+
 class PacketRegistery():
     """
     Manages packet version handlers and version implementation handlers. Allowed
@@ -119,6 +219,17 @@ class PacketRegistery():
             PacketRegistery.handlers[version] = {}
         return packet
 
+    @staticmethod
+    def get_packet(version: int) -> Type[Packet]:
+        """Provides the registered packet version. Raises `ValueError` for unknown
+        version as the stream can not be parsed further."""
+        try:
+            return PacketRegistery.packets[version]
+        except KeyError:
+            msg = f"unknown packet version: {version}"
+            logger.error(msg)
+            raise ValueError(msg) from None
+
     @staticmethod
     def register_handler(handler: Type[Packet]) -> Type[Packet]:
         """Register a handler implementing specific version subtype handler. Make sure
@@ -129,6 +240,8 @@ class PacketRegistery():
             PacketRegistery.handlers[version] = {}
         key = handler.unique_key()
         PacketRegistery.handlers[version][key] = handler
+        if parent := PacketRegistery.packets.get(version):
+            parent.handler_registered(handler)
         logger.info(f"registered handler: {handler!r}")
         return handler
 
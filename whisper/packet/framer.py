@@ -0,0 +1,65 @@
+"""
+This module provides buffered framer to read packets from stream of bytes.
+"""
+
+import logging
+from typing import Awaitable, Callable
+
+from whisper.packet import Packet
+
+
+logger = logging.getLogger(__name__)
+
+class Framer:
+    """
+    Buffered packet reader for a single connection. It pulls large chunks from the
+    stream into its buffer and parses as many complete packets out of it as possible,
+    so a packet costs a single read (or less) instead of one read per header field.
+    Partial reads are kept in the buffer until the rest of the frame arrives.
+
+    Use one framer per connection as the buffer may hold bytes of the next packet.
+    """
+
+    __slots__ = ("buffer", "offset")
+
+    chunk_size: int = 64 * 1024
+    """maximum bytes requested from the stream per read"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offset = 0
+
+    def __len__(self) -> int:
+        """Number of buffered bytes not yet parsed."""
+        return len(self.buffer) - self.offset
+
+    def feed(self, data: bytes):
+        """Append received bytes to the buffer."""
+        if self.offset and self.offset == len(self.buffer):
+            self.buffer.clear()
+            self.offset = 0
+        elif self.offset > self.chunk_size:
+            del self.buffer[:self.offset]
+            self.offset = 0
+        self.buffer += data
+
+    def next_packet(self) -> Packet | None:
+        """Parses the next complete packet from the buffer. Provides `None` if the
+        buffer does not hold a complete frame yet."""
+        with memoryview(self.buffer)[self.offset:] as view:
+            size = Packet.frame_size(view)
+            if size is None or len(view) < size:
+                return None
+            packet = Packet.from_frame(view)
+        self.offset += size
+        return packet
+
+    async def read(self, reader: Callable[[int], Awaitable[bytes]]) -> Packet:
+        """Reads the next packet, pulling chunks from `reader` as required. Raises
+        `EOFError` when reader provides empty bytes (connection closed)."""
+        while (packet := self.next_packet()) is None:
+            data = await reader(self.chunk_size)
+            if not data:
+                raise EOFError("stream closed by remote")
+            self.feed(data)
+        return packet
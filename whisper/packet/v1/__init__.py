@@ -3,16 +3,30 @@ This module provides packet version-1 implementation class and registery class t
 manages different packet type implementations.
 """
 
-from .base import PacketType, PacketV1, Status
+from .base import PacketFlag, PacketType, PacketV1, Status
+from .fragment import Reassembler
+from .compression import COMPRESSION, Compressor, Decompressor
 from .init_packet import InitV1Packet
 from .exit_packet import ExitReason, ExitV1Packet
+from .batch_packet import BatchV1Packet
+from .room_packet import RoomAction, RoomV1Packet
+from .message_packet import MessageV1Packet
 
 
 __all__ = (
+    "PacketFlag",
     "PacketType",
     "PacketV1",
     "Status",
+    "Reassembler",
+    "COMPRESSION",
+    "Compressor",
+    "Decompressor",
     "InitV1Packet",
     "ExitReason",
     "ExitV1Packet",
+    "BatchV1Packet",
+    "RoomAction",
+    "RoomV1Packet",
+    "MessageV1Packet",
 )
@@ -5,15 +5,16 @@ This modules provides packet-v1 abstract class and related objects.
 import struct
 import logging
 from enum import IntEnum, auto
-from functools import cached_property
-from typing import Awaitable, Callable
+from typing import Any, Awaitable, Callable, ClassVar, List, Tuple, Type
 
+from whisper.codec import CodecRegistery
 from whisper.packet import Packet, PacketRegistery
 
 
 __all__ = (
     "PacketType",
     "Status",
+    "PacketFlag",
     "PacketV1",
 )
 
@@ -26,6 +27,8 @@ class PacketType(IntEnum):
     EXIT = 0
     INIT = auto()
     MESSAGE = auto()
+    BATCH = auto()
+    ROOM = auto()
 
 
 class Status(IntEnum):
@@ -35,6 +38,30 @@ class Status(IntEnum):
     VALIDATION_ERROR = auto()
 
 
+class PacketFlag:
+    """Flags stored in the lower nibble of status byte. Packets keep their flags as
+    a plain int, so encoding and decoding do no enum arithmetic."""
+
+    FRAGMENT = 0b0001
+    """data is a fragment of larger payload"""
+
+    MORE = 0b0010
+    """more fragments of the payload follow"""
+
+    COMPRESSED = 0b0100
+    """data is compressed with the connection's deflate stream"""
+
+
+HEADER = struct.Struct("=BBHB")
+"""precompiled packet-v1 header: version, type, data length and status"""
+
+_STATUSES: Tuple[Status | None, ...] = tuple(
+    Status(value) if value in Status._value2member_map_ else None
+    for value in range(0x10)
+)
+"""status lookup table indexed by the upper nibble of status byte"""
+
+
 @PacketRegistery.register_packet
 class PacketV1(Packet):
     """
@@ -48,36 +75,95 @@ class PacketV1(Packet):
     + - - - - - - - - + - - - - - - - - + - - - - - - - - + - - - - - - - - +
     |     Version     |   PacketType    |            Data length            |
     + - - - - - - - - + - - - - - - - - + - - - - - - - - + - - - - - - - - +
-    | Status | 0b0000 |                Data (length bytes) ...              |
+    | Status |  Flags |                Data (length bytes) ...              |
     + - - - - - - - - + - - - - - - - - + - - - - - - - - + - - - - - - - - +
     ```
 
+    Data larger than `fragment_size` is sent as fragments. Each fragment is a packet
+    of same type and status with `PacketFlag.FRAGMENT` flag, all but the last one also
+    have `PacketFlag.MORE` flag (see `fragments` and `Reassembler`).
+
     This class is supposed to be inherited by child class to provide custom packets.
     """
 
+    __slots__ = ("type", "status", "flags")
+
+    header_size = HEADER.size
+    """bytes taken by version, type, data length and status"""
+
+    fragment_size = 0xFFFF - HEADER.size - 64
+    """default size of fragment data, it leaves room for compression overhead"""
+
+    handler_table: ClassVar[List[Tuple[Type["PacketV1"], PacketType] | None]] = (
+        [None] * 0x100)
+    """registered handler and packet type indexed by packet type value"""
+
+    codec: ClassVar[str | None] = None
+    """default codec for contents of the packet type or `None` if the packet type has
+    its own fixed encoding. Codec encoded data starts with the codec id byte."""
+
     @staticmethod
     def version() -> int:
         """Packet version."""
         return 1
 
-    def __init__(self, type_: PacketType, data: bytes, status: Status):
+    def __init__(self,
+        type_: PacketType,
+        data: bytes,
+        status: Status,
+        flags: int = 0,
+    ):
         super().__init__(data)
         self.type = type_
         self.status = status
+        self.flags = flags
+
+    @classmethod
+    def handler_registered(cls, handler: Type[Packet]):
+        """Stores the handler in lookup table by its packet type."""
+        type_ = handler.unique_key()
+        cls.handler_table[type_] = (handler, type_) # type: ignore
+
+    @classmethod
+    def lookup(cls,
+        type_: int,
+        status: int,
+    ) -> Tuple[Type["PacketV1"], PacketType, Status]:
+        """Provides the handler, packet type and status for raw header values."""
+        entry = cls.handler_table[type_]
+        status_ = _STATUSES[status >> 4]
+        if entry is None or status_ is None:
+            msg = f"unknown packet-v1 header: type={type_} status={status:#04x}"
+            logger.error(msg)
+            raise ValueError(msg)
+        return entry[0], entry[1], status_
 
     @classmethod
     async def from_stream(cls, reader: Callable[[int], Awaitable[bytes]]):
         """Construct packet from the stream."""
-        type_ = PacketType(struct.unpack("B", await reader(1))[0])
-        length = struct.unpack("H", await reader(2))[0]
-        status = Status(struct.unpack("B", await reader(1))[0] >> 4)
+        header = bytes([cls.version()]) + await reader(HEADER.size - 1)
+        _, type_, length, status = HEADER.unpack(header)
+        handler, type_, status_ = cls.lookup(type_, status)
         data = await reader(length)
-        version = cls.version()
-        handler = PacketRegistery.handlers[version][type_]
-        return handler(type_, data, status) # type: ignore
+        return handler(type_, data, status_, status & 0x0F)
 
-    def to_stream(self) -> bytes:
-        """Convert packet into stream of bytes."""
+    @classmethod
+    def frame_size(cls, buffer: memoryview) -> int | None:
+        """Frame size from the header at the start of buffer."""
+        if len(buffer) < HEADER.size:
+            return None
+        return HEADER.size + HEADER.unpack_from(buffer)[2]
+
+    @classmethod
+    def from_frame(cls, frame: memoryview):
+        """Construct packet from the complete frame."""
+        _, type_, length, status = HEADER.unpack_from(frame)
+        handler, type_, status_ = cls.lookup(type_, status)
+        data = bytes(frame[HEADER.size:HEADER.size + length])
+        return handler(type_, data, status_, status & 0x0F)
+
+    def header(self) -> bytes:
+        """Provides packed header for the packet data."""
         size_limit = self.data_size_limit
         data_size = len(self.data)
         if data_size > size_limit:
@@ -87,23 +173,58 @@ class PacketV1(Packet):
             logger.error(msg)
             raise ValueError(msg)
 
-        version = super().to_stream()
-        type_ = struct.pack("B", self.type)
-        length = struct.pack("H", len(self.data))
-        status = struct.pack("B", (self.status & 0x0F) << 4)
-        return version + type_ + length + status + self.data
+        status = ((self.status & 0x0F) << 4) | self.flags
+        return HEADER.pack(self.version(), self.type, data_size, status)
 
-    @cached_property
+    def to_stream(self) -> bytes:
+        """Convert packet into stream of bytes."""
+        return self.header() + self.data
+
+    def buffers(self) -> Tuple[bytes | memoryview, ...]:
+        """Header and a view of data, the payload is not copied."""
+        return self.header(), memoryview(self.data)
+
+    def fragments(self, size: int | None = None) -> List["PacketV1"]:
+        """Splits the data in fragment packets of at most `size` bytes (defaults to
+        `fragment_size`). Fragments are views over the data, nothing is copied."""
+        size = min(size or self.fragment_size, self.data_size_limit)
+        total = len(self.data)
+        if total <= size:
+            return [self]
+
+        view = memoryview(self.data)
+        fragments = []
+        for offset in range(0, total, size):
+            flags = self.flags | PacketFlag.FRAGMENT
+            if offset + size < total:
+                flags |= PacketFlag.MORE
+            data = view[offset:offset + size]
+            fragments.append(type(self)(self.type, data, self.status, flags))
+        return fragments
+
+    @property
     def data_size_limit(self) -> int:
         """Maximum bytes of data supported."""
-        metadata = 1 + 1 + 2 + 1
-        return 0xFFFF - metadata
+        return 0xFFFF - self.header_size
 
     @staticmethod
     def packet_type() -> PacketType:
         """Child class must implement this to define the type they handle."""
         raise NotImplementedError
 
+    @classmethod
+    def encode(cls, content: Any, codec: str | None = None) -> bytes:
+        """Encodes the contents with given codec (defaults to packet type codec). The
+        codec id is prefixed so receiver can decode it whichever codec was used."""
+        codec_ = CodecRegistery.get(codec or cls.codec) # type: ignore
+        return bytes((codec_.id,)) + codec_.encode(content)
+
+    def decode(self) -> Any:
+        """Decodes the contents encoded by `encode`."""
+        if not self.data:
+            raise ValueError(f"{self!r} has no encoded contents")
+        return CodecRegistery.get(self.data[0]).decode(self.data[1:])
+
     @classmethod
     def create(cls, data: bytes, status: Status = Status.SUCCESS):
         return cls(type_=cls.packet_type(), data=data, status=status,)
@@ -0,0 +1,78 @@
+"""
+This module provides batch packet-v1 implementation.
+"""
+
+from typing import Iterable, List
+
+from whisper.packet import Frame, PacketRegistery
+from .base import PacketFlag, PacketType, PacketV1, Status
+
+
+@PacketRegistery.register_handler
+class BatchV1Packet(PacketV1):
+    """
+    Container of many small packets written as a single frame. Its data is the frames
+    of the packets one after another. Receivers unpack it transparently, so it is
+    never handled by a handler.
+    """
+
+    __slots__ = ()
+
+    @staticmethod
+    def packet_type() -> PacketType:
+        return PacketType.BATCH
+
+    @classmethod
+    def request(cls, frames: Iterable[Frame]):
+        data = b"".join(buffer for frame in frames for buffer in frame.buffers)
+        return cls.create(data)
+
+    @classmethod
+    def response(cls, frames: Iterable[Frame], status: Status = Status.SUCCESS):
+        data = b"".join(buffer for frame in frames for buffer in frame.buffers)
+        return cls.create(data, status)
+
+    def parse(self) -> List[PacketV1]:
+        packets = []
+        with memoryview(self.data) as view:
+            offset = 0
+            while offset < len(view):
+                with view[offset:] as frame:
+                    size = self.frame_size(frame)
+                    if size is None or size > len(frame):
+                        raise ValueError(f"truncated frame in {self!r}")
+                    packet = self.from_frame(frame)
+                if packet.type == PacketType.BATCH or packet.flags & (
+                    PacketFlag.FRAGMENT | PacketFlag.COMPRESSED
+                ):
+                    raise ValueError(f"{packet!r} can not be batched")
+                packets.append(packet)
+                offset += size
+        return packets
+
+    def unpack(self) -> List[PacketV1]:
+        return self.contents()
+
+    def is_critical(self) -> bool:
+        return any(packet.is_critical() for packet in self.contents())
+
+    @classmethod
+    def batches(cls, frames: Iterable[Frame]) -> List[Frame]:
+        """Groups consecutive frames into batch frames, each fitting a single frame.
+        A frame left alone in its group is kept as it is, so are batch frames as they
+        can not be nested."""
+        groups: List[List[Frame]] = []
+        size = 0
+        for frame in frames:
+            if frame.packet.type == PacketType.BATCH: # type: ignore[attr-defined]
+                groups.append([frame])
+                size = cls.fragment_size
+                continue
+            frame_size = frame.size
+            if not groups or size + frame_size > cls.fragment_size:
+                groups.append([])
+                size = 0
+            groups[-1].append(frame)
+            size += frame_size
+        return [group[0] if len(group) == 1 else Frame(cls.request(group))
+                for group in groups]
@@ -0,0 +1,80 @@
+"""
+This module provides per connection payload compression for packet-v1.
+"""
+
+import zlib
+import logging
+
+from whisper.packet import Packet
+from .base import PacketFlag, PacketV1
+
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION = "deflate"
+"""name of the compression negotiated in init exchange"""
+
+
+
+class Compressor:
+    """
+    Compresses outgoing packets of a single connection. It keeps one deflate stream for
+    the connection and flushes it after every packet, so repetitive traffic keeps
+    benefiting from the compression window. Therefore packets must be written in the
+    same order they are compressed.
+
+    Only data of at least `threshold` bytes is compressed and data which may not fit
+    the frame after compression is left as it is.
+    """
+
+    __slots__ = ("threshold", "_stream")
+
+    def __init__(self, threshold: int = 512, level: int = 6):
+        self.threshold = threshold
+        self._stream = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    def compress(self, packet: Packet) -> Packet:
+        """Provides the compressed packet or the same packet if not compressible."""
+        if not isinstance(packet, PacketV1) or packet.flags & PacketFlag.COMPRESSED:
+            return packet
+        size = len(packet.data)
+        if size < self.threshold or size > packet.fragment_size:
+            return packet
+        data = self._stream.compress(packet.data) + self._stream.flush(zlib.Z_SYNC_FLUSH)
+        flags = packet.flags | PacketFlag.COMPRESSED
+        return type(packet)(packet.type, data, packet.status, flags)
+
+
+class Decompressor:
+    """
+    Decompresses incoming packets of a single connection, counterpart of `Compressor`.
+    Packets must be fed in the order they are received. The deflate stream is created
+    on first compressed packet, so connections which never compress pay nothing.
+    """
+
+    __slots__ = ("_stream",)
+
+    max_size: int = 16 * 1024 * 1024
+    """maximum size of decompressed data of a packet"""
+
+    def __init__(self):
+        self._stream = None
+
+    def decompress(self, packet: Packet) -> Packet:
+        """Provides the decompressed packet or the same packet if not compressed."""
+        if not isinstance(packet, PacketV1) or not packet.flags & PacketFlag.COMPRESSED:
+            return packet
+        if self._stream is None:
+            self._stream = zlib.decompressobj(-zlib.MAX_WBITS)
+        try:
+            data = self._stream.decompress(packet.data, self.max_size)
+        except zlib.error as ex:
+            msg = f"corrupt compressed {packet!r}: {ex}"
+            logger.error(msg)
+            raise ValueError(msg) from None
+        if self._stream.unconsumed_tail:
+            msg = f"compressed {packet!r} exceeds {self.max_size} bytes"
+            logger.error(msg)
+            raise ValueError(msg)
+        flags = packet.flags & ~PacketFlag.COMPRESSED
+        return type(packet)(packet.type, data, packet.status, flags)
@@ -14,11 +14,18 @@ class ExitReason(IntEnum):
     SELF_EXIT = auto()
     FORCE_EXIT = auto()
     EXCEPTION = auto()
+    OVERLOADED = auto()
+    """server is not admitting connections, retry later"""
 
 
 @PacketRegistery.register_handler
 class ExitV1Packet(PacketV1):
 
+    __slots__ = ()
+
+    critical = False
+    """exit notice may be dropped, the peer learns of it when connection closes"""
+
     @staticmethod
     def packet_type() -> PacketType:
         return PacketType.EXIT
@@ -33,6 +40,6 @@ class ExitV1Packet(PacketV1):
         data = struct.pack("B", (reason & 0x0F) << 4)
         return cls.create(data, status)
 
-    def contents(self) -> ExitReason:
+    def parse(self) -> ExitReason:
         value = struct.unpack("B", self.data)[0] >> 4
         return ExitReason(value)
@@ -0,0 +1,55 @@
+"""
+This module provides reassembly of fragmented packet-v1.
+"""
+
+import logging
+from typing import Dict
+
+from whisper.packet import Packet
+from .base import PacketFlag, PacketType, PacketV1
+
+
+logger = logging.getLogger(__name__)
+
+class Reassembler:
+    """
+    Reassembles the fragments of packet-v1 received from a single connection. The
+    fragments are appended to a single growing buffer as they arrive, which becomes
+    the data of the reassembled packet, so the payload is held only once.
+
+    A sender writes fragments of one payload per packet type at a time, so pending
+    payloads are tracked by packet type. Packets without `PacketFlag.FRAGMENT` are
+    passed through even if they arrive between fragments.
+    """
+
+    __slots__ = ("pending",)
+
+    max_size: int = 16 * 1024 * 1024
+    """maximum size of reassembled payload"""
+
+    def __init__(self):
+        self.pending: Dict[PacketType, bytearray] = {}
+
+    def feed(self, packet: Packet) -> Packet | None:
+        """Provides the complete packet or `None` if more fragments are required."""
+        if not isinstance(packet, PacketV1) or not packet.flags & PacketFlag.FRAGMENT:
+            return packet
+
+        buffer = self.pending.get(packet.type)
+        if buffer is None:
+            buffer = self.pending[packet.type] = bytearray(packet.data)
+        else:
+            buffer += packet.data
+
+        if len(buffer) > self.max_size:
+            del self.pending[packet.type]
+            msg = f"fragmented {packet!r} exceeds {self.max_size} bytes"
+            logger.error(msg)
+            raise ValueError(msg)
+
+        if packet.flags & PacketFlag.MORE:
+            return None
+
+        del self.pending[packet.type]
+        flags = packet.flags & ~(PacketFlag.FRAGMENT | PacketFlag.MORE)
+        return type(packet)(packet.type, buffer, packet.status, flags) # type: ignore
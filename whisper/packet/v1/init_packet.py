@@ -13,6 +13,8 @@ from .base import PacketType, PacketV1, Status
 @PacketRegistery.register_handler
 class InitV1Packet(PacketV1):
 
+    __slots__ = ()
+
     @staticmethod
     def packet_type() -> PacketType:
         return PacketType.INIT
@@ -26,5 +28,5 @@ class InitV1Packet(PacketV1):
     def response(cls, *, status: Status, **kwargs):
         return cls.create(json_encode(kwargs), status)
 
-    def contents(self) -> Dict[str, Any]:
+    def parse(self) -> Dict[str, Any]:
         return json_decode(self.data)
@@ -0,0 +1,39 @@
+"""
+This module provides message packet-v1 implementation.
+"""
+
+from typing import Any, Dict
+
+from whisper.packet import PacketRegistery
+from .base import PacketType, PacketV1, Status
+
+
+@PacketRegistery.register_handler
+class MessageV1Packet(PacketV1):
+    """Chat message posted to a room. The contents are encoded with the codec
+    negotiated by the connection (see `PacketV1.encode`)."""
+
+    __slots__ = ()
+
+    codec = "json"
+
+    @staticmethod
+    def packet_type() -> PacketType:
+        return PacketType.MESSAGE
+
+    @classmethod
+    def request(cls, *, room: str, text: str, codec: str | None = None, **kwargs):
+        content = {"room": room, "text": text, **kwargs}
+        return cls.create(cls.encode(content, codec))
+
+    @classmethod
+    def response(cls, *, status: Status, codec: str | None = None, **kwargs):
+        return cls.create(cls.encode(kwargs, codec), status)
+
+    def is_critical(self) -> bool:
+        """Chat messages may be dropped for a receiver falling behind, errors may
+        not."""
+        return self.status != Status.SUCCESS
+
+    def parse(self) -> Dict[str, Any]:
+        return self.decode()
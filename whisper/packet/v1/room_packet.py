@@ -0,0 +1,39 @@
+"""
+This module provides room packet-v1 implementation.
+"""
+
+from enum import StrEnum
+from typing import Any, Dict
+
+from whisper.codec import json_decode, json_encode
+from whisper.packet import PacketRegistery
+from .base import PacketType, PacketV1, Status
+
+
+class RoomAction(StrEnum):
+    """Room membership requested by client."""
+
+    JOIN = "join"
+    LEAVE = "leave"
+
+
+@PacketRegistery.register_handler
+class RoomV1Packet(PacketV1):
+
+    __slots__ = ()
+
+    @staticmethod
+    def packet_type() -> PacketType:
+        return PacketType.ROOM
+
+    @classmethod
+    def request(cls, *, action: RoomAction, room: str, **kwargs):
+        content = {"action": action, "room": room, **kwargs}
+        return cls.create(json_encode(content))
+
+    @classmethod
+    def response(cls, *, status: Status, **kwargs):
+        return cls.create(json_encode(kwargs), status)
+
+    def parse(self) -> Dict[str, Any]:
+        return json_decode(self.data)
@@ -0,0 +1,65 @@
+"""
+This module provides bounded asynchronous queues with watermarks for backpressure.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class WatermarkQueue(asyncio.Queue[_T]):
+    """
+    Bounded `asyncio.Queue` notifying its listeners when its depth crosses the
+    watermarks. Listeners are called with `True` once the depth reaches `high` and with
+    `False` once it falls back to `low`, so producers can be paused in between
+    instead of blocking on a full queue.
+
+    Watermarks default to 80% and 50% of `maxsize`. An unbounded queue (`maxsize`
+    of 0) has no watermarks unless given.
+    """
+
+    def __init__(self,
+        maxsize: int = 0,
+        high: int | None = None,
+        low: int | None = None,
+        name: str = "queue",
+    ):
+        super().__init__(maxsize)
+        self.name = name
+        self.high = high if high is not None else maxsize * 4 // 5
+        self.low = low if low is not None else maxsize // 2
+        self.paused = False
+        self.peak = 0
+        """highest depth reached since last `stats`"""
+        self.listeners: List[Callable[[bool], Any]] = []
+
+    def _put(self, item: _T):
+        super()._put(item) # type: ignore
+        depth = self.qsize()
+        if depth > self.peak:
+            self.peak = depth
+        if not self.paused and self.high and depth >= self.high:
+            self.paused = True
+            logger.warning(f"{self.name} reached high watermark: {depth}/{self.maxsize}")
+            for listener in self.listeners:
+                listener(True)
+
+    def _get(self) -> _T:
+        item = super()._get() # type: ignore
+        if self.paused and self.qsize() <= self.low:
+            self.paused = False
+            logger.info(f"{self.name} drained to low watermark: {self.qsize()}")
+            for listener in self.listeners:
+                listener(False)
+        return item
+
+    def stats(self) -> Dict[str, int]:
+        """Provides current and peak depth, peak is reset afterwards."""
+        stats = {"depth": self.qsize(), "peak": self.peak, "capacity": self.maxsize}
+        self.peak = self.qsize()
+        return stats
@@ -8,8 +8,12 @@ import logging
 from whisper.settings import APP_NAME, LOG_DIR
 from whisper.logger import setup_logging, cleanup_logging
 from whisper.packet import PacketRegistery
-from .backend import Server
+from .backend import ProtocolServer, Server
+from .outbox import SlowConsumerPolicy
+from .protocol import ProtocolTcpServer
+from .supervisor import Supervisor, run_worker
 from .tcp import TcpServer
+from .wal import Durability
 from .cli import get_parser
 
 
@@ -24,10 +28,39 @@ logger = logging.getLogger(__name__)
 logger.debug(f"{program} invoked: {args}")
 
 PacketRegistery.ensure_regisered()
-server = Server(conn=TcpServer())
+options = dict(
+    compression_threshold=None if args.no_compression else args.compression_threshold,
+    batch_window=None if args.no_batching else args.batch_window,
+    outbox_size=args.outbox_size,
+    slow_consumer=SlowConsumerPolicy(args.slow_consumer),
+    queue_size=args.queue_size,
+    handler_workers=args.handler_workers,
+    offload_workers=args.offload_workers,
+    process_workers=args.process_workers,
+    loop_threads=args.loop_threads,
+    event_loop=args.event_loop,
+    backlog=args.backlog,
+    max_connections=args.max_connections,
+    accept_rate=args.accept_rate,
+    history_dir=args.history_dir,
+    durability=Durability(args.durability),
+)
 
-try:
+def run():
+    if args.workers:
+        supervisor = Supervisor(
+            args.workers, run_worker, args.host, args.port, args.transport, options,
+            logging.DEBUG, bus_path=args.bus_path)
+        supervisor.run()
+        return
+    if args.transport == "protocol":
+        server = ProtocolServer(conn=ProtocolTcpServer(), **options)
+    else:
+        server = Server(conn=TcpServer(), **options)
     server.run(host=args.host, port=args.port)
+
+try:
+    run()
 except Exception as ex:
     logger.exception(f"uncaught exception in {program}: {ex}")
 else:
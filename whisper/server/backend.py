@@ -2,49 +2,232 @@
 This module provides the server backend class.
 """
 
-import struct
+import os
+import time
+import errno
 import asyncio
+import inspect
 import logging
+from collections import deque
 from functools import cached_property
-from typing import Iterable, Dict, Tuple, NoReturn
+from typing import (
+    Any, Callable, Deque, Hashable, Iterable, Iterator, Dict, List, Set, Tuple, NoReturn,
+)
 
-from whisper.eventloop import EventLoop
+from whisper.eventloop import EventLoop, Handoff, LoopThread
+from whisper.offload import PoolKind
 from whisper.common import Address
-from whisper.packet import Packet
-from whisper.packet.v1 import ExitV1Packet, ExitReason, Status
+from whisper.packet import Frame, Packet
+from whisper.packet.v1 import (
+    BatchV1Packet, ExitV1Packet, ExitReason, MessageV1Packet, Status,
+)
 from whisper.server.base import BaseServer
+from whisper.server.bus import BusClient, BusMessage, pack_packet, unpack_packet
+from whisper.queues import WatermarkQueue
 from whisper.server.connection import ConnHandle
+from whisper.server.outbox import Outbox, SlowConsumerPolicy
+from whisper.server.history import History, HistoryLog
+from whisper.server.index import ClientIndex
+from whisper.server.wal import Durability, WriteAheadLog
+from whisper.server.rooms import Rooms
+from whisper.server.protocol import PacketProtocol, ProtocolTcpServer
+from whisper.handler import DispatchTable
 from whisper.server.handlers import Handlers
 from whisper.typing import (
     TcpServer as _TcpServer,
-    AsyncQueue as _AsyncQueue,
 )
 
 
 logger = logging.getLogger(__name__)
 
+REJECT_STREAM = ExitV1Packet.response(ExitReason.OVERLOADED, Status.SUCCESS).to_stream()
+"""exit packet sent to the connections not admitted"""
+
 class Server(BaseServer, EventLoop):
     """This class provides asynchronouse server backend for the chat applications."""
 
-    def __init__(self, conn: _TcpServer):
-        """The connection object is used to accept client connections."""
+    batch_size: int = 256
+    """maximum packets coalesced in a single burst"""
+
+    load_interval: float = 5.0
+    """seconds between load reports published on the bus"""
+
+    accept_batch: int = 128
+    """maximum connections accepted per wakeup"""
+
+    replay_size: int = 50
+    """latest messages of history replayed to the client joining a room"""
+
+    sync_limit: int = 10_000
+    """most messages of a room streamed to the client catching up with it"""
+
+    commit_window: float = 0.002
+    """seconds the messages are gathered into a single commit of write-ahead log"""
+
+    commit_size: int = 1024
+    """maximum messages in a commit of write-ahead log"""
+
+    checkpoint_size: int = 64 * 1024 * 1024
+    """bytes of write-ahead log triggering a checkpoint of the history"""
+
+    def __init__(self,
+        conn: _TcpServer,
+        compression_threshold: int | None = 512,
+        batch_window: float | None = 0.001,
+        outbox_size: int = 1024,
+        slow_consumer: SlowConsumerPolicy = SlowConsumerPolicy.DISCONNECT,
+        queue_size: int = 10_000,
+        handler_workers: int = 4,
+        offload_workers: int | None = None,
+        process_workers: int = 0,
+        bus: BusClient | None = None,
+        loop_threads: int = 1,
+        event_loop: str | None = None,
+        backlog: int = 1024,
+        max_connections: int | None = None,
+        accept_rate: float | None = None,
+        history_dir: str | None = None,
+        durability: Durability = Durability.NONE,
+    ):
+        """The connection object is used to accept client connections. Payloads of at
+        least `compression_threshold` bytes are compressed for clients supporting it,
+        `None` disables compression. Packets queued within `batch_window` seconds of a
+        burst are coalesced into a batch per connection, `None` disables batching.
+        Once `outbox_size` frames are waiting to be written to a connection the
+        `slow_consumer` policy applies. The recvq and sendq hold at most `queue_size`
+        packets, reading from connections is paused above the high watermark of
+        recvq. Packets are handled by `handler_workers` workers. Blocking work is
+        offloaded to the `thread` pool of `offload_workers` threads and, if
+        `process_workers` is given, CPU bound work to the `process` pool (see
+        `EventLoop.offload`). A server running as worker of `Supervisor` is given the
+        `bus` connecting it to the other workers. Connections are served by
+        `loop_threads` eventloops, each running in its own thread, of the
+        `event_loop` implementation (see `LoopRegistery`), defaults to the current
+        eventloop. Up to `backlog` connections wait to be accepted, at most
+        `max_connections` clients are served and at most `accept_rate` connections
+        per second are admitted, others are rejected with an exit packet. Messages
+        posted to rooms are kept in the history under `history_dir`, `None` keeps
+        no history. Unless `durability` is none, messages are made durable in the
+        write-ahead log of history before they are fanned out."""
         BaseServer.__init__(self, conn)
-        EventLoop.__init__(self)
+        EventLoop.__init__(self, event_loop)
+        self.compression_threshold = compression_threshold
+        self.batch_window = batch_window
+        self.outbox_size = outbox_size
+        self.slow_consumer = slow_consumer
+        self.queue_size = queue_size
+        self.handler_workers = max(1, handler_workers)
+        if offload_workers:
+            self.add_pool("thread", PoolKind.THREAD, offload_workers)
+        if process_workers:
+            self.add_pool("process", PoolKind.PROCESS, process_workers)
+        self.loop_threads = [
+            LoopThread(f"loop-{index}", event_loop or "asyncio")
+            for index in range(1, loop_threads)]
+        self.handoffs: Dict[EventLoop, Handoff[Tuple[ConnHandle, Any]]] = {
+            thread: Handoff(thread.loop, self.deliver) for thread in self.loop_threads}
+        """frames dispatched to the connections served by other eventloops"""
+        self.loop_connections: Dict[EventLoop, int] = {
+            loop: 0 for loop in (self, *self.loop_threads)}
+        """number of connections served by each eventloop"""
+
+        self.bus = bus
+        self.unpublished: List[Tuple[str, Dict[str, Any]]] = []
+        """messages posted by clients before the bus is connected, published to the
+        hub once it is"""
+        self.backlog = backlog
+        self.max_connections = max_connections
+        self.accept_rate = accept_rate
+        self.accept_tokens = 0.0 if accept_rate is None else max(1.0, accept_rate)
+        """connections admitted right away, refilled at `accept_rate` up to a
+        second worth of connections (at least one, so rates below 1 admit too)"""
+        self.accept_time = time.monotonic()
+        self.accepted = 0
+        self.rejected = 0
 
         self.clients: Dict[Address, ConnHandle] = {}
-        self.handlers = {version: {
-            handler.unique_key(): handler(self) for handler in Handlers[version]
-        } for version in Handlers.keys()}
+        self.remote_clients: Dict[str, Set[int]] = {}
+        """usernames of clients served by other workers and the workers serving them"""
+        self.index = ClientIndex()
+        self.rooms = Rooms()
+        self.history = History(history_dir) if history_dir else None
+        self.sealing: asyncio.Task | None = None
+        """task writing the segments of history filled up to disk"""
+        self.seqs: Dict[str, int] = {}
+        """sequence of the latest message posted to each room"""
+        self.durability = Durability(durability)
+        self.wal: WriteAheadLog | None = None
+        if self.durability is not Durability.NONE:
+            if history_dir is None:
+                raise ValueError(f"{self.durability} durability requires history_dir")
+            self.wal = WriteAheadLog(os.path.join(history_dir, "wal.log"))
+        self.handlers = DispatchTable(self, Handlers)
+        self.background_tasks: Set[asyncio.Task] = set()
+        """running background handlers"""
+        self.reading = asyncio.Event()
+        """set while reading from connections is not paused"""
+        self.reading.set()
 
     @cached_property
-    def recvq(self) -> _AsyncQueue[Tuple[Packet, ConnHandle]]:
+    def recvq(self) -> WatermarkQueue[Tuple[Packet, ConnHandle]]:
         """Packets received from connection."""
-        return asyncio.Queue()
+        queue = WatermarkQueue(self.queue_size, name="recvq")
+        queue.listeners.append(self.pause_reading)
+        return queue
 
     @cached_property
-    def sendq(self) -> _AsyncQueue[Tuple[Packet, Iterable[ConnHandle]]]:
+    def walq(self) -> WatermarkQueue[Tuple[str, Dict[str, Any]]]:
+        """Messages waiting to be made durable."""
+        return WatermarkQueue(self.queue_size, name="walq")
+
+    @cached_property
+    def sendq(self) -> WatermarkQueue[Tuple[Packet, Iterable[ConnHandle]]]:
         """Packets to be sent to connections."""
-        return asyncio.Queue()
+        return WatermarkQueue(self.queue_size, name="sendq")
+
+    def pause_reading(self, paused: bool):
+        """Pauses (or resumes) reading from connections, called when recvq crosses its
+        watermarks."""
+        if paused:
+            self.reading.clear()
+        else:
+            self.reading.set()
+
+    def queue_depths(self) -> Dict[str, Dict[str, Any]]:
+        """Provides depth of the queues and worker pools to monitor the backpressure.
+        Peak depths and times are reset with every call."""
+        outboxes = [conn.outbox for conn in list(self.clients.values()) if conn.outbox]
+        shards = [shard.stats() for shard in self.shards]
+        depths: Dict[str, Dict[str, Any]] = {
+            "recvq": self.recvq.stats(),
+            "sendq": self.sendq.stats(),
+            "shards": {
+                "depth": sum(shard["depth"] for shard in shards),
+                "peak": max(shard["peak"] for shard in shards),
+                "workers": self.handler_workers,
+            },
+            "outboxes": {
+                "depth": sum(outbox.qsize() for outbox in outboxes),
+                "peak": max((outbox.stats()["peak"] for outbox in outboxes), default=0),
+                "dropped": sum(outbox.dropped for outbox in outboxes),
+                "connections": len(outboxes),
+            },
+            "accepts": {
+                "connections": len(self.clients),
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+            },
+            "pools": self.pool_stats(),
+            "loops": {
+                "threads": len(self.loop_connections),
+                "connections": max(self.loop_connections.values()),
+                "imbalance": max(self.loop_connections.values())
+                    - min(self.loop_connections.values()),
+            },
+        }
+        if self.wal is not None:
+            depths["wal"] = {**self.walq.stats(), **self.wal.stats()}
+        return depths
 
     def run(self, host: str, port: int):
         """Starts the server backend."""
@@ -54,32 +237,383 @@ class Server(BaseServer, EventLoop):
             logger.exception("eventloop exited due to exception")
 
     async def main(self, host: str, port: int): # type: ignore[override]
-        self.start_server(host, port)
+        for thread in self.loop_threads:
+            thread.start()
+        if self.wal is not None:
+            self.recover()
+        self.start_server(host, port, self.backlog)
         await EventLoop.main(self)
         exit_packet = ExitV1Packet.response(ExitReason.SELF_EXIT, Status.SUCCESS)
-        for address, conn in self.clients:
-            await self.write(conn, exit_packet, self.loop)
-            logger.info(f"sent {exit_packet!r} to {address}")
+        exit_frame = Frame(exit_packet)
+        for address, conn in list(self.clients.items()):
+            if conn.data.get("closed"):
+                continue
+            try:
+                owner = self.owner(conn)
+                if owner is self:
+                    await self.write_frame(conn, exit_frame, self.loop)
+                else:
+                    await asyncio.wrap_future(owner.schedule(
+                        self.write_frame(conn, exit_frame, owner.loop)))
+            except OSError:
+                logger.warning(f"failed to send {exit_packet!r} to {address}")
+            else:
+                logger.info(f"sent {exit_packet!r} to {address}")
+        for thread in self.loop_threads:
+            thread.stop(timeout=5)
         self.stop_server()
+        if self.history is not None:
+            self.history.close()
+        if self.wal is not None:
+            self.wal.close()
 
     def shutdown(self, sig: int | None = None):
         logger.info(f"received signal: {sig}")
         EventLoop.stop_main(self)
 
-    def serve_coro(self, conn: ConnHandle) -> asyncio.Task:
-        """Handles the connection to be served.."""
+    def serve_coro(self, conn: ConnHandle):
+        """Handles the connection to be served. It is served by the eventloop
+        serving the least connections, reads and writes of the connection run there
+        while its packets are handled by this eventloop."""
         self.clients[conn.address] = conn
-        task = self.create_task(self.read_coro(conn))
+        owner = min(self.loop_connections, key=self.loop_connections.__getitem__)
+        self.loop_connections[owner] += 1
+        if owner is not self:
+            conn.data["loop"] = owner
+        owner.call_threadsafe(self.serve_connection, conn)
+
+    def serve_connection(self, conn: ConnHandle) -> asyncio.Task:
+        """Starts the tasks serving the connection, called in its eventloop."""
+        self.start_writer(conn)
+        task = self.owner(conn).create_task(self.read_coro(conn))
         conn.data["read_coro"] = task
         task.add_done_callback(lambda _: self.close(conn))
         return task
 
+    def owner(self, conn: ConnHandle) -> EventLoop:
+        """Provides the eventloop serving the connection."""
+        return conn.data.get("loop", self)
+
+    def start_writer(self, conn: ConnHandle) -> asyncio.Task:
+        """Creates the outbox of connection and its writer task."""
+        conn.outbox = Outbox(
+            self.outbox_size, self.slow_consumer, name=f"outbox of {conn.address}")
+        task = self.owner(conn).create_task(self.writer_coro(conn))
+        conn.data["writer_coro"] = task
+        return task
+
+    def stop_tasks(self, conn: ConnHandle):
+        """Cancels the tasks serving the connection."""
+        for name in ("read_coro", "writer_coro"):
+            task = conn.data.pop(name, None)
+            if task and not task.done() and task is not asyncio.current_task():
+                task.cancel()
+
     def close(self, conn: ConnHandle):
-        task = conn.data.pop("read_coro", None)
-        if task and not task.done():
-            task.cancel()
-        self.clients.pop(conn.address)
-        return BaseServer.close(self, conn)
+        owner = self.owner(conn)
+        if not owner.in_loop():
+            owner.call_threadsafe(self.close, conn)
+            return
+        self.stop_tasks(conn)
+        if not conn.data.get("closed"):
+            conn.data["closed"] = True
+            BaseServer.close(self, conn)
+            self.call_threadsafe(self.forget, conn, owner)
+
+    def forget(self, conn: ConnHandle, owner: EventLoop):
+        """Called once the connection is closed by its eventloop, the connection is
+        dropped from `clients` here so it changes on this eventloop only."""
+        self.clients.pop(conn.address, None)
+        self.loop_connections[owner] -= 1
+        self.rooms.leave_all(conn)
+        if self.index.remove(conn) and not self.index.is_online(conn.username):
+            self.presence_changed(conn.username, False)
+
+    def identify(self, conn: ConnHandle, username: str, key: str):
+        """Indexes the initialised client by its username and session key, the user
+        is announced to other workers on its first connection. A client initialised
+        again under another name leaves its previous name, which is announced
+        offline once it has no connection left."""
+        previous = conn.username if self.index.remove(conn) else None
+        conn.username = username
+        conn.key = key
+        self.index.add(conn)
+        if previous == username:
+            return
+        if previous is not None and not self.index.is_online(previous):
+            self.presence_changed(previous, False)
+        if len(self.index.by_username(username)) == 1:
+            self.presence_changed(username, True)
+
+    async def broadcast(self, packet: Packet, usernames: Iterable[str] | None = None):
+        """Queues the packet to the clients with given usernames, or to all serving
+        clients, including the clients of other workers."""
+        if usernames is not None:
+            usernames = list(usernames)
+        if conns := self.local_clients(usernames):
+            await self.sendq.put((packet, conns))
+        if self.bus is not None and (usernames is None or any(
+                name in self.remote_clients for name in usernames)):
+            payload = pack_packet(packet)
+            self.bus.publish(BusMessage.BROADCAST, {"to": usernames}, payload)
+
+    def local_clients(self, usernames: Iterable[str] | None = None) -> List[ConnHandle]:
+        """Provides serving clients of this worker with given usernames, or all."""
+        if usernames is None:
+            return [conn for conn in list(self.clients.values()) if conn.serve]
+        return [conn for name in set(usernames)
+                for conn in self.index.by_username(name)]
+
+    def fanout(self,
+        name: str,
+        message: Dict[str, Any],
+    ) -> List[Tuple[Packet, Iterable[ConnHandle]]]:
+        """Provides the message packets for the members of room served by this
+        worker, the message is encoded once per codec of the members."""
+        if (room := self.rooms.get(name)) is None:
+            return []
+        return [
+            (MessageV1Packet.response(status=Status.SUCCESS, codec=codec, **message),
+             conns)
+            for codec, conns in room.groups().items()]
+
+    async def submit_message(self,
+        name: str,
+        message: Dict[str, Any],
+        local: bool = True,
+    ):
+        """Accepts the message posted to room. With workers connected by the bus,
+        the message posted by a `local` client is published to the hub which numbers
+        it and hands it back to every worker, until the bus is connected it waits in
+        `unpublished` (at most `queue_size` messages, the others are dropped). Once
+        it is durable (see `wal_coro`) it is recorded in history and fanned out, so
+        the sender receiving its message is the acknowledgement."""
+        if local and self.bus is not None:
+            if self.bus.connected:
+                self.publish_message(name, message)
+            elif len(self.unpublished) < self.queue_size:
+                self.unpublished.append((name, message))
+            else:
+                logger.warning(f"bus not connected, dropped message posted to {name}")
+            return
+        if self.wal is not None:
+            await self.walq.put((name, message))
+            return
+        self.sequence(name, message)
+        await self.queue_responses(self.post_message(name, message))
+
+    def sequence(self, name: str, message: Dict[str, Any]):
+        """Numbers the message posted to room, unless numbered by the hub of bus."""
+        if (seq := message.get("seq")) is None:
+            message["seq"] = self.next_seq(name)
+        elif seq > self.room_seq(name):
+            self.seqs[name] = seq
+
+    def room_seq(self, name: str) -> int:
+        """Provides the sequence of the latest message posted to room, 0 if none.
+        Only the sequences of rooms with messages are kept, so clients naming other
+        rooms do not grow them."""
+        if (seq := self.seqs.get(name)) is None:
+            log = self.history.log(name, create=False) if self.history else None
+            if log is None:
+                return 0
+            seq = self.seqs[name] = log.last_seq
+        return seq
+
+    def next_seq(self, name: str) -> int:
+        """Allocates the sequence of the next message posted to room. Sequences
+        follow the history of room, so they are kept across restarts if the server
+        keeps history."""
+        seq = self.seqs[name] = self.room_seq(name) + 1
+        return seq
+
+    def post_message(self,
+        name: str,
+        message: Dict[str, Any],
+        record: bytes | None = None,
+    ) -> List[Tuple[Packet, Iterable[ConnHandle]]]:
+        """Records the message posted to room in its history and provides the
+        message packets for the members of room served by this worker."""
+        if self.history is not None:
+            self.history.append(
+                name, record or self.history_record(message), message.get("seq"))
+            self.seal_history()
+        return self.fanout(name, message)
+
+    def seal_history(self):
+        """Starts writing the sealed segments of history (filled up or of idle logs
+        closed) to disk, unless it is in progress."""
+        history: History = self.history # type: ignore[assignment]
+        if history.sealed and (self.sealing is None or self.sealing.done()):
+            self.sealing = self.create_task(self.sealing_coro())
+
+    async def sealing_coro(self):
+        """Writes the segments of history filled up to disk in worker pool, so the
+        eventloop does not wait for them."""
+        history: History = self.history # type: ignore[assignment]
+        try:
+            while history.sealed:
+                await self.offload(history.close_sealed)
+        except OSError:
+            logger.exception("failed to write history to disk")
+
+    @staticmethod
+    def history_record(message: Dict[str, Any]) -> bytes:
+        """Encodes the message as it is stored in history."""
+        return MessageV1Packet.response(status=Status.SUCCESS, **message).to_stream()
+
+    async def wal_coro(self):
+        """Makes the submitted messages durable before they are posted. Messages
+        submitted within `commit_window` of the first one, or while the previous
+        commit is in progress, are committed together with a single fsync, unless
+        every message is made durable on its own. The server stops if the log can
+        not be written as messages could no longer be acknowledged."""
+        logger.info("wal_coro running")
+        wal: WriteAheadLog = self.wal # type: ignore[assignment]
+        try:
+            while True:
+                batch = [await self.walq.get()]
+                if self.durability is Durability.BATCHED:
+                    if self.commit_window:
+                        await asyncio.sleep(self.commit_window)
+                    while not self.walq.empty() and len(batch) < self.commit_size:
+                        batch.append(self.walq.get_nowait())
+
+                records = []
+                for name, message in batch:
+                    self.sequence(name, message)
+                    record = self.history_record(message)
+                    wal.append(name, message["seq"], record)
+                    records.append(record)
+                await self.offload(wal.commit)
+
+                for (name, message), record in zip(batch, records):
+                    await self.queue_responses(self.post_message(name, message, record))
+                if wal.size >= self.checkpoint_size:
+                    await self.offload(self.checkpoint)
+        except self.CancelledError:
+            logger.info("wal_coro cancelled")
+            return
+        except Exception:
+            logger.exception("failed to commit messages to the write-ahead log")
+        self.stop_main()
+        logger.info("wal_coro exited")
+
+    def checkpoint(self):
+        """Writes the history to disk and drops the write-ahead log. It blocks."""
+        self.history.flush() # type: ignore[union-attr]
+        self.wal.truncate() # type: ignore[union-attr]
+        logger.debug("checkpointed history")
+
+    def recover(self):
+        """Brings the history up to date with the messages of write-ahead log which
+        were not checkpointed before the server stopped. History written after the
+        last checkpoint may not have reached the disk intact, so it is cut back to
+        the checkpoint and rewritten from the log."""
+        wal: WriteAheadLog = self.wal # type: ignore[assignment]
+        history: History = self.history # type: ignore[assignment]
+        entries = list(wal.entries_from_disk())
+        checkpointed: Dict[str, int] = {}
+        for name, seq, _ in entries:
+            checkpointed.setdefault(name, seq - 1)
+        for name, seq in checkpointed.items():
+            log: HistoryLog = history.log(name) # type: ignore[assignment]
+            if log.last_seq > seq:
+                log.truncate(seq)
+        for name, seq, record in entries:
+            history.append(name, record, seq)
+        self.checkpoint()
+        logger.info(f"recovered {len(entries)} messages from write-ahead log")
+
+    def replay(self,
+        name: str,
+        conn: ConnHandle,
+        since: int | None = None,
+    ) -> List[Tuple[Packet, Iterable[ConnHandle]]]:
+        """Provides the messages of room the client joining it has not seen, the
+        ones after sequence `since` (at most `sync_limit` latest of them) or, if the
+        client has seen none, the latest `replay_size`. Messages are sent as they
+        are stored in the history, in batch packets."""
+        if self.history is None:
+            return []
+        if (log := self.history.log(name, create=False)) is None:
+            return []
+        if since is None:
+            first = log.last_seq - self.replay_size + 1
+        else:
+            first = max(since + 1, log.last_seq - self.sync_limit + 1)
+        views = log.read(first)
+        self.seal_history()
+        return [(BatchV1Packet.create(view), [conn])  # type: ignore[arg-type]
+                for view in views]
+
+    def publish_message(self, name: str, message: Dict[str, Any]):
+        """Publishes the message posted to room to the hub of bus."""
+        if self.bus is not None:
+            self.bus.publish(BusMessage.ROOM, {"room": name, "message": message})
+
+    def presence_changed(self, username: str, online: bool):
+        """Announces the user to other workers once its first connection is served
+        (and once its last connection is closed)."""
+        if self.bus is not None:
+            self.bus.publish(
+                BusMessage.PRESENCE, {"username": username, "online": online})
+
+    def remote_presence(self, username: str, worker: int, online: bool):
+        """Tracks the workers serving the user, the user is remote until the last of
+        them is gone."""
+        if online:
+            self.remote_clients.setdefault(username, set()).add(worker)
+        elif (workers := self.remote_clients.get(username)) is not None:
+            workers.discard(worker)
+            if not workers:
+                del self.remote_clients[username]
+
+    async def bus_coro(self):
+        """Receives the broadcasts and presence of other workers. The server stops
+        if the bus is disconnected as the worker is orphaned."""
+        logger.info("bus_coro running")
+        try:
+            await self.bus.connect(self.history.heads() if self.history else None)
+            for name, message in self.unpublished:
+                self.publish_message(name, message)
+            self.unpublished.clear()
+            for username in list(self.index.usernames):
+                self.presence_changed(username, True)
+            async for kind, meta, payload in self.bus.messages():
+                if kind is BusMessage.BROADCAST:
+                    try:
+                        packet = unpack_packet(payload)
+                    except ValueError:
+                        logger.exception(f"bad broadcast from worker {meta['worker']}")
+                        continue
+                    if conns := self.local_clients(meta.get("to")):
+                        await self.sendq.put((packet, conns))
+                elif kind is BusMessage.ROOM:
+                    await self.submit_message(
+                        meta["room"], meta["message"], local=False)
+                elif kind is BusMessage.PRESENCE:
+                    self.remote_presence(meta["username"], meta["worker"], meta["online"])
+        except self.CancelledError:
+            logger.info("bus_coro cancelled")
+            return
+        except OSError:
+            logger.exception("failed to connect to bus")
+        self.stop_main()
+        logger.info("bus_coro exited")
+
+    async def load_coro(self):
+        """Publishes load of the worker on bus every `load_interval` seconds."""
+        try:
+            while True:
+                await asyncio.sleep(self.load_interval)
+                self.bus.publish(BusMessage.LOAD, {
+                    "pid": os.getpid(),
+                    "clients": len(self.clients),
+                    "queues": self.queue_depths(),
+                })
+        except self.CancelledError:
+            logger.info("load_coro cancelled")
 
     async def handle_cancel(self, coro, name: str, *args, **kwargs):
         try:
@@ -92,31 +626,81 @@ class Server(BaseServer, EventLoop):
             logger.exception(f"error occured in {name}: {ex}")
 
     async def accept_coro(self) -> NoReturn:
-        """Accepts incoming connection."""
+        """Accepts incoming connections, all the pending connections are accepted
+        per wakeup (up to `accept_batch`). Connections not admitted are rejected."""
         logger.info("accept_coro running")
         run = True
         while run:
             try:
-                conn = await self.accept(self.loop)
+                conns = await self.accept_many(self.loop, self.accept_batch)
             except self.CancelledError:
                 run = False
                 logger.info("accept_coro cancelled")
+            except OSError as ex:
+                if ex.errno not in (errno.EMFILE, errno.ENFILE, errno.ENOBUFS,
+                                    errno.ENOMEM, errno.ECONNABORTED):
+                    run = False
+                    logger.exception("exception occure while running accept_coro")
+                    continue
+                logger.warning(f"failed to accept connection: {ex}")
+                await asyncio.sleep(0.1)
             except Exception:
                 run = False
                 logger.exception("exception occure while running accept_coro")
             else:
-                self.serve_coro(conn)
+                for conn in conns:
+                    if self.admit():
+                        self.serve_coro(conn)
+                    else:
+                        self.reject(conn)
         logger.info("accept_coro exited")
 
+    def admit(self) -> bool:
+        """Whether a new connection is admitted as per `max_connections` and
+        `accept_rate`."""
+        limit = self.max_connections
+        if limit is not None and len(self.clients) >= limit:
+            return False
+        if self.accept_rate is not None:
+            now = time.monotonic()
+            self.accept_tokens = min(
+                max(1.0, self.accept_rate),
+                self.accept_tokens + (now - self.accept_time) * self.accept_rate)
+            self.accept_time = now
+            if self.accept_tokens < 1:
+                return False
+            self.accept_tokens -= 1
+        self.accepted += 1
+        return True
+
+    def reject(self, conn: ConnHandle):
+        """Sends the exit packet to connection not admitted and closes it. The send
+        buffer of a new connection is empty, so the packet is written right away
+        without waiting."""
+        self.rejected += 1
+        try:
+            conn.sock.send(REJECT_STREAM)
+        except OSError:
+            pass
+        conn.sock.close()
+        logger.warning(f"rejected connection from {conn.address}")
+
     async def read_coro(self, conn: ConnHandle):
         """Reads incoming packets from connection."""
         logger.info(f"read_coro running for {conn.address}")
+        loop = asyncio.get_running_loop()
+        threaded = loop is not self.loop
         while not conn.close:
             try:
-                packet = await self.read(conn, self.loop)
-            except struct.error:
+                if not threaded and not self.reading.is_set():
+                    await self.reading.wait()
+                packets = await self.read(conn, loop)
+            except EOFError:
                 conn.close = True
                 logger.info(f"{conn.address} diconnected")
+            except ValueError as ex:
+                conn.close = True
+                logger.warning(f"malformed stream from {conn.address}: {ex}")
             except self.CancelledError:
                 conn.close = True
                 logger.info(f"read_coro task cancelled for {conn.address}")
@@ -124,41 +708,342 @@ class Server(BaseServer, EventLoop):
                 logger.exception(
                     f"uncaught exception while serving {conn.address}: {ex}")
             else:
-                await self.recvq.put((packet, conn))
+                if threaded:
+                    await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(
+                        self.put_packets(packets, conn), self.loop))
+                    continue
+                for packet in packets:
+                    await self.recvq.put((packet, conn))
         logger.info(f"read_coro stopped for {conn.address}")
 
+    async def put_packets(self, packets: List[Packet], conn: ConnHandle):
+        """Puts the packets read by another eventloop in recvq, the reader waits
+        while recvq is full."""
+        for packet in packets:
+            await self.recvq.put((packet, conn))
+
     async def write_coro(self) -> NoReturn:
-        """Writes outgoing packet to connnections."""
+        """Dispatches outgoing packets to the outbox of their connections, they are
+        written by the writer task of each connection (see `writer_coro`), so a slow
+        connection only delays itself. A packet is encoded once for all of its
+        connections, bursts of packets are coalesced into batches per connection and
+        packets too large for a single frame are queued as fragments."""
         logger.info("write_coro running")
-        run = True
-        while run:
-            packet, conns = await self.sendq.get()
-            for conn in conns:
-                try:
-                    await self.write(conn, packet, self.loop)
-                except self.CancelledError:
-                    run = False
-                    logger.info("write_coro task cancelled")
-                except Exception:
-                    run = False
-                    conn.close = True
-                    logger.exception("exception occure whiel running write_coro")
+        try:
+            while True:
+                burst = []
+                for packet, conns in await self.next_burst():
+                    if len(fragments := packet.fragments()) > 1:
+                        self.dispatch_transfer(fragments, conns)
+                    else:
+                        burst.append((packet, conns))
+                if len(burst) == 1:
+                    self.dispatch_packet(*burst[0])
+                elif burst:
+                    self.dispatch_burst(burst)
+        except self.CancelledError:
+            logger.info("write_coro task cancelled")
         logger.info("write_coro exited")
 
+    async def next_burst(self) -> List[Tuple[Packet, Iterable[ConnHandle]]]:
+        """Waits for the next packet to send along with the packets queued within the
+        batch window. A lone packet is not delayed by the window."""
+        burst = [await self.sendq.get()]
+        if self.batch_window is None:
+            return burst
+        await asyncio.sleep(0)
+        if not self.sendq.empty() and self.batch_window:
+            await asyncio.sleep(self.batch_window)
+        while not self.sendq.empty() and len(burst) < self.batch_size:
+            burst.append(self.sendq.get_nowait())
+        return burst
+
+    def dispatch_packet(self, packet: Packet, conns: Iterable[ConnHandle]):
+        """Queues the packet to connections, encoded once for all of them."""
+        try:
+            frame = Frame(packet)
+        except ValueError:
+            logger.exception(f"failed to encode {packet!r}")
+            return
+        for conn in conns:
+            self.enqueue(conn, frame)
+        logger.debug(f"queued {frame!r} to its connections")
+
+    def dispatch_transfer(self, fragments: List[Packet], conns: Iterable[ConnHandle]):
+        """Queues the fragments of a packet to connections, encoded once for all of
+        them. Writers send them one at a time in between the other packets."""
+        frames = [Frame(fragment) for fragment in fragments]
+        for conn in conns:
+            self.enqueue(conn, frames)
+        logger.debug(f"queued {len(frames)} fragments to their connections")
+
+    def dispatch_burst(self, burst: List[Tuple[Packet, Iterable[ConnHandle]]]):
+        """Queues the burst of packets. Packets of a connection are coalesced into
+        batch packets, each packet is encoded once and connections receiving the same
+        packets share the same batch."""
+        outgoing: Dict[ConnHandle, List[Frame]] = {}
+        for packet, conns in burst:
+            try:
+                frame = Frame(packet)
+            except ValueError:
+                logger.exception(f"failed to encode {packet!r}")
+                continue
+            for conn in conns:
+                outgoing.setdefault(conn, []).append(frame)
+
+        batches: Dict[Tuple[int, ...], List[Frame]] = {}
+        for conn, frames in outgoing.items():
+            key = tuple(map(id, frames))
+            if (batched := batches.get(key)) is None:
+                batched = batches[key] = BatchV1Packet.batches(frames)
+            for frame in batched:
+                self.enqueue(conn, frame)
+        logger.debug(f"queued burst of {len(burst)} packets to {len(outgoing)} connections")
+
+    def enqueue(self, conn: ConnHandle, item: Frame | List[Frame]) -> bool:
+        """Puts the frame (or fragment frames) in the outbox of connection. The
+        connection is closed if it is not keeping up (see `SlowConsumerPolicy`).
+        Frames of connections served by other eventloops are handed over to them."""
+        if conn.close:
+            return False
+        if (owner := conn.data.get("loop")) is not None and not owner.in_loop():
+            self.handoffs[owner].put((conn, item))
+            return True
+        if conn.outbox is None:
+            return False
+        if not conn.outbox.offer(item):
+            logger.warning(f"outbox of {conn.address} is full, closing connection")
+            conn.close = True
+            self.close(conn)
+            return False
+        return True
+
+    def deliver(self, items: List[Tuple[ConnHandle, Frame | List[Frame]]]):
+        """Puts the frames handed over by dispatcher in the outboxes, called in the
+        eventloop serving the connections."""
+        for conn, item in items:
+            self.enqueue(conn, item)
+
+    async def writer_coro(self, conn: ConnHandle):
+        """Writes the outbox of connection. Frames queued while the previous write was
+        in progress are written together with a single vectored write and fragments
+        are written one at a time in between them, so a large transfer does not stall
+        other traffic."""
+        logger.info(f"writer_coro running for {conn.address}")
+        loop = asyncio.get_running_loop()
+        outbox = conn.outbox
+        transfers: Deque[Iterator[Frame]] = deque()
+        try:
+            while True:
+                if transfers:
+                    if (fragment := next(transfers[0], None)) is None:
+                        transfers.popleft()
+                        continue
+                    await self.write_frame(conn, fragment, loop)
+                    if outbox.empty():
+                        continue
+
+                frames = []
+                item = await outbox.get()
+                while True:
+                    if isinstance(item, Frame):
+                        frames.append(item)
+                    else:
+                        transfers.append(iter(item))
+                    if outbox.empty():
+                        break
+                    item = outbox.get_nowait()
+                if frames:
+                    await self.write_frames(conn, frames, loop)
+        except self.CancelledError:
+            logger.info(f"writer_coro task cancelled for {conn.address}")
+        except Exception:
+            logger.exception(f"exception occured while writing to {conn.address}")
+            conn.close = True
+            self.close(conn)
+        logger.info(f"writer_coro stopped for {conn.address}")
+
     async def handler_coro(self) -> NoReturn:
-        """Handles incoming packets from queue and writes outgoing packets to queue."""
+        """Handles incoming packets from queue and writes outgoing packets to queue.
+        With many handler workers it routes the packets to the shard of their
+        `shard_key`, so packets of a connection are handled in order by the same
+        worker while other connections proceed on the other workers."""
         logger.info("handler_coro running")
+        if self.handler_workers == 1:
+            while True:
+                packet, conn = await self.recvq.get()
+                await self.handle_packet(packet, conn)
+
+        shards = self.shards
+        for shard in range(len(shards)):
+            self.create_task(self.worker_coro(shard), name=f"worker_coro-{shard}")
         while True:
             packet, conn = await self.recvq.get()
-            handler = self.handlers[packet.version()][packet.unique_key()]
-            if responses := handler(packet, conn):
-                for packet, conns in responses:
-                    await self.sendq.put((packet, conns))
+            shard = shards[hash(self.shard_key(packet, conn)) % len(shards)]
+            await shard.put((packet, conn))
+
+    @cached_property
+    def shards(self) -> List[WatermarkQueue[Tuple[Packet, ConnHandle]]]:
+        """Packets routed to each handler worker."""
+        size = max(1, self.queue_size // self.handler_workers)
+        return [WatermarkQueue(size, name=f"shard-{shard}")
+                for shard in range(self.handler_workers)]
+
+    def shard_key(self, packet: Packet, conn: ConnHandle) -> Hashable:
+        """Provides the key deciding the worker handling the packet, packets with
+        same key are handled in order. Defaults to the connection address, which
+        spreads better than the socket based hash of connection."""
+        return conn.address
+
+    async def worker_coro(self, shard: int) -> NoReturn:
+        """Handles the packets routed to the shard."""
+        logger.info(f"worker_coro running for shard {shard}")
+        queue = self.shards[shard]
+        while True:
+            packet, conn = await queue.get()
+            await self.handle_packet(packet, conn)
+
+    async def handle_packet(self, packet: Packet, conn: ConnHandle):
+        """Calls the handler of packet and queues its responses. Background handlers
+        are run in their own task."""
+        packet_type = type(packet)
+        try:
+            call = self.handlers[packet_type]
+        except KeyError:
+            logger.exception(f"failed to handle {packet!r} from {conn.address}")
+            return
+        if packet_type in self.handlers.background:
+            task = self.create_task(self.run_handler(call, packet, conn))
+            self.background_tasks.add(task)
+            task.add_done_callback(self.background_tasks.discard)
+        else:
+            await self.run_handler(call, packet, conn)
+
+    async def run_handler(self,
+        call: Callable[..., Any],
+        packet: Packet,
+        conn: ConnHandle,
+    ):
+        """Runs the handler and queues its responses. Coroutine handlers are awaited
+        and responses of asynchronous generator handlers are queued as they are
+        yielded."""
+        try:
+            result = call(packet, conn)
+            if inspect.isasyncgen(result):
+                async for responses in result:
+                    await self.queue_responses(responses)
+                return
+            if inspect.isawaitable(result):
+                result = await result
+        except self.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"failed to handle {packet!r} from {conn.address}")
+            return
+        await self.queue_responses(result)
+
+    async def queue_responses(self,
+        responses: Iterable[Tuple[Packet, Iterable[ConnHandle]]] | None,
+    ):
+        """Puts the responses of handler in sendq."""
+        if responses:
+            for packet, conns in responses:
+                await self.sendq.put((packet, conns))
 
     def initial_tasks(self):
         """Initial tasks."""
-        return super().initial_tasks() | {
+        tasks = super().initial_tasks() | {
             self.accept_coro,
             self.write_coro,
             self.handler_coro,
         }
+        if self.bus is not None:
+            tasks |= {self.bus_coro, self.load_coro}
+        if self.wal is not None:
+            tasks |= {self.wal_coro}
+        return tasks
+
+
+class ProtocolServer(Server):
+    """
+    Server backend serving connections with `asyncio.Protocol` callbacks (see
+    `ProtocolTcpServer`). There is no read task per connection, packets decoded in
+    `data_received` are put on recvq directly and writes are buffered by the
+    transport.
+    """
+
+    def __init__(self, conn: ProtocolTcpServer, **kwargs):
+        """Takes the same options as `Server`, connections are served by a single
+        eventloop."""
+        super().__init__(conn, **kwargs) # type: ignore
+        if self.loop_threads:
+            raise ValueError("protocol transport does not support loop threads")
+        self.conn: ProtocolTcpServer = conn
+
+    async def accept_coro(self) -> NoReturn:
+        """Serves incoming connections."""
+        logger.info("accept_coro running")
+        try:
+            await self.conn.serve(self.loop, self)
+        except self.CancelledError:
+            logger.info("accept_coro cancelled")
+        except Exception:
+            logger.exception("exception occure while running accept_coro")
+        logger.info("accept_coro exited")
+
+    def connection_made(self, conn: ConnHandle, protocol: PacketProtocol):
+        """Called by protocol when connection is accepted."""
+        if not self.admit():
+            self.rejected += 1
+            conn.close = True
+            protocol.transport.write(REJECT_STREAM)
+            protocol.close()
+            logger.warning(f"rejected connection from {conn.address}")
+            return
+        self.conn.protocols[conn.sock] = protocol
+        self.clients[conn.address] = conn
+        self.loop_connections[self] += 1
+        self.start_writer(conn)
+        logger.info(f"accepted connection from {conn.address}")
+
+    def packets_received(self, conn: ConnHandle, packets: List[Packet]):
+        """Called by protocol with the packets decoded from received data. Packets
+        not fitting in recvq are kept by the protocol until reading is resumed."""
+        protocol = self.conn.protocols[conn.sock]
+        if protocol.pending:
+            protocol.pending.extend(packets)
+            return
+        for index, packet in enumerate(packets):
+            try:
+                self.recvq.put_nowait((packet, conn))
+            except asyncio.QueueFull:
+                protocol.pending.extend(packets[index:])
+                protocol.transport.pause_reading()
+                return
+
+    def pause_reading(self, paused: bool):
+        """Pauses (or resumes) reading from all transports."""
+        super().pause_reading(paused)
+        for protocol in list(self.conn.protocols.values()):
+            if paused:
+                protocol.transport.pause_reading()
+                continue
+            if not self.reading.is_set():
+                break
+            if pending := protocol.pending:
+                protocol.pending = []
+                self.packets_received(protocol.conn, pending)
+            if not protocol.pending and not protocol.transport.is_closing():
+                protocol.transport.resume_reading()
+
+    def connection_lost(self, conn: ConnHandle, exc: Exception | None):
+        """Called by protocol when connection is closed."""
+        self.stop_tasks(conn)
+        self.conn.protocols.pop(conn.sock, None)
+        if conn.address in self.clients:
+            self.forget(conn, self)
+        logger.info(f"closed connection with {conn.address}")
+
+    def close(self, conn: ConnHandle):
+        if protocol := self.conn.protocols.get(conn.sock):
+            protocol.close()
@@ -3,8 +3,9 @@ This module provides the basic server functionality to manage clients and commun
 """
 
 import logging
+from typing import Iterable, List
 
-from whisper.packet import Packet
+from whisper.packet import Frame, Packet
 from whisper.server.connection import ConnHandle
 from whisper.typing import (
     TcpServer as _TcpServer,
@@ -27,27 +28,63 @@ class BaseServer:
         logger.info(f"accepted connection from {address}")
         return ConnHandle(sock, address, {}) # type: ignore
 
-    async def read(self, conn: ConnHandle, loop: _EventLoop) -> Packet:
-        """Read `n` bytes from connection."""
+    async def accept_many(self, loop: _EventLoop, limit: int) -> List[ConnHandle]:
+        """Accept the pending client connections, at most `limit` of them."""
+        conns = []
+        for sock, address in await self.conn.accept_many(loop, limit):
+            logger.info(f"accepted connection from {address}")
+            conns.append(ConnHandle(sock, address, {}))
+        return conns
+
+    async def read(self, conn: ConnHandle, loop: _EventLoop) -> List[Packet]:
+        """Read packets from connection. A frame may carry a part of a packet or a
+        batch of packets, so it reads until at least a packet is complete. Raises
+        `EOFError` if connection is closed."""
         reader = lambda n: self.conn.read(conn.sock, n, loop)  # noqa: E731
-        packet = await Packet.from_stream(reader)
-        logger.debug(f"received {packet!r} from {conn.address}")
-        return packet
+        packet = None
+        while packet is None:
+            packet = await conn.framer.read(reader)
+            packet = conn.reassembler.feed(conn.decompressor.decompress(packet))
+        packets = packet.unpack()
+        logger.debug(f"received {packets!r} from {conn.address}")
+        return packets
 
     async def write(self, conn: ConnHandle, packet: Packet, loop: _EventLoop):
-        """Write `data` to connection."""
-        data = packet.to_stream()
-        await self.conn.write(conn.sock, data, loop)
+        """Write packet to connection."""
+        for fragment in packet.fragments():
+            await self.write_frame(conn, Frame(fragment), loop)
         logger.debug(f"sent {packet!r} to {conn.address}")
 
+    async def write_frame(self, conn: ConnHandle, frame: Frame, loop: _EventLoop):
+        """Write already encoded packet to connection. It is called once per
+        recipient on broadcast, so it does not log."""
+        await self.write_frames(conn, (frame,), loop)
+
+    async def write_frames(self,
+        conn: ConnHandle,
+        frames: Iterable[Frame],
+        loop: _EventLoop,
+    ):
+        """Write already encoded packets to connection with a single vectored write.
+        If connection has negotiated compression the packets are compressed for this
+        connection only."""
+        buffers: List[bytes | memoryview] = []
+        for frame in frames:
+            if conn.compressor is not None:
+                packet = conn.compressor.compress(frame.packet)
+                if packet is not frame.packet:
+                    frame = Frame(packet)
+            buffers.extend(frame.buffers)
+        await self.conn.writev(conn.sock, buffers, loop)
+
     def close(self, conn: ConnHandle):
         """Close the connection."""
         logger.info(f"closed connection with {conn.address}")
         conn.sock.close()
 
-    def start_server(self, host: str, port: int):
+    def start_server(self, host: str, port: int, backlog: int = 1024):
         """Start the server on given address."""
-        self.conn.start(host, port)
+        self.conn.start(host, port, backlog)
         logger.info(f"server running at {host}:{port}")
 
     def stop_server(self):
@@ -0,0 +1,257 @@
+"""
+This module provides the local message bus connecting the worker processes of a
+server (see `whisper.server.supervisor`). Workers connect to the hub run by the
+supervisor over a unix socket and the hub forwards their messages to the other
+workers, so broadcasts and presence reach clients connected to any worker.
+"""
+
+import os
+import json
+import struct
+import asyncio
+import logging
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, Set, Tuple
+
+from whisper.packet import Frame, Packet
+from whisper.packet.framer import Framer
+from whisper.packet.v1 import Reassembler
+
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("=BHI")
+"""message kind, metadata size and payload size"""
+
+
+class BusMessage(IntEnum):
+    """Kind of bus message."""
+
+    HELLO = 1
+    """worker connected to hub, first message of every worker, `rooms` holds the
+    sequence of the latest message of the rooms in its history"""
+
+    BROADCAST = 2
+    """packet to deliver to clients of other workers, `to` lists the usernames of
+    recipients or is `null` for all clients"""
+
+    PRESENCE = 3
+    """`username` connected to (or disconnected from) a worker, as per `online`"""
+
+    LOAD = 4
+    """load report of a worker for supervisor, not forwarded"""
+
+    ROOM = 5
+    """`message` posted to `room` for its members connected to any worker, the hub
+    numbers it with the next `seq` of room and forwards it to every worker, the
+    sender included"""
+
+
+def encode_message(
+    kind: BusMessage,
+    meta: Dict[str, Any],
+    payload: bytes = b"",
+) -> bytes:
+    """Encodes the message with json metadata and raw payload."""
+    data = json.dumps(meta, separators=(",", ":")).encode()
+    return _HEADER.pack(kind, len(data), len(payload)) + data + payload
+
+
+async def read_message(
+    reader: asyncio.StreamReader,
+) -> Tuple[BusMessage, Dict[str, Any], bytes]:
+    """Reads the next message. Raises `asyncio.IncompleteReadError` on end of
+    stream."""
+    kind, meta_size, payload_size = _HEADER.unpack(
+        await reader.readexactly(_HEADER.size))
+    meta = json.loads(await reader.readexactly(meta_size))
+    payload = await reader.readexactly(payload_size) if payload_size else b""
+    return BusMessage(kind), meta, payload
+
+
+def pack_packet(packet: Packet) -> bytes:
+    """Encodes the packet as payload of bus message, large packets are carried as
+    their fragments."""
+    return b"".join(
+        b"".join(Frame(fragment).buffers) for fragment in packet.fragments())
+
+
+def unpack_packet(payload: bytes) -> Packet:
+    """Decodes the packet from payload of bus message."""
+    framer = Framer()
+    reassembler = Reassembler()
+    framer.feed(payload)
+    while (packet := framer.next_packet()) is not None:
+        if (packet := reassembler.feed(packet)) is not None:
+            return packet
+    raise ValueError("incomplete packet in bus message")
+
+
+class BusHub:
+    """
+    Supervisor side of the bus. It forwards the messages of a worker to all the other
+    workers and tracks the presence of clients, so a worker (re)connecting to the hub
+    receives the clients connected to other workers and the clients of a crashed
+    worker are announced offline.
+
+    The hub owns the sequences of rooms, so a message posted to a room carries the
+    same sequence on every worker. Sequences continue from the latest message
+    stored by any worker (see `BusMessage.HELLO`).
+
+    Messages to a worker which is not reading are dropped once its buffer exceeds
+    `max_buffer` bytes, a stuck worker must not stall the others.
+    """
+
+    max_buffer: int = 16 * 1024 * 1024
+    """maximum bytes buffered for a single worker"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.server: asyncio.Server | None = None
+        self.writers: Dict[int, asyncio.StreamWriter] = {}
+        self.presence: Dict[str, Set[int]] = {}
+        """workers serving the username"""
+        self.loads: Dict[int, Dict[str, Any]] = {}
+        """latest load report of workers"""
+        self.seqs: Dict[str, int] = {}
+        """sequence of the latest message posted to each room"""
+        self.dropped = 0
+
+    async def start(self):
+        """Starts listening for workers on the unix socket."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self.serve, path=self.path)
+        logger.info(f"bus hub listening at {self.path}")
+
+    def close(self):
+        """Disconnects the workers and stops listening."""
+        if self.server is not None:
+            self.server.close()
+        for writer in list(self.writers.values()):
+            writer.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        logger.info("bus hub closed")
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves a worker connection."""
+        try:
+            kind, meta, _ = await read_message(reader)
+        except (asyncio.IncompleteReadError, ValueError):
+            writer.close()
+            return
+        if kind is not BusMessage.HELLO:
+            logger.warning(f"bus worker did not say hello: {kind!r}")
+            writer.close()
+            return
+
+        worker = meta["worker"]
+        for room, seq in meta.get("rooms", {}).items():
+            self.seqs[room] = max(self.seqs.get(room, 0), seq)
+        if (previous := self.writers.get(worker)) is not None:
+            previous.close()
+        self.writers[worker] = writer
+        logger.info(f"worker {worker} joined the bus")
+        for username, workers in self.presence.items():
+            for other in workers - {worker}:
+                writer.write(encode_message(BusMessage.PRESENCE, {
+                    "worker": other, "username": username, "online": True}))
+
+        try:
+            while True:
+                kind, meta, payload = await read_message(reader)
+                meta["worker"] = worker
+                if kind is BusMessage.LOAD:
+                    self.loads[worker] = meta
+                    continue
+                if kind is BusMessage.ROOM:
+                    room = meta["room"]
+                    seq = self.seqs[room] = self.seqs.get(room, 0) + 1
+                    meta["message"]["seq"] = seq
+                    self.forward(None, encode_message(kind, meta, payload))
+                    continue
+                if kind is BusMessage.PRESENCE:
+                    self.track(meta["username"], worker, meta["online"])
+                self.forward(worker, encode_message(kind, meta, payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as ex:
+            logger.warning(f"malformed bus message from worker {worker}: {ex}")
+        finally:
+            if self.writers.get(worker) is writer:
+                del self.writers[worker]
+                self.worker_left(worker)
+            writer.close()
+
+    def forward(self, worker: int | None, data: bytes):
+        """Writes the encoded message to all workers except the sender `worker`."""
+        for other, writer in list(self.writers.items()):
+            if other == worker or writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.dropped += 1
+                logger.warning(f"bus buffer of worker {other} is full, dropped message")
+                continue
+            writer.write(data)
+
+    def track(self, username: str, worker: int, online: bool):
+        """Tracks the workers serving the username."""
+        if online:
+            self.presence.setdefault(username, set()).add(worker)
+        elif (workers := self.presence.get(username)) is not None:
+            workers.discard(worker)
+            if not workers:
+                del self.presence[username]
+
+    def worker_left(self, worker: int):
+        """Announces the clients of the worker offline."""
+        logger.warning(f"worker {worker} left the bus")
+        self.loads.pop(worker, None)
+        for username in [name for name, ws in self.presence.items() if worker in ws]:
+            self.track(username, worker, False)
+            self.forward(worker, encode_message(BusMessage.PRESENCE, {
+                "worker": worker, "username": username, "online": False}))
+
+
+class BusClient:
+    """Worker side of the bus."""
+
+    def __init__(self, path: str, worker: int):
+        self.path = path
+        self.worker = worker
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self.writer is not None and not self.writer.is_closing()
+
+    async def connect(self, rooms: Dict[str, int] | None = None):
+        """Connects to the hub and introduces the worker along with the sequences
+        of the `rooms` in its history."""
+        self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+        self.publish(BusMessage.HELLO, {
+            "worker": self.worker, "pid": os.getpid(), "rooms": rooms or {}})
+        logger.info(f"worker {self.worker} connected to bus at {self.path}")
+
+    def publish(self, kind: BusMessage, meta: Dict[str, Any], payload: bytes = b""):
+        """Sends the message to hub. Messages are buffered by the transport, so it
+        does not wait for the hub."""
+        if self.writer is None or self.writer.is_closing():
+            logger.debug(f"bus not connected, dropped {kind!r}")
+            return
+        self.writer.write(encode_message(kind, meta, payload))
+
+    async def messages(self) -> AsyncIterator[Tuple[BusMessage, Dict[str, Any], bytes]]:
+        """Yields the messages forwarded by hub until it disconnects."""
+        try:
+            while True:
+                yield await read_message(self.reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            logger.warning(f"worker {self.worker} disconnected from bus")
+
+    def close(self):
+        """Disconnects from hub."""
+        if self.writer is not None:
+            self.writer.close()
@@ -5,6 +5,8 @@ This module provides server cli parser function.
 from argparse import ArgumentParser
 
 from whisper.cli import HostAction, PortAction
+from whisper.eventloop import LoopRegistery
+from whisper.settings import EVENT_LOOP
 
 
 def get_parser(program: str, description: str) -> ArgumentParser:
@@ -32,4 +34,175 @@ def get_parser(program: str, description: str) -> ArgumentParser:
         help="server port number",
     )
 
+    parser.add_argument(
+        "--transport",
+        choices=("socket", "protocol"),
+        required=False,
+        default="socket",
+        help="serve clients with a read task per socket or with asyncio protocols",
+    )
+
+    parser.add_argument(
+        "--compression-threshold",
+        metavar="BYTES",
+        type=int,
+        required=False,
+        default=512,
+        help="minimum payload size compressed for clients supporting compression",
+    )
+
+    parser.add_argument(
+        "--no-compression",
+        action="store_true",
+        help="never compress payloads",
+    )
+
+    parser.add_argument(
+        "--batch-window",
+        metavar="SECONDS",
+        type=float,
+        required=False,
+        default=0.001,
+        help="time to gather queued packets into a batch per connection",
+    )
+
+    parser.add_argument(
+        "--outbox-size",
+        metavar="FRAMES",
+        type=int,
+        required=False,
+        default=1024,
+        help="frames queued to a connection before it is closed as too slow",
+    )
+
+    parser.add_argument(
+        "--slow-consumer",
+        choices=("disconnect", "drop_oldest", "coalesce"),
+        required=False,
+        default="disconnect",
+        help="policy for a connection whose outbox is full",
+    )
+
+    parser.add_argument(
+        "--queue-size",
+        metavar="PACKETS",
+        type=int,
+        required=False,
+        default=10_000,
+        help="capacity of received and outgoing packet queues",
+    )
+
+    parser.add_argument(
+        "--handler-workers",
+        metavar="N",
+        type=int,
+        required=False,
+        default=4,
+        help="workers handling packets, packets of a connection stay in order",
+    )
+
+    parser.add_argument(
+        "--offload-workers",
+        metavar="N",
+        type=int,
+        required=False,
+        default=None,
+        help="threads running blocking work offloaded by handlers",
+    )
+
+    parser.add_argument(
+        "--process-workers",
+        metavar="N",
+        type=int,
+        required=False,
+        default=0,
+        help="processes running CPU bound work offloaded by handlers",
+    )
+
+    parser.add_argument(
+        "--backlog",
+        metavar="N",
+        type=int,
+        required=False,
+        default=1024,
+        help="connections waiting to be accepted, capped by the system",
+    )
+
+    parser.add_argument(
+        "--max-connections",
+        metavar="N",
+        type=int,
+        required=False,
+        default=None,
+        help="clients served at once, others are rejected",
+    )
+
+    parser.add_argument(
+        "--accept-rate",
+        metavar="PER_SECOND",
+        type=float,
+        required=False,
+        default=None,
+        help="connections admitted per second, others are rejected",
+    )
+
+    parser.add_argument(
+        "--event-loop",
+        choices=LoopRegistery.names(),
+        required=False,
+        default=EVENT_LOOP,
+        help="eventloop implementation, falls back to asyncio if not installed",
+    )
+
+    parser.add_argument(
+        "--loop-threads",
+        metavar="N",
+        type=int,
+        required=False,
+        default=1,
+        help="eventloop threads serving the connections of a server process",
+    )
+
+    parser.add_argument(
+        "--workers",
+        metavar="N",
+        type=int,
+        required=False,
+        default=0,
+        help="run N server processes sharing the port, restarted if they crash",
+    )
+
+    parser.add_argument(
+        "--bus-path",
+        metavar="PATH",
+        type=str,
+        required=False,
+        default=None,
+        help="unix socket connecting the worker processes",
+    )
+
+    parser.add_argument(
+        "--history-dir",
+        metavar="PATH",
+        type=str,
+        required=False,
+        default=None,
+        help="directory keeping the message history of rooms, defaults to no history",
+    )
+
+    parser.add_argument(
+        "--durability",
+        choices=("none", "batched", "per_message"),
+        required=False,
+        default="none",
+        help="when messages are synced to disk before they are acknowledged, "
+             "requires --history-dir",
+    )
+
+    parser.add_argument(
+        "--no-batching",
+        action="store_true",
+        help="write every packet in its own frame",
+    )
+
     return parser
@@ -3,15 +3,19 @@ This module provides a handler class to manage client connections and their data
 """
 
 import socket
-from typing import Dict, Any
+from typing import Dict, Any, Set
 
 from whisper.common import Address
+from whisper.packet.framer import Framer
+from whisper.packet.v1 import Compressor, Decompressor, Reassembler
+from whisper.server.outbox import Outbox
 
 
 class ConnHandle:
     """Client connection handler object."""
 
-    __slots__ = ("sock", "address", "data", "serve", "close")
+    __slots__ = ("sock", "address", "data", "serve", "close", "framer", "reassembler",
+                 "compressor", "decompressor", "outbox", "rooms")
 
     def __init__(self, sock: socket.socket, addr: Address, data: Dict[str, Any]):
         self.sock = sock
@@ -19,6 +23,13 @@ class ConnHandle:
         self.data = data
         self.serve = False
         self.close = False
+        self.framer = Framer()
+        self.reassembler = Reassembler()
+        self.compressor: Compressor | None = None
+        self.decompressor = Decompressor()
+        self.outbox: Outbox | None = None
+        self.rooms: Set[str] = set()
+        """names of the rooms joined by the client"""
 
     @property
     def username(self) -> str | None:
@@ -30,6 +41,26 @@ class ConnHandle:
         """Sets username of the client."""
         self.data["username"] = username
 
+    @property
+    def key(self) -> str | None:
+        """Provides the session key given to the client."""
+        return self.data.get("key", None)
+
+    @key.setter
+    def key(self, key: str):
+        """Sets session key of the client."""
+        self.data["key"] = key
+
+    @property
+    def codec(self) -> str:
+        """Provides the codec negotiated with the client."""
+        return self.data.get("codec", "json")
+
+    @codec.setter
+    def codec(self, codec: str):
+        """Sets the codec negotiated with the client."""
+        self.data["codec"] = codec
+
     @property
     def name(self) -> str:
         """Provides the name for connection."""
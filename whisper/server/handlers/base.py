@@ -16,7 +16,3 @@ class AbstractRequestHandler(AbstractPacketHandler[_P, Any]):
 
     def __call__(self, packet: _P, conn: ConnHandle, /, *args): # type: ignore[override]
         return super().__call__(packet, conn, *args)
-
-    @staticmethod
-    def unique_key() -> Any:
-        """Provide the unique key same as the packet handeled."""
@@ -7,16 +7,22 @@ from typing import Tuple, Type
 from .base import RequestV1Handler
 from .init_handler import InitV1Handler
 from .exit_handler import ExitV1Handler
+from .room_handler import RoomV1Handler
+from .message_handler import MessageV1Handler
 
 
 __all__ = (
     "RequestV1Handler",
     "InitV1Handler",
     "ExitV1Handler",
+    "RoomV1Handler",
+    "MessageV1Handler",
     "Handlers",
 )
 
 Handlers: Tuple[Type[RequestV1Handler], ...] = (
     InitV1Handler,
     ExitV1Handler,
+    RoomV1Handler,
+    MessageV1Handler,
 )
@@ -2,6 +2,7 @@
 This module provides exit packet-v1 request handler.
 """
 
+from whisper.handler import Convention
 from whisper.packet.v1 import PacketType, ExitReason, ExitV1Packet
 from whisper.server.connection import ConnHandle
 from .base import RequestV1Handler
@@ -9,6 +10,8 @@ from .base import RequestV1Handler
 
 class ExitV1Handler(RequestV1Handler):
 
+    convention = Convention.VALUE
+
     @staticmethod
     def packet_type() -> PacketType:
         return PacketType.EXIT
@@ -5,16 +5,22 @@ This module provides init packet-v1 request handler.
 import re
 import random
 import string
-from typing import Tuple
+from typing import Any, Dict, Iterable, Mapping, Tuple
 
-from whisper.packet.v1 import PacketType, InitV1Packet, Status
+from whisper.codec import CodecRegistery
+from whisper.handler import Convention
+from whisper.packet.v1 import COMPRESSION, Compressor, PacketType, InitV1Packet, Status
 from whisper.server.connection import ConnHandle
+from whisper.server.rooms import GLOBAL_ROOM, ROOM_NAME
 from .base import RequestV1Handler
+from .room_handler import RoomV1Handler
 
 
 class InitV1Handler(RequestV1Handler):
 
-    username_regex = re.compile("^[a-zA-Z0-9_@-]{3, 15}$")
+    convention = Convention.KEYWORDS
+
+    username_regex = re.compile("^[a-zA-Z0-9_@-]{3,15}$")
     username_error = {
         "pattern": "username must consist of alphanumeric characters and '_', '-', '@' symbols only",
         "length": "username should have length between 3 and 15",
@@ -23,6 +29,9 @@ class InitV1Handler(RequestV1Handler):
     charset = string.ascii_letters + string.digits
     keylen = 8
 
+    max_rooms = RoomV1Handler.max_rooms
+    """most rooms rejoined by a reconnecting client, the global room included"""
+
     @staticmethod
     def packet_type() -> PacketType:
         return InitV1Packet.packet_type()
@@ -31,22 +40,60 @@ class InitV1Handler(RequestV1Handler):
     def unique_key():
         return InitV1Packet.unique_key()
 
-    def handle(self, conn: ConnHandle, *args, username: str, **kwargs):
+    def handle(self,
+        conn: ConnHandle,
+        *args,
+        username: str,
+        codecs: Iterable[str] = (),
+        compression: Iterable[str] = (),
+        rooms: Mapping[str, int | None] | None = None,
+        **kwargs,
+    ):
         username_or_msg, success = self.validate_username(username)
         if not success:
             packet = InitV1Packet.response(
                 status=Status.VALIDATION_ERROR,
+                username=username,
                 message=username_or_msg,
                 error="validation",
                 field="username")
             return [(packet, [conn])]
 
         conn.serve = True
+        self.app.identify(conn, username_or_msg, self.create_unique_key())
+        conn.codec = CodecRegistery.negotiate(codecs).name
+        threshold = self.app.compression_threshold
+        if COMPRESSION in compression and threshold is not None:
+            conn.compressor = Compressor(threshold)
+        synced = self.sync_rooms(rooms)
+        replay = []
+        for room, since in synced.items():
+            if self.app.rooms.join(room, conn):
+                replay.extend(self.app.replay(room, conn, since))
         packet = InitV1Packet.response(
             status=Status.SUCCESS,
             username=username_or_msg,
-            key=self.create_unique_key())
-        return [(packet, [conn])]
+            key=conn.key,
+            codec=conn.codec,
+            compression=COMPRESSION if conn.compressor else None,
+            rooms={room: self.app.room_seq(room) for room in synced})
+        return [(packet, [conn]), *replay]
+
+    def sync_rooms(self, rooms: Any) -> Dict[str, int | None]:
+        """Provides the rooms joined by client along with the sequence of the latest
+        message it has seen in each, for a reconnecting client to receive only the
+        messages it missed. The global room comes first, invalid rooms and the ones
+        over `max_rooms` are ignored."""
+        synced: Dict[str, int | None] = {GLOBAL_ROOM: None}
+        if not isinstance(rooms, Mapping):
+            return synced
+        for room, seq in rooms.items():
+            if len(synced) >= self.max_rooms:
+                break
+            if (isinstance(room, str) and ROOM_NAME.fullmatch(room)
+                and isinstance(seq, int | None)):
+                synced[room] = seq
+        return synced
 
     def validate_username(self, username: str) -> Tuple[str, bool]:
         """If success provides username otherwise error message."""
@@ -59,4 +106,7 @@ class InitV1Handler(RequestV1Handler):
 
     def create_unique_key(self) -> str:
         """Provide fixed length unique key."""
-        return "".join(random.choice(self.charset) for _ in range(self.keylen))
+        while True:
+            key = "".join(random.choice(self.charset) for _ in range(self.keylen))
+            if self.app.index.by_key(key) is None:
+                return key
@@ -0,0 +1,58 @@
+"""
+This module provides message packet-v1 request handler.
+"""
+
+from whisper.handler import Convention
+from whisper.packet.v1 import MessageV1Packet, PacketType, Status
+from whisper.server.connection import ConnHandle
+from whisper.server.rooms import GLOBAL_ROOM
+from .base import RequestV1Handler
+
+
+class MessageV1Handler(RequestV1Handler):
+    """Submits the message to be fanned out to the members of its room, the sender
+    included (see `Server.submit_message`)."""
+
+    convention = Convention.KEYWORDS
+
+    max_length = 4096
+    """maximum characters of message text"""
+
+    message_error = {
+        "room": "message can only be posted to a joined room",
+        "text": f"message text must have 1 to {max_length} characters",
+    }
+
+    @staticmethod
+    def packet_type() -> PacketType:
+        return MessageV1Packet.packet_type()
+
+    @staticmethod
+    def unique_key():
+        return MessageV1Packet.unique_key()
+
+    async def handle(self,
+        conn: ConnHandle,
+        *args,
+        room: str = GLOBAL_ROOM,
+        text: str = "",
+        **kwargs,
+    ):
+        if not self.app.rooms.is_member(room, conn):
+            return self.error(conn, room, "room")
+        if not isinstance(text, str) or not 0 < len(text) <= self.max_length:
+            return self.error(conn, room, "text")
+
+        message = {"room": room, "sender": conn.username, "text": text}
+        await self.app.submit_message(room, message)
+
+    def error(self, conn: ConnHandle, room: str, field: str):
+        """Provides the validation error response."""
+        packet = MessageV1Packet.response(
+            status=Status.VALIDATION_ERROR,
+            codec=conn.codec,
+            room=room,
+            message=self.message_error[field],
+            error="validation",
+            field=field)
+        return [(packet, [conn])]
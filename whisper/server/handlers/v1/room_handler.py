@@ -0,0 +1,79 @@
+"""
+This module provides room packet-v1 request handler.
+"""
+
+from whisper.handler import Convention
+from whisper.packet.v1 import PacketType, RoomAction, RoomV1Packet, Status
+from whisper.server.connection import ConnHandle
+from whisper.server.rooms import ROOM_NAME
+from .base import RequestV1Handler
+
+
+class RoomV1Handler(RequestV1Handler):
+
+    convention = Convention.KEYWORDS
+
+    max_rooms = 64
+    """most rooms joined by a client at once, the global room included"""
+
+    room_regex = ROOM_NAME
+    room_error = {
+        "init": "connection must be initialised before joining rooms",
+        "pattern": "room name must be 1 to 32 alphanumeric characters and '_', '-', '@' symbols",
+        "action": "action must be one of: " + ", ".join(RoomAction),
+        "since": "since must be the sequence of the latest message seen",
+        "limit": f"cannot join more than {max_rooms} rooms",
+    }
+
+    @staticmethod
+    def packet_type() -> PacketType:
+        return RoomV1Packet.packet_type()
+
+    @staticmethod
+    def unique_key():
+        return RoomV1Packet.unique_key()
+
+    def handle(self,
+        conn: ConnHandle,
+        *args,
+        action: str,
+        room: str,
+        since: int | None = None,
+        **kwargs,
+    ):
+        if not conn.serve:
+            return self.error(conn, room, "init", "username")
+        if not isinstance(room, str) or not self.room_regex.fullmatch(room):
+            return self.error(conn, room, "pattern", "room")
+
+        rooms = self.app.rooms
+        replay = []
+        if action == RoomAction.JOIN:
+            if not isinstance(since, int | None):
+                return self.error(conn, room, "since", "since")
+            if room not in conn.rooms and len(conn.rooms) >= self.max_rooms:
+                return self.error(conn, room, "limit", "room")
+            if rooms.join(room, conn) or since is not None:
+                replay = self.app.replay(room, conn, since)
+        elif action == RoomAction.LEAVE:
+            rooms.leave(room, conn)
+        else:
+            return self.error(conn, room, "action", "action")
+        joined = rooms.get(room)
+        packet = RoomV1Packet.response(
+            status=Status.SUCCESS,
+            action=action,
+            room=room,
+            members=len(joined) if joined is not None else 0,
+            seq=self.app.room_seq(room))
+        return [(packet, [conn]), *replay]
+
+    def error(self, conn: ConnHandle, room: str, reason: str, field: str):
+        """Provides the validation error response."""
+        packet = RoomV1Packet.response(
+            status=Status.VALIDATION_ERROR,
+            room=room,
+            message=self.room_error[reason],
+            error="validation",
+            field=field)
+        return [(packet, [conn])]
@@ -0,0 +1,406 @@
+"""
+This module provides the message history of rooms, an append-only log of segment
+files per room. Records are the encoded frames of the messages, so a range of
+history is replayed by writing a slice of the memory mapped segment as it is.
+"""
+
+import os
+import mmap
+import logging
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import BinaryIO, Callable, Deque, Dict, List
+
+from whisper.packet.v1 import PacketV1
+
+
+logger = logging.getLogger(__name__)
+
+class Segment:
+    """
+    Segment file of a log holding the records from sequence `base` on. The file is
+    created with the fixed segment size and memory mapped, records are copied in one
+    after another. The index file holds the end offset of every record, so records
+    are located without parsing the segment.
+
+    Only the latest segment of a log is kept open for appending, the others are
+    sealed: their files are closed and they are mapped read-only while they are
+    read, so the open files do not grow with the history.
+    """
+
+    __slots__ = ("base", "path", "size", "map", "offsets", "index", "lock")
+
+    def __init__(self, directory: Path, base: int, size: int, sealed: bool = False):
+        self.base = base
+        self.path = directory / f"{base:020d}.log"
+        self.size = size
+        self.offsets = array("I")
+        """end offset of every record"""
+        self.map: mmap.mmap | None = None
+        """writable map of the segment being appended"""
+        self.index: BinaryIO | None = None
+        self.lock = threading.Lock()
+        """held while the files are written to disk or closed in a worker thread"""
+
+        if not sealed:
+            with open(self.path, "a+b") as file:
+                if os.fstat(file.fileno()).st_size < size:
+                    file.truncate(size)
+                self.map = mmap.mmap(file.fileno(), size)
+
+        index_path = self.path.with_suffix(".idx")
+        if index_path.exists():
+            data = index_path.read_bytes()
+            usable = len(data) - len(data) % self.offsets.itemsize
+            self.offsets.frombytes(data[:usable])
+            self.recover()
+        if not sealed:
+            self.index = open(index_path, "ab")
+
+    @property
+    def sealed(self) -> bool:
+        return self.map is None
+
+    def mapping(self) -> mmap.mmap:
+        """Provides the map of segment, a sealed segment is mapped read-only for as
+        long as the views of its records are in use."""
+        if (map := self.map) is not None:
+            return map
+        with open(self.path, "rb") as file:
+            return mmap.mmap(file.fileno(), self.size, access=mmap.ACCESS_READ)
+
+    def recover(self):
+        """Drops the index entries of records not completely written. Records are
+        written before their index entries, so only the latest can be torn."""
+        dropped = 0
+        with memoryview(self.mapping()) as view:
+            while offsets := self.offsets:
+                start = offsets[-2] if len(offsets) > 1 else 0
+                end = offsets[-1]
+                if start < end <= self.size and (
+                    PacketV1.frame_size(view[start:end]) == end - start
+                ):
+                    break
+                offsets.pop()
+                dropped += 1
+        if dropped:
+            logger.warning(f"dropped {dropped} incomplete records of {self.path}")
+            self.path.with_suffix(".idx").write_bytes(self.offsets.tobytes())
+
+    @property
+    def count(self) -> int:
+        """Records in the segment."""
+        return len(self.offsets)
+
+    @property
+    def end(self) -> int:
+        """Bytes taken by the records."""
+        return self.offsets[-1] if self.offsets else 0
+
+    def append(self, record: bytes) -> bool:
+        """Copies the record in the segment. Provides `False` if it is full."""
+        start = self.end
+        end = start + len(record)
+        if end > self.size:
+            return False
+        self.map[start:end] = record # type: ignore[index]
+        self.offsets.append(end)
+        self.index.write(self.offsets[-1:].tobytes()) # type: ignore[union-attr]
+        return True
+
+    def chunks(self, first: int, last: int, max_size: int) -> List[memoryview]:
+        """Views of the records from `first` to `last` (positions in the segment),
+        each view holds whole records and at most `max_size` bytes unless a single
+        record is larger."""
+        offsets = self.offsets
+        views = []
+        with memoryview(self.mapping()) as view:
+            index = first
+            while index <= last:
+                start = offsets[index - 1] if index else 0
+                stop = bisect_right(offsets, start + max_size, index, last + 1) - 1
+                stop = max(stop, index)
+                views.append(view[start:offsets[stop]])
+                index = stop + 1
+        return views
+
+    def truncate(self, count: int):
+        """Drops the records after the first `count`, the segment must not be
+        sealed."""
+        del self.offsets[count:]
+        index: BinaryIO = self.index # type: ignore[assignment]
+        index.flush()
+        os.ftruncate(index.fileno(), len(self.offsets) * self.offsets.itemsize)
+
+    def remove(self):
+        """Deletes the files of closed segment."""
+        self.path.unlink(missing_ok=True)
+        self.path.with_suffix(".idx").unlink(missing_ok=True)
+
+    def flush(self):
+        """Writes the records and the index to disk. It blocks."""
+        with self.lock:
+            if (map := self.map) is not None and (index := self.index) is not None:
+                self.write(map, index)
+
+    def seal(self) -> Callable[[], None]:
+        """Stops appending to the segment, its records are read through read-only
+        maps from now on. Provides the call writing the records to disk and closing
+        the files, it blocks, run it in a worker pool."""
+        map, index = self.map, self.index
+        self.map = self.index = None
+        # index is complete in the file for the segment opened again meanwhile
+        index.flush() # type: ignore[union-attr]
+
+        def close():
+            with self.lock:
+                self.write(map, index) # type: ignore[arg-type]
+                self.release(map, index) # type: ignore[arg-type]
+        return close
+
+    def close(self):
+        with self.lock:
+            if (map := self.map) is not None and (index := self.index) is not None:
+                self.map = self.index = None
+                self.release(map, index)
+
+    @staticmethod
+    def write(map: mmap.mmap, index: BinaryIO):
+        map.flush()
+        index.flush()
+        os.fsync(index.fileno())
+
+    @staticmethod
+    def release(map: mmap.mmap, index: BinaryIO):
+        index.close()
+        try:
+            map.close()
+        except BufferError:
+            # views of replayed records are still queued, the mapping is released
+            # once they are written
+            pass
+
+
+class HistoryLog:
+    """
+    Append-only log of the messages of a room, stored in `segment_size` bytes
+    segment files under the directory. Records are numbered by their sequence
+    starting from 1.
+
+    A segment filled up is sealed and the calls writing it to disk are queued in
+    `sealed` (see `History.close_sealed`), so they do not block appending. Without
+    the queue it is written to disk right away.
+    """
+
+    def __init__(self,
+        directory: Path,
+        segment_size: int,
+        sealed: Deque[Callable[[], None]] | None = None,
+    ):
+        if segment_size < PacketV1.header_size + 0xFFFF:
+            raise ValueError(f"segment size {segment_size} can not fit a packet")
+        self.directory = directory
+        self.segment_size = segment_size
+        self.sealed = sealed
+        self.segments: List[Segment] = []
+        self.bases = array("Q")
+        """first sequence of every segment, for looking up the segment of record"""
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = sorted(directory.glob("*.log"))
+        for index, path in enumerate(paths):
+            self.add_segment(int(path.stem), sealed=index < len(paths) - 1)
+        if not self.segments:
+            self.add_segment(1)
+
+    def add_segment(self, base: int, sealed: bool = False) -> Segment:
+        segment = Segment(self.directory, base, self.segment_size, sealed)
+        self.segments.append(segment)
+        self.bases.append(base)
+        return segment
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence of the oldest record."""
+        return self.segments[0].base
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence of the latest record, 0 if the log is empty."""
+        segment = self.segments[-1]
+        return segment.base + segment.count - 1
+
+    def append(self, record: bytes, seq: int | None = None) -> int:
+        """Appends the record and provides its sequence. A record numbered elsewhere
+        is stored under its `seq`: the missing records before it are skipped over
+        with a new segment and a record stored already is dropped."""
+        last = self.last_seq
+        if seq is not None and seq != last + 1:
+            if seq <= last:
+                logger.warning(f"record {seq} is in {self.directory} already")
+                return seq
+            logger.warning(
+                f"history {self.directory} misses records {last + 1} to {seq - 1}")
+            self.roll(seq)
+        if not self.segments[-1].append(record):
+            self.roll(self.last_seq + 1)
+            if not self.segments[-1].append(record):
+                raise ValueError(f"record of {len(record)} bytes does not fit segment")
+        return self.last_seq
+
+    def roll(self, base: int):
+        """Seals the latest segment and starts the next one from sequence `base`, an
+        empty latest segment is replaced."""
+        segment = self.segments[-1]
+        if not segment.count:
+            self.segments.pop()
+            self.bases.pop()
+            segment.close()
+            segment.remove()
+        else:
+            self.seal()
+        self.add_segment(base)
+
+    def seal(self):
+        """Seals the latest segment, the log is appended only to a segment added
+        afterwards. The segment is written to disk right away or queued in
+        `sealed`."""
+        close = self.segments[-1].seal()
+        if self.sealed is None:
+            close()
+        else:
+            self.sealed.append(close)
+
+    def truncate(self, seq: int):
+        """Drops the records after sequence `seq`, the latest segment left is opened
+        for appending again."""
+        seq = max(seq, self.first_seq - 1)
+        while len(self.segments) > 1 and self.segments[-1].base > seq:
+            segment = self.segments.pop()
+            self.bases.pop()
+            segment.close()
+            segment.remove()
+        segment = self.segments[-1]
+        if segment.sealed:
+            segment = self.segments[-1] = Segment(
+                self.directory, segment.base, self.segment_size)
+        segment.truncate(seq - segment.base + 1)
+        logger.info(f"truncated history of {self.directory.name} to {self.last_seq}")
+
+    def read(self,
+        first: int,
+        last: int | None = None,
+        max_size: int = PacketV1.fragment_size,
+    ) -> List[memoryview]:
+        """Views of the records from sequence `first` to `last` (defaults to the
+        latest), each view holds whole records and at most `max_size` bytes."""
+        first = max(first, self.first_seq)
+        last = self.last_seq if last is None else min(last, self.last_seq)
+        views: List[memoryview] = []
+        if first > last:
+            return views
+        index = bisect_right(self.bases, first) - 1
+        for segment in self.segments[index:]:
+            if segment.base > last:
+                break
+            if not segment.count:
+                continue
+            views.extend(segment.chunks(
+                max(first, segment.base) - segment.base,
+                min(last, segment.base + segment.count - 1) - segment.base,
+                max_size))
+        return views
+
+    def last(self, count: int, max_size: int = PacketV1.fragment_size):
+        """Views of the latest `count` records."""
+        return self.read(self.last_seq - count + 1, max_size=max_size)
+
+    def since(self, seq: int, max_size: int = PacketV1.fragment_size):
+        """Views of the records after sequence `seq`."""
+        return self.read(seq + 1, max_size=max_size)
+
+    def flush(self):
+        self.segments[-1].flush()
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+
+
+class History:
+    """
+    Message history of the rooms, a log per room under the directory. At most
+    `max_open` logs are kept open, as each holds a segment map and its index file;
+    the least recently used log is sealed and closed, it is opened again from disk
+    once used.
+    """
+
+    def __init__(self,
+        directory: str | Path,
+        segment_size: int = 16 * 1024 * 1024,
+        max_open: int = 256,
+    ):
+        self.directory = Path(directory)
+        self.segment_size = segment_size
+        self.max_open = max_open
+        self.logs: OrderedDict[str, HistoryLog] = OrderedDict()
+        """open logs, least recently used first"""
+        self.sealed: Deque[Callable[[], None]] = deque()
+        """calls writing the segments filled up to disk, see `close_sealed`"""
+        self.sealing = threading.Lock()
+
+    def log(self, room: str, create: bool = True) -> HistoryLog | None:
+        """Provides the log of room, opened on first use. A log not stored yet is
+        created only if `create` is set."""
+        if (log := self.logs.get(room)) is not None:
+            self.logs.move_to_end(room)
+            return log
+        if not create and not (self.directory / room).is_dir():
+            return None
+        log = self.logs[room] = HistoryLog(
+            self.directory / room, self.segment_size, self.sealed)
+        logger.info(f"opened history of {room} with {log.last_seq} messages")
+        while len(self.logs) > self.max_open:
+            idle, idle_log = self.logs.popitem(last=False)
+            idle_log.seal()
+            logger.debug(f"closed idle history of {idle}")
+        return log
+
+    def append(self, room: str, record: bytes, seq: int | None = None) -> int:
+        """Appends the encoded message to the history of room."""
+        return self.log(room).append(record, seq) # type: ignore[union-attr]
+
+    def heads(self) -> Dict[str, int]:
+        """Provides the sequence of the latest message of every room stored, from
+        the index files of the logs not opened."""
+        heads = {}
+        for path in self.directory.glob("*/"):
+            if (log := self.logs.get(path.name)) is not None:
+                heads[path.name] = log.last_seq
+            elif indexes := sorted(path.glob("*.idx")):
+                base = int(indexes[-1].stem)
+                count = indexes[-1].stat().st_size // array("I").itemsize
+                heads[path.name] = base + count - 1
+        return heads
+
+    def close_sealed(self):
+        """Writes the segments filled up to disk and closes their files. It blocks,
+        run it in a worker pool."""
+        with self.sealing:
+            while self.sealed:
+                self.sealed.popleft()()
+
+    def flush(self):
+        """Writes the history to disk. It blocks, run it in a worker pool. The logs
+        closed meanwhile are written by `close_sealed` afterwards."""
+        for log in list(self.logs.values()):
+            log.flush()
+        self.close_sealed()
+
+    def close(self):
+        self.close_sealed()
+        for log in self.logs.values():
+            log.close()
+        self.logs.clear()
@@ -0,0 +1,63 @@
+"""
+This module provides the indexes of served clients by their username and session key.
+"""
+
+import logging
+from typing import Dict, Tuple
+
+from whisper.server.connection import ConnHandle
+
+
+logger = logging.getLogger(__name__)
+
+class ClientIndex:
+    """
+    Served clients indexed by username and by session key, lookups do not scan the
+    connections. A user may be connected from many devices, so a username maps to
+    all of its connections in order of connecting. Clients are added once they are
+    initialised and removed when their connection is closed (see `Server.identify`
+    and `Server.forget`). It is not thread safe, use it from the main eventloop of
+    server only.
+    """
+
+    def __init__(self):
+        self.usernames: Dict[str, Dict[ConnHandle, None]] = {}
+        """connections of each username"""
+        self.keys: Dict[str, ConnHandle] = {}
+        """connection of each session key"""
+
+    def add(self, conn: ConnHandle):
+        """Indexes the connection by its username and session key."""
+        if conn.username is not None:
+            self.usernames.setdefault(conn.username, {})[conn] = None
+        if conn.key is not None:
+            self.keys[conn.key] = conn
+
+    def remove(self, conn: ConnHandle) -> bool:
+        """Removes the connection from the indexes, provides `False` if it was not
+        indexed."""
+        removed = False
+        name = conn.username
+        if name is not None and (conns := self.usernames.get(name)) is not None:
+            if conns.pop(conn, False) is None:
+                removed = True
+            if not conns:
+                del self.usernames[name]
+        if conn.key is not None and self.keys.get(conn.key) is conn:
+            del self.keys[conn.key]
+            removed = True
+        return removed
+
+    def by_username(self, username: str) -> Tuple[ConnHandle, ...]:
+        """Provides the connections of the user."""
+        return tuple(self.usernames.get(username, ()))
+
+    def by_key(self, key: str) -> ConnHandle | None:
+        """Provides the connection with the session key."""
+        return self.keys.get(key)
+
+    def is_online(self, username: str) -> bool:
+        return username in self.usernames
+
+    def __len__(self) -> int:
+        return len(self.usernames)
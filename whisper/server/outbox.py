@@ -0,0 +1,135 @@
+"""
+This module provides the outbox of frames waiting to be written to a connection.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from enum import StrEnum, auto
+from typing import Deque, Dict, List
+
+from whisper.packet import Frame
+from whisper.packet.v1 import BatchV1Packet
+
+
+logger = logging.getLogger(__name__)
+
+class SlowConsumerPolicy(StrEnum):
+    """What to do when outbox of a connection is full."""
+
+    DISCONNECT = auto()
+    """close the connection"""
+
+    DROP_OLDEST = auto()
+    """drop the oldest frame not carrying a critical packet"""
+
+    COALESCE = auto()
+    """merge the queued frames into batches"""
+
+
+class Outbox:
+    """
+    Bounded queue of frames (or fragment frames of a large packet) waiting to be
+    written to a connection. When it is full the slow consumer policy decides whether
+    room can be made for more; if not the connection must be closed. Frames are kept
+    in a deque of its own, so the policies can drop or merge queued frames.
+    """
+
+    def __init__(self,
+        maxsize: int,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.DISCONNECT,
+        name: str = "outbox",
+    ):
+        self.maxsize = maxsize
+        self.policy = policy
+        self.name = name
+        self.items: Deque[Frame | List[Frame]] = deque()
+        self.waiter: asyncio.Future | None = None
+        """future of the writer waiting for frames"""
+        self.dropped = 0
+        """frames dropped so far"""
+        self.peak = 0
+        """highest depth reached since last `stats`"""
+
+    def qsize(self) -> int:
+        return len(self.items)
+
+    def empty(self) -> bool:
+        return not self.items
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= len(self.items)
+
+    def offer(self, item: Frame | List[Frame]) -> bool:
+        """Puts the item, applying the policy if outbox is full. Provides `False` if
+        the connection is not keeping up and must be closed."""
+        if self.full():
+            if self.policy is SlowConsumerPolicy.DROP_OLDEST:
+                made_room = self.drop_oldest()
+            elif self.policy is SlowConsumerPolicy.COALESCE:
+                made_room = self.coalesce()
+            else:
+                made_room = False
+            if not made_room:
+                return False
+        self.items.append(item)
+        if len(self.items) > self.peak:
+            self.peak = len(self.items)
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+        return True
+
+    async def get(self) -> Frame | List[Frame]:
+        """Provides the oldest item, waiting for one if outbox is empty."""
+        while not self.items:
+            self.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+        return self.items.popleft()
+
+    def get_nowait(self) -> Frame | List[Frame]:
+        if not self.items:
+            raise asyncio.QueueEmpty
+        return self.items.popleft()
+
+    def drop_oldest(self) -> bool:
+        """Drops the oldest frame without critical packet. Provides `False` if there
+        is none."""
+        for index, item in enumerate(self.items):
+            if isinstance(item, Frame) and not item.packet.is_critical():
+                del self.items[index]
+                self.dropped += 1
+                logger.debug(f"dropped {item!r} from {self.name}")
+                return True
+        return False
+
+    def coalesce(self) -> bool:
+        """Merges the consecutive queued frames into batch frames, fragment frames are
+        kept as they are. Provides `False` if it did not make room."""
+        items: List[Frame | List[Frame]] = []
+        frames: List[Frame] = []
+        for item in self.items:
+            if not isinstance(item, Frame):
+                items.extend(BatchV1Packet.batches(frames))
+                items.append(item)
+                frames = []
+            elif isinstance(item.packet, BatchV1Packet):
+                frames.extend(map(Frame, item.packet.unpack()))
+            else:
+                frames.append(item)
+        items.extend(BatchV1Packet.batches(frames))
+
+        merged = len(self.items) - len(items)
+        if merged <= 0:
+            return False
+        self.items = deque(items)
+        logger.debug(f"coalesced {merged} frames in {self.name}")
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Provides current and peak depth, peak is reset afterwards."""
+        stats = {"depth": len(self.items), "peak": self.peak, "capacity": self.maxsize}
+        self.peak = len(self.items)
+        return stats
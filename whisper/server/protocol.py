@@ -0,0 +1,161 @@
+"""
+This module provides `asyncio.Protocol` based connection classes for server.
+"""
+
+import socket
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+from whisper.packet import Packet
+from whisper.server.connection import ConnHandle
+from whisper.server.tcp import TcpServer
+from whisper.typing import (
+    Buffers as _Buffers,
+    EventLoop as _EventLoop,
+    ProtocolServer as _ProtocolServer,
+)
+
+
+logger = logging.getLogger(__name__)
+
+class PacketProtocol(asyncio.Protocol):
+    """
+    Protocol serving a single client connection. Received bytes are fed to the
+    connection framer straight from `data_received` and the decoded packets are handed
+    over to the server, so no task waits on the socket for reads.
+
+    Writes go through the transport buffer. When the buffer crosses its high water
+    mark the transport pauses the protocol and writers wait in `drain` until it is
+    resumed.
+    """
+
+    def __init__(self, server: _ProtocolServer):
+        self.server = server
+        self.transport: asyncio.Transport | None = None
+        self.conn: ConnHandle | None = None
+        self.paused = False
+        self.drain_waiters: Deque[asyncio.Future] = deque()
+        self.pending: List[Packet] = []
+        """decoded packets waiting for room in server recvq"""
+
+    def connection_made(self, transport: asyncio.Transport): # type: ignore[override]
+        self.transport = transport
+        sock = transport.get_extra_info("socket")
+        self.conn = ConnHandle(sock, transport.get_extra_info("peername"), {})
+        self.server.connection_made(self.conn, self)
+
+    def data_received(self, data: bytes):
+        conn = self.conn
+        if conn.close:
+            self.transport.close()
+            return
+
+        conn.framer.feed(data)
+        packets: List[Packet] = []
+        try:
+            while (packet := conn.framer.next_packet()) is not None:
+                packet = conn.reassembler.feed(conn.decompressor.decompress(packet))
+                if packet is not None:
+                    packets.extend(packet.unpack())
+        except ValueError as ex:
+            logger.warning(f"malformed stream from {conn.address}: {ex}")
+            self.transport.close()
+            return
+        if packets:
+            self.server.packets_received(conn, packets)
+
+    def eof_received(self) -> bool:
+        logger.info(f"{self.conn.address} diconnected")
+        return False
+
+    def connection_lost(self, exc: Exception | None):
+        self.paused = False
+        while self.drain_waiters:
+            waiter = self.drain_waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(ConnectionResetError("connection lost"))
+        self.server.connection_lost(self.conn, exc)
+
+    def pause_writing(self):
+        self.paused = True
+        logger.debug(f"writing paused for {self.conn.address}")
+
+    def resume_writing(self):
+        self.paused = False
+        while self.drain_waiters:
+            waiter = self.drain_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+        logger.debug(f"writing resumed for {self.conn.address}")
+
+    async def drain(self):
+        """Waits until the transport buffer drops below its low water mark."""
+        if self.transport.is_closing():
+            raise ConnectionResetError("connection closing")
+        if not self.paused:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.drain_waiters.append(waiter)
+        await waiter
+
+    async def write(self, data: bytes):
+        """Write `data` to the transport."""
+        self.transport.write(data)
+        await self.drain()
+
+    async def writev(self, buffers: _Buffers):
+        """Write `buffers` to the transport in order."""
+        self.transport.writelines(buffers)
+        await self.drain()
+
+    def close(self):
+        """Close the transport, buffered data is flushed first."""
+        self.transport.close()
+
+
+class ProtocolTcpServer(TcpServer):
+    """
+    A TCP server connection serving clients with `PacketProtocol` through
+    `loop.create_server`. Connections are accepted by `serve` instead of `accept` and
+    read by their protocol, so `accept` and `read` are not supported. Writes are
+    routed to the protocol of the socket.
+    """
+
+    def __init__(self, reuse_port: bool = False):
+        super().__init__(reuse_port)
+        self.server: asyncio.Server | None = None
+        self.protocols: Dict[Any, PacketProtocol] = {}
+        """protocol of the connected sockets"""
+
+    async def serve(self, loop: _EventLoop, server: _ProtocolServer):
+        """Serves connections on the listening socket until cancelled."""
+        self.server = await loop.create_server( # type: ignore
+            lambda: PacketProtocol(server), sock=self.sock, backlog=self.backlog)
+        await self.server.serve_forever()
+
+    def stop(self):
+        """Stop the server."""
+        if self.server is not None:
+            self.server.close()
+        for protocol in list(self.protocols.values()):
+            protocol.close()
+        super().stop()
+
+    async def accept(self, loop: _EventLoop):
+        raise NotImplementedError("connections are accepted by serve")
+
+    async def accept_many(self, loop: _EventLoop, limit: int):
+        raise NotImplementedError("connections are accepted by serve")
+
+    async def read(self, sock: socket.socket, n: int, loop: _EventLoop) -> bytes:
+        raise NotImplementedError("connections are read by their protocol")
+
+    async def write(self, sock: socket.socket, data: bytes, loop: _EventLoop):
+        """Write `data` to the socket."""
+        await self.protocols[sock].write(data)
+
+    async def writev(self, sock: socket.socket, buffers: _Buffers, loop: _EventLoop):
+        """Write `buffers` to the socket in order."""
+        await self.protocols[sock].writev(buffers)
@@ -0,0 +1,120 @@
+"""
+This module provides the rooms clients join and the index from room to its members
+used to fan out the messages posted to a room.
+"""
+
+import re
+import logging
+from typing import Dict, List, Tuple
+
+from whisper.server.connection import ConnHandle
+
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_ROOM = "global"
+"""room every client joins once it is served"""
+
+ROOM_NAME = re.compile("^[a-zA-Z0-9_@-]{1,32}$")
+"""valid room names, they are used as directory names of history"""
+
+
+class Room:
+    """
+    Members of a room in order of joining. Joining and leaving are O(1). The members
+    are grouped by their codec on the first fanout after a change and the groups are
+    shared by the fanouts until the next change, so a message is encoded once per
+    codec and the same frame is queued to every member of the group.
+    """
+
+    __slots__ = ("name", "members", "_groups")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.members: Dict[ConnHandle, None] = {}
+        self._groups: Dict[str, Tuple[ConnHandle, ...]] | None = None
+
+    def add(self, conn: ConnHandle) -> bool:
+        """Adds the member, provides `False` if it is already a member."""
+        if conn in self.members:
+            return False
+        self.members[conn] = None
+        self._groups = None
+        return True
+
+    def discard(self, conn: ConnHandle) -> bool:
+        """Removes the member, provides `False` if it is not a member."""
+        if conn not in self.members:
+            return False
+        del self.members[conn]
+        self._groups = None
+        return True
+
+    def groups(self) -> Dict[str, Tuple[ConnHandle, ...]]:
+        """Provides the members grouped by their codec. Groups are immutable, so they
+        can be queued while members keep joining and leaving."""
+        if self._groups is None:
+            groups: Dict[str, List[ConnHandle]] = {}
+            for conn in self.members:
+                groups.setdefault(conn.codec, []).append(conn)
+            self._groups = {codec: tuple(conns) for codec, conns in groups.items()}
+        return self._groups
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, conn: ConnHandle) -> bool:
+        return conn in self.members
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.name} ({len(self.members)} members)>"
+
+
+class Rooms:
+    """
+    Index of the rooms by name. Rooms are created on first join and removed once the
+    last member leaves. Connections keep the names of their rooms (see
+    `ConnHandle.rooms`), so a closed connection leaves its rooms without scanning the
+    index. It is not thread safe, use it from the main eventloop of server only.
+    """
+
+    def __init__(self):
+        self.rooms: Dict[str, Room] = {}
+
+    def get(self, name: str) -> Room | None:
+        """Provides the room if it has any members."""
+        return self.rooms.get(name)
+
+    def join(self, name: str, conn: ConnHandle) -> bool:
+        """Adds the connection to the room, provides `False` if already joined."""
+        if (room := self.rooms.get(name)) is None:
+            room = self.rooms[name] = Room(name)
+            logger.debug(f"created room {name}")
+        if not room.add(conn):
+            return False
+        conn.rooms.add(name)
+        return True
+
+    def leave(self, name: str, conn: ConnHandle) -> bool:
+        """Removes the connection from the room, provides `False` if not joined."""
+        if (room := self.rooms.get(name)) is None or not room.discard(conn):
+            return False
+        conn.rooms.discard(name)
+        if not room:
+            del self.rooms[name]
+            logger.debug(f"removed room {name}")
+        return True
+
+    def leave_all(self, conn: ConnHandle):
+        """Removes the connection from all of its rooms."""
+        for name in list(conn.rooms):
+            self.leave(name, conn)
+
+    def is_member(self, name: str, conn: ConnHandle) -> bool:
+        return name in conn.rooms
+
+    def __len__(self) -> int:
+        return len(self.rooms)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.rooms
@@ -0,0 +1,210 @@
+"""
+This module provides the supervisor running the server in many worker processes.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import tempfile
+import multiprocessing
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable, Dict
+
+from whisper.eventloop import EventLoop
+from whisper.logger import setup_logging
+from whisper.packet import PacketRegistery
+from whisper.settings import LOG_DIR
+from whisper.server.backend import ProtocolServer, Server
+from whisper.server.bus import BusClient, BusHub
+from whisper.server.protocol import ProtocolTcpServer
+from whisper.server.tcp import TcpServer
+
+
+logger = logging.getLogger(__name__)
+
+class Supervisor(EventLoop):
+    """
+    Runs `workers` server processes listening on the same port (see `TcpServer`
+    `reuse_port`) and the bus hub connecting them. Each worker runs its own eventloop,
+    so the server scales over the cores. Crashed workers are restarted with
+    exponential backoff and the load reported by workers is logged every
+    `report_interval` seconds.
+
+    Workers are started with the `spawn` method, so they do not inherit the state of
+    the running eventloop. `target` is called in the worker process with the worker
+    id, bus path and `args`.
+    """
+
+    restart_delay: float = 0.5
+    """delay before restarting a crashed worker, doubled on every crash in a row"""
+
+    max_restart_delay: float = 30.0
+    """maximum delay before restarting a crashed worker"""
+
+    stable_uptime: float = 10.0
+    """seconds a worker must run to reset its restart delay"""
+
+    report_interval: float = 10.0
+    """seconds between load reports"""
+
+    def __init__(self,
+        workers: int,
+        target: Callable[..., Any],
+        *args: Any,
+        bus_path: str | None = None,
+    ):
+        super().__init__()
+        self.workers = workers
+        self.target = target
+        self.args = args
+        self.bus_path = bus_path or os.path.join(
+            tempfile.gettempdir(), f"whisper-bus-{os.getpid()}.sock")
+        self.hub = BusHub(self.bus_path)
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: Dict[int, BaseProcess] = {}
+        self.started: Dict[int, float] = {}
+        self.restarts: Dict[int, int] = {}
+        self.delays: Dict[int, float] = {}
+        self.stopping = False
+
+    def run(self):
+        """Starts the workers and supervises them until stopped."""
+        if EventLoop.run_main(self, self.main) is None:
+            logger.info("supervisor exited")
+        else:
+            logger.exception("supervisor exited due to exception")
+
+    async def main(self): # type: ignore[override]
+        await self.hub.start()
+        for worker in range(self.workers):
+            self.spawn(worker)
+        await EventLoop.main(self)
+        self.stopping = True
+        await self.stop_workers()
+        self.hub.close()
+
+    def signal_handler(self, sig: int | None = None):
+        # workers in the same process group receive the signal too, their exit must
+        # not be taken for a crash
+        self.stopping = True
+        super().signal_handler(sig)
+
+    def spawn(self, worker: int):
+        """Starts the worker process."""
+        process = self.context.Process(
+            target=self.target,
+            args=(worker, self.bus_path, *self.args),
+            name=f"whisper-worker-{worker}",
+        )
+        process.start()
+        self.processes[worker] = process
+        self.started[worker] = time.monotonic()
+        logger.info(f"started worker {worker} with pid {process.pid}")
+
+    async def stop_workers(self, timeout: float = 10.0):
+        """Terminates the workers, killing the ones not exiting within timeout."""
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for worker, process in self.processes.items():
+            while process.is_alive() and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            if process.is_alive():
+                logger.warning(f"worker {worker} did not exit, killing it")
+                process.kill()
+            process.join()
+        logger.info("workers stopped")
+
+    async def monitor_coro(self):
+        """Restarts the workers which exited while the supervisor is running."""
+        logger.info("monitor_coro running")
+        try:
+            while True:
+                await asyncio.sleep(0.2)
+                for worker, process in list(self.processes.items()):
+                    if process.exitcode is None or self.stopping:
+                        continue
+                    process.join()
+                    del self.processes[worker]
+                    self.create_task(self.restart(worker, process.exitcode))
+        except self.CancelledError:
+            logger.info("monitor_coro cancelled")
+
+    async def restart(self, worker: int, exitcode: int):
+        """Restarts the worker after a delay growing with consecutive crashes."""
+        uptime = time.monotonic() - self.started[worker]
+        if uptime >= self.stable_uptime:
+            self.delays[worker] = self.restart_delay
+        delay = self.delays.get(worker, self.restart_delay)
+        self.delays[worker] = min(delay * 2, self.max_restart_delay)
+        self.restarts[worker] = self.restarts.get(worker, 0) + 1
+        logger.error(
+            f"worker {worker} exited with code {exitcode} after {uptime:.1f}s, "
+            f"restarting in {delay:.1f}s")
+        await asyncio.sleep(delay)
+        if not self.stopping:
+            self.spawn(worker)
+
+    def load_report(self) -> Dict[int, Dict[str, Any]]:
+        """Provides the latest load reported by each worker."""
+        report = {}
+        for worker in range(self.workers):
+            load = self.hub.loads.get(worker, {})
+            queues = load.get("queues", {})
+            process = self.processes.get(worker)
+            report[worker] = {
+                "pid": process.pid if process else None,
+                "alive": bool(process and process.is_alive()),
+                "restarts": self.restarts.get(worker, 0),
+                "clients": load.get("clients", 0),
+                "recvq": queues.get("recvq", {}).get("depth", 0),
+                "sendq": queues.get("sendq", {}).get("depth", 0),
+                "outboxes": queues.get("outboxes", {}).get("depth", 0),
+            }
+        return report
+
+    async def report_coro(self):
+        """Logs the load of workers every `report_interval` seconds."""
+        try:
+            while True:
+                await asyncio.sleep(self.report_interval)
+                for worker, load in self.load_report().items():
+                    logger.info(
+                        f"worker {worker} pid {load['pid']}: "
+                        f"{load['clients']} clients, recvq {load['recvq']}, "
+                        f"sendq {load['sendq']}, "
+                        f"outboxes {load['outboxes']}, restarts {load['restarts']}")
+        except self.CancelledError:
+            logger.info("report_coro cancelled")
+
+    def initial_tasks(self):
+        """Initial tasks."""
+        return super().initial_tasks() | {self.monitor_coro, self.report_coro}
+
+
+def run_worker(
+    worker: int,
+    bus_path: str,
+    host: str,
+    port: int,
+    transport: str = "socket",
+    options: Dict[str, Any] | None = None,
+    level: int = logging.DEBUG,
+):
+    """Runs a server worker process, the target of `Supervisor` for the server."""
+    setup_logging(level=level, logfile=str(LOG_DIR / f"server-{worker}.log"))
+    PacketRegistery.ensure_regisered()
+    bus = BusClient(bus_path, worker)
+    options = dict(options or {})
+    if options.get("history_dir"):
+        # every worker records all messages, including the ones of other workers
+        history_dir = options["history_dir"]
+        options["history_dir"] = os.path.join(history_dir, f"worker-{worker}")
+    server: Server
+    if transport == "protocol":
+        server = ProtocolServer(ProtocolTcpServer(reuse_port=True), bus=bus, **options)
+    else:
+        server = Server(TcpServer(reuse_port=True), bus=bus, **options)
+    server.run(host, port)
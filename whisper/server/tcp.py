@@ -3,35 +3,48 @@ This module provides connection class for server.
 """
 
 import socket
-from typing import Tuple
+import logging
+from typing import List, Tuple
 
 from whisper.common import Address
+from whisper.sockets import sock_sendmsg
 from whisper.typing import (
+    Buffers as _Buffers,
     EventLoop as _EventLoop,
 )
 
 
+logger = logging.getLogger(__name__)
+
 class TcpServer:
     """
     A TCP oriented asynchronous server connection. It uses `asyncio` event loop to
     performs accept, read and write operations on socket.
     """
 
-    def __init__(self):
-        """Initialises the underlying TCP socket."""
+    def __init__(self, reuse_port: bool = False):
+        """Initialises the underlying TCP socket. With `reuse_port` many processes
+        can listen on the same port and the kernel spreads the connections among
+        them."""
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.sock.setblocking(False)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.backlog = 0
 
     def address(self) -> Address:
         """Server host address as tuple of hostname and port address. Make sure that
         server is serving before it is called."""
         return self.sock.getsockname()
 
-    def start(self, host: str, port: int):
-        """Start the server and listen for incoming connection."""
+    def start(self, host: str, port: int, backlog: int = 1024):
+        """Start the server and listen for incoming connection. Up to `backlog`
+        connections wait to be accepted (capped by the system), the others are
+        refused or retried by the client."""
+        self.backlog = backlog
         self.sock.bind((host, port))
-        self.sock.listen(0)
+        self.sock.listen(backlog)
 
     def stop(self):
         """Stop the server."""
@@ -41,10 +54,35 @@ class TcpServer:
         """Accepts incoming connection."""
         return await loop.sock_accept(self.sock)  # type: ignore
 
+    async def accept_many(self,
+        loop: _EventLoop,
+        limit: int,
+    ) -> List[Tuple[socket.socket, Address]]:
+        """Waits for incoming connection and accepts the other pending connections
+        along with it, at most `limit` connections. An error accepting the others
+        (such as running out of file descriptors) ends the batch, the connections
+        accepted so far are still provided."""
+        accepted = [await self.accept(loop)]
+        while len(accepted) < limit:
+            try:
+                sock, address = self.sock.accept()
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as ex:
+                logger.warning(f"stopped accepting batch of connections: {ex}")
+                break
+            sock.setblocking(False)
+            accepted.append((sock, address))
+        return accepted
+
     async def read(self, sock: socket.socket, n: int, loop: _EventLoop) -> bytes:
-        """Reads `n` bytes from socket."""
+        """Reads at most `n` bytes from socket."""
         return await loop.sock_recv(sock, n)  # type: ignore
 
     async def write(self, sock: socket.socket, data: bytes, loop: _EventLoop):
         """Write `data` to the socket."""
         return await loop.sock_sendall(sock, data) # type: ignore
+
+    async def writev(self, sock: socket.socket, buffers: _Buffers, loop: _EventLoop):
+        """Write `buffers` to the socket in order without joining them."""
+        return await sock_sendmsg(loop, sock, buffers)
@@ -0,0 +1,129 @@
+"""
+This module provides the write-ahead log making the messages posted to rooms durable
+before they are acknowledged. Messages are appended to the log and made durable
+together with a single fsync per commit, the history of rooms is brought up to date
+from the log after a crash.
+"""
+
+import os
+import zlib
+import struct
+import logging
+import threading
+from enum import StrEnum, auto
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("=IIQH")
+"""checksum of the rest of entry, record size, sequence and room name size"""
+
+_CHECKSUM = struct.Struct("=I")
+
+
+class Durability(StrEnum):
+    """When the messages posted to rooms are made durable."""
+
+    NONE = auto()
+    """no write-ahead log, messages are fanned out right away"""
+
+    BATCHED = auto()
+    """messages queued within the commit window are made durable together"""
+
+    PER_MESSAGE = auto()
+    """every message is made durable on its own"""
+
+
+class WriteAheadLog:
+    """
+    Log file of the messages accepted but not yet checkpointed into the history of
+    rooms. Entries are buffered by `append` and written and synced to disk by
+    `commit`. Each entry holds the room, the sequence of message in the history of
+    room and the encoded message, guarded by a checksum so a torn entry at the end of
+    the log is detected on recovery.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.size = os.fstat(self.fd).st_size
+        """bytes of the log written to disk"""
+        self.buffer = bytearray()
+        self.lock = threading.Lock()
+        """held while the log is written, commits run in worker threads"""
+        self.commits = 0
+        self.entries = 0
+        """entries committed so far"""
+        self.pending = 0
+        """entries buffered for the next commit"""
+
+    def append(self, room: str, seq: int, record: bytes):
+        """Buffers the entry for the next commit."""
+        name = room.encode()
+        entry = bytearray(_HEADER.pack(0, len(record), seq, len(name)))
+        entry += name
+        entry += record
+        with memoryview(entry) as view:
+            _CHECKSUM.pack_into(entry, 0, zlib.crc32(view[_CHECKSUM.size:]))
+        self.buffer += entry
+        self.pending += 1
+
+    def commit(self):
+        """Writes the buffered entries and syncs them to disk. It blocks, run it in
+        a worker pool."""
+        with self.lock:
+            if not self.buffer:
+                return
+            written = 0
+            with memoryview(self.buffer) as data:
+                while written < len(data):
+                    written += os.write(self.fd, data[written:])
+            os.fsync(self.fd)
+            self.size += written
+            self.buffer.clear()
+            self.commits += 1
+            self.entries += self.pending
+            self.pending = 0
+
+    def entries_from_disk(self) -> Iterator[Tuple[str, int, bytes]]:
+        """Provides the room, sequence and encoded message of the logged entries,
+        stopping at the first torn or corrupt entry."""
+        with open(self.path, "rb") as file:
+            data = file.read()
+        offset = 0
+        while offset < len(data):
+            end = start = offset + _HEADER.size
+            if start <= len(data):
+                checksum, size, seq, name_size = _HEADER.unpack_from(data, offset)
+                end = start + name_size + size
+            if end > len(data) or zlib.crc32(
+                data[offset + _CHECKSUM.size:end]
+            ) != checksum:
+                logger.warning(f"write-ahead log is torn at {offset}, dropped the rest")
+                return
+            room = data[start:start + name_size].decode()
+            yield room, seq, data[start + name_size:end]
+            offset = end
+
+    def truncate(self):
+        """Drops the logged entries once they are checkpointed into the history."""
+        with self.lock:
+            os.ftruncate(self.fd, 0)
+            os.fsync(self.fd)
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": self.size,
+            "commits": self.commits,
+            "entries": self.entries,
+            "pending": self.pending,
+        }
+
+    def close(self):
+        """Closes the log once the running commit is done."""
+        with self.lock:
+            os.close(self.fd)
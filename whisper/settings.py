@@ -21,6 +21,10 @@ class Env(StrEnum):
 ENV = Env(os.environ.get("WHISPER_ENV", "dev"))
 
 
+EVENT_LOOP = os.environ.get("WHISPER_EVENT_LOOP", "asyncio")
+"""eventloop implementation of server and client (see `LoopRegistery`)"""
+
+
 LOG_DIR = pathlib.Path("logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
@@ -0,0 +1,62 @@
+"""
+This module provides asynchronous socket helpers shared by client and server
+connections.
+"""
+
+import socket
+import asyncio
+from typing import Sequence
+
+from whisper.typing import EventLoop as _EventLoop
+
+
+IOV_MAX = 1024
+"""maximum buffers passed to a single `sendmsg` call"""
+
+
+async def sock_writable(loop: _EventLoop, sock: socket.socket):
+    """Waits until the socket is ready for writing."""
+    future: asyncio.Future[None] = loop.create_future()
+    fd = sock.fileno()
+
+    def ready():
+        if not future.done():
+            future.set_result(None)
+
+    loop.add_writer(fd, ready)
+    try:
+        await future
+    finally:
+        loop.remove_writer(fd)
+
+
+async def sock_sendmsg(
+    loop: _EventLoop,
+    sock: socket.socket,
+    buffers: Sequence[bytes | memoryview],
+):
+    """
+    Vectored counterpart of `loop.sock_sendall`. It writes all the buffers with
+    `socket.sendmsg` without concatenating them, so the payload is never copied.
+    Falls back to `sock_sendall` on platforms without `sendmsg`.
+
+    The buffers are not modified, hence same buffers can be written to many sockets.
+    """
+    if not hasattr(sock, "sendmsg"):
+        return await loop.sock_sendall(sock, b"".join(buffers))
+
+    views = [view for view in map(memoryview, buffers) if view.nbytes]
+    index = 0
+    while index < len(views):
+        try:
+            sent = sock.sendmsg(views[index:index + IOV_MAX])
+        except (BlockingIOError, InterruptedError):
+            await sock_writable(loop, sock)
+            continue
+        while sent:
+            size = views[index].nbytes
+            if sent < size:
+                views[index] = views[index][sent:]
+                break
+            sent -= size
+            index += 1
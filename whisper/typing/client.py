@@ -4,7 +4,7 @@ This module provides typing support for client package.
 
 from typing import Protocol
 
-from .common import Address, EventLoop
+from .common import Address, Buffers, EventLoop
 
 
 class TcpClient(Protocol):
@@ -13,3 +13,4 @@ class TcpClient(Protocol):
     def close(self): ...
     async def read(self, n: int, loop: EventLoop) -> bytes: ...
     async def write(self, data: bytes, loop: EventLoop): ...
+    async def writev(self, buffers: Buffers, loop: EventLoop): ...
@@ -3,7 +3,8 @@ This module provides common type annotations for other typing modules.
 """
 
 from socket import socket
-from typing import Tuple, TypeVar, Protocol
+from asyncio import Future
+from typing import Any, Callable, Sequence, Tuple, TypeVar, Protocol
 
 
 Address = Tuple[str, int]
@@ -12,9 +13,20 @@ class EventLoop(Protocol):
     async def sock_accept(self, sock: socket) -> Tuple[socket, Address]: ...
     async def sock_recv(self, sock: socket, n: int) -> bytes: ...
     async def sock_sendall(self, sock: socket, data: bytes): ...
+    def create_future(self) -> Future[Any]: ...
+    def add_writer(self, fd: int, callback: Callable[..., Any], *args: Any): ...
+    def remove_writer(self, fd: int) -> bool: ...
+    async def create_server(self,
+        protocol_factory: Callable[[], Any], *args: Any, **kwargs: Any) -> Any: ...
+
+Buffers = Sequence[bytes | memoryview]
 
 P = TypeVar("P")
 
 class AsyncQueue(Protocol[P]):
     async def put(self, item: P): ...
     async def get(self) -> P: ...
+    def put_nowait(self, item: P): ...
+    def get_nowait(self) -> P: ...
+    def empty(self) -> bool: ...
+    def qsize(self) -> int: ...
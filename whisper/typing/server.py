@@ -3,15 +3,24 @@ This module provides typing support for server package.
 """
 
 from socket import socket
-from typing import Tuple, Protocol
+from typing import Any, List, Tuple, Protocol
 
-from .common import Address, EventLoop
+from .common import Address, Buffers, EventLoop
 
 
 class TcpServer(Protocol):
     def address(self) -> Address: ...
-    def start(self, host: str, port: int): ...
+    def start(self, host: str, port: int, backlog: int = ...): ...
     def stop(self): ...
     async def accept(self, loop: EventLoop) -> Tuple[socket, Address]: ...
+    async def accept_many(self,
+        loop: EventLoop, limit: int) -> List[Tuple[socket, Address]]: ...
     async def read(self, sock: socket, n: int, loop: EventLoop) -> bytes: ...
     async def write(self, sock: socket, data: bytes, loop: EventLoop): ...
+    async def writev(self, sock: socket, buffers: Buffers, loop: EventLoop): ...
+
+
+class ProtocolServer(Protocol):
+    def connection_made(self, conn: Any, protocol: Any): ...
+    def packets_received(self, conn: Any, packets: List[Any]): ...
+    def connection_lost(self, conn: Any, exc: Exception | None): ...